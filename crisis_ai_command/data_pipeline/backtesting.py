@@ -0,0 +1,237 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import shared_memory
+import numpy as np
+
+from data_pipeline.serialization import unpack, unpack_records
+
+# Record fields the scorer reads, per source (column 0 of every array is the timestamp)
+SOURCE_FIELDS = {
+    'weather': ['risk_score'],
+    'traffic': ['congestion_level', 'incident_detected'],
+    'social': ['sentiment', 'crisis_keywords'],
+    'news': ['severity']
+}
+
+ALERT_LEVELS = ('HIGH', 'CRITICAL')
+
+# Worker-side state, filled by _init_worker
+_WORKER = {}
+
+
+def _record_time(record):
+    value = record.get('timestamp')
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value) if value is not None else np.nan
+
+
+def _init_worker(specs, offsets):
+    """Attach the shared history arrays once per worker process"""
+    from data_pipeline.processors import CUDADataProcessor
+
+    _WORKER['shm'] = []
+    _WORKER['arrays'] = {}
+    for source, (name, shape) in specs.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _WORKER['shm'].append(shm)
+        _WORKER['arrays'][source] = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _WORKER['offsets'] = offsets
+    _WORKER['processor'] = CUDADataProcessor()
+
+
+def _run_config(config_id, params, locations, tick_seconds):
+    """Replay every location through the scorer with one parameter set"""
+    processor = _WORKER['processor']
+    processor.rule_overrides = params
+
+    start = time.perf_counter()
+    location_reports = {}
+    for location in locations:
+        location_reports[location] = _replay_location(processor, location, tick_seconds)
+
+    return {
+        'config_id': config_id,
+        'params': params,
+        'locations': location_reports,
+        'ticks': sum(r['ticks'] for r in location_reports.values()),
+        'transition_count': sum(r['transition_count'] for r in location_reports.values()),
+        'alert_count': sum(r['alert_count'] for r in location_reports.values()),
+        'runtime_seconds': time.perf_counter() - start
+    }
+
+
+def _window_reduce(ufunc, values, lo, hi):
+    """ufunc reduced over values[lo:hi] for every window, 0 for empty ones"""
+    out = np.zeros(len(lo))
+    filled = hi > lo
+    if filled.any():
+        # reduceat over interleaved (lo, hi) bounds; the padding keeps hi a valid index
+        bounds = np.stack([lo[filled], hi[filled]], axis=1).ravel()
+        out[filled] = ufunc.reduceat(np.r_[values, 0.0], bounds)[::2]
+    return out
+
+
+def _window_features(views, ticks, plan):
+    """Scoring features for every tick at once, straight from the shared arrays
+
+    Each tick sees the records in [tick - window, tick] for its source, the
+    same window the processor takes from a time-indexed series; the result
+    has the keys of CUDADataProcessor._extract_features, one array entry per tick.
+    """
+    stats = {}
+    for source, view in views.items():
+        times = view[:, 0]
+        lo = np.searchsorted(times, ticks - plan.windows[source] * 60, side='left')
+        hi = np.searchsorted(times, ticks, side='right')
+        stats[source] = (view, lo, hi, (hi - lo).astype(np.float64))
+
+    def mean(source, column):
+        view, lo, hi, count = stats[source]
+        sums = _window_reduce(np.add, view[:, column], lo, hi)
+        return np.divide(sums, count, out=np.zeros_like(sums), where=count > 0)
+
+    weather, w_lo, w_hi, weather_count = stats['weather']
+    latest = weather[np.maximum(w_hi - 1, 0), 1] if len(weather) else np.zeros(len(ticks))
+    news, n_lo, n_hi, news_count = stats['news']
+    severity = news[:, 1]
+    return {
+        'weather_count': weather_count,
+        'weather_latest': np.where(w_hi > w_lo, latest, 0.0),
+        'traffic_count': stats['traffic'][3],
+        'traffic_congestion': mean('traffic', 1),
+        'traffic_incident_rate': mean('traffic', 2),
+        'social_count': stats['social'][3],
+        'social_sentiment': mean('social', 1),
+        'social_crisis_rate': mean('social', 2),
+        'news_count': news_count,
+        'news_max': _window_reduce(np.maximum, severity, n_lo, n_hi),
+        'news_mean': mean('news', 1),
+        'news_high_count': _window_reduce(np.add, (severity > plan.news_high_severity).astype(np.float64), n_lo, n_hi)
+    }
+
+
+def _replay_location(processor, location, tick_seconds):
+    """Score one location at every tick and collect level changes"""
+    views = {}
+    for source, array in _WORKER['arrays'].items():
+        lo, hi = _WORKER['offsets'][source][location]
+        views[source] = array[lo:hi]
+
+    times = np.concatenate([v[:, 0] for v in views.values()])
+    if times.size == 0:
+        return {'ticks': 0, 'transitions': [], 'transition_count': 0,
+                'alert_count': 0, 'level_counts': {}}
+
+    ticks = np.arange(times.min(), times.max() + tick_seconds, tick_seconds)
+    plan = processor.scoring_plan(location)
+    level_index = plan.evaluate(_window_features(views, ticks, plan))['level_index']
+    levels = [plan.level_names[i] for i in level_index.tolist()]
+
+    level_counts = {}
+    for level in levels:
+        level_counts[level] = level_counts.get(level, 0) + 1
+
+    transitions = []
+    alert_count = 0
+    for k in np.flatnonzero(level_index[1:] != level_index[:-1]) + 1:
+        previous_level, level = levels[k - 1], levels[k]
+        transitions.append((datetime.fromtimestamp(ticks[k]).isoformat(), previous_level, level))
+        if level in ALERT_LEVELS and previous_level not in ALERT_LEVELS:
+            alert_count += 1
+
+    return {
+        'ticks': len(ticks),
+        'transitions': transitions,
+        'transition_count': len(transitions),
+        'alert_count': alert_count,
+        'level_counts': level_counts
+    }
+
+
+class HistoricalBacktester:
+    """Replay recorded per-location data through the scorer for many parameter sets.
+
+    History is packed once into one float64 array per source (timestamp plus
+    the fields the scorer reads) and placed in shared memory, so pool workers
+    map the same pages instead of receiving a pickled copy per task.
+    """
+
+    def __init__(self, history):
+        # history: {location: {'weather': [records], 'traffic': [...], ...}}
+        self.history = history
+        self.locations = list(history)
+
+    @classmethod
+    def from_collectors(cls, collectors):
+        """Build a backtester from live collectors ({location: RealTimeDataCollector})"""
+        return cls({location: collector.get_series() for location, collector in collectors.items()})
+
+    @classmethod
+    def from_snapshots(cls, snapshots):
+        """Build a backtester from collector snapshots ({location: export_snapshot() bytes})"""
+        history = {}
+        for location, buffer in snapshots.items():
+            sources = unpack(buffer)['sources']
+            history[location] = {source: unpack_records(batch) for source, batch in sources.items()}
+        return cls(history)
+    
+    def _pack(self):
+        """Pack history into contiguous per-source arrays with per-location offsets"""
+        arrays = {}
+        offsets = {}
+        for source, fields in SOURCE_FIELDS.items():
+            blocks = []
+            offsets[source] = {}
+            position = 0
+            for location in self.locations:
+                records = self.history[location].get(source, [])
+                block = np.array(
+                    [[_record_time(r)] + [float(r.get(f, 0) or 0) for f in fields] for r in records],
+                    dtype=np.float64
+                ).reshape(-1, len(fields) + 1)
+                # Snapshots carry NaN for missing fields; they count as 0 like absent keys
+                block[:, 1:] = np.nan_to_num(block[:, 1:])
+                block = block[~np.isnan(block[:, 0])]
+                block = block[np.argsort(block[:, 0], kind='stable')]
+                blocks.append(block)
+                offsets[source][location] = (position, position + len(block))
+                position += len(block)
+            arrays[source] = np.concatenate(blocks) if blocks else np.zeros((0, len(fields) + 1))
+        return arrays, offsets
+
+    def run(self, param_sets, tick_seconds=300, max_workers=None):
+        """Backtest each parameter set in parallel and return one report per set
+
+        param_sets: list of scoring rule overrides, shaped like sections of
+        scoring_rules.json (e.g. {'weights': {...}, 'thresholds': {...}}).
+        """
+        if not param_sets:
+            return []
+
+        arrays, offsets = self._pack()
+        segments = []
+        specs = {}
+        try:
+            for source, array in arrays.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                segments.append(shm)
+                np.ndarray(array.shape, dtype=np.float64, buffer=shm.buf)[:] = array
+                specs[source] = (shm.name, array.shape)
+
+            max_workers = max_workers or min(len(param_sets), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(specs, offsets)) as pool:
+                futures = [
+                    pool.submit(_run_config, config_id, params, self.locations, tick_seconds)
+                    for config_id, params in enumerate(param_sets)
+                ]
+                reports = [future.result() for future in futures]
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+        return reports
@@ -3,54 +3,146 @@ import numpy as np
 from datetime import datetime, timedelta
 import torch
 
+from data_pipeline.fire_spread import FireSpreadModel
+from data_pipeline.flood_model import DEMFloodModel
+from data_pipeline.hazard_stack import HazardRasterStack
+from data_pipeline.interpolation import WeatherFieldInterpolator, get_observation_store
+from data_pipeline.overlay_cache import get_overlay_cache, overlay_key, quantize_weather
+from data_pipeline.overlay_pyramid import OverlayPyramid
+from data_pipeline.profiling import profiled
+from data_pipeline.tile_cache import get_tile_cache, lat_lon_to_tile, neighbour_tiles, tile_bounds
+
 class ClimateDataCollector:
-    def __init__(self):
+    # Wildfire simulation horizon: FIRE_STEPS steps of FIRE_STEP_MINUTES each
+    FIRE_STEPS = 12
+    FIRE_STEP_MINUTES = 10
+    
+    # Neighbouring stations within this radius shape the simulated weather fields
+    OBSERVATION_RADIUS_KM = 150.0
+    
+    # How each gridded field is block-reduced for coarser pyramid levels
+    PYRAMID_REDUCERS = {
+        'flood_zones': {'flood_risk': 'max', 'flood_depth_m': 'max', 'flow_accumulation': 'max'},
+        'wildfire_zones': {'fire_risk': 'max', 'arrival_time': 'min'}
+    }
+    
+    def __init__(self, flood_resolution=256, fire_resolution=256, radar_zoom=8, interpolation='idw'):
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        # Finest grid cells per side; the map reads coarser pyramid levels at low zoom
+        self.flood_resolution = flood_resolution
+        self.fire_resolution = fire_resolution
+        self.fire_model = FireSpreadModel()
+        # Terrain flood model; used when RTACC_DEM_DIR points at elevation tiles
+        self.flood_model = DEMFloodModel()
+        # Radar tiles are served from the shared on-disk cache and refreshed in the background
+        self.radar_zoom = radar_zoom
+        self.tile_cache = get_tile_cache()
+        self.overlay_cache = get_overlay_cache()
+        # Readings from every monitored location, interpolated into spatially varying inputs
+        self.observation_store = get_observation_store()
+        self.interpolation = interpolation
         
-    def get_weather_radar_data(self, coordinates, zoom=5):
-        """Get precipitation radar overlays from OpenWeatherMap"""
+    def get_weather_radar_data(self, coordinates, zoom=None):
+        """Get precipitation radar overlays from OpenWeatherMap via the local tile cache"""
         lat, lon = coordinates
-        base_url = "http://maps.openweathermap.org/maps/2.0/weather"
-        
-        # Get multiple radar layers
-        layers = {
-            'precipitation': f"{base_url}/PR0/{zoom}/{int(lat)}/{int(lon)}.png",
-            'temperature': f"{base_url}/TA2/{zoom}/{int(lat)}/{int(lon)}.png", 
-            'wind': f"{base_url}/WND/{zoom}/{int(lat)}/{int(lon)}.png",
-            'pressure': f"{base_url}/APM/{zoom}/{int(lat)}/{int(lon)}.png"
-        }
+        z, x, y = lat_lon_to_tile(lat, lon, zoom or self.radar_zoom)
+        
+        # Get multiple radar layers; missing or stale tiles are fetched in the background
+        layers = {}
+        for layer in self.tile_cache.layers:
+            self.tile_cache.prefetch(layer, z, x, y)
+            layers[layer] = {
+                'url': self.tile_cache.url(layer, z, x, y).split('?')[0],
+                'tile': (z, x, y),
+                'bounds': tile_bounds(z, x, y),
+                'path': self.tile_cache.get_cached(layer, z, x, y),
+                'fresh': self.tile_cache.is_fresh(layer, z, x, y)
+            }
         return layers
     
-    def simulate_flood_zones(self, coordinates, precipitation_data):
-        """Simulate potential flood zones based on elevation and precipitation"""
+    def radar_tiles(self, coordinates, layer='precipitation', zoom=None, radius=1):
+        """Cached tiles of a radar layer covering the view around coordinates"""
+        lat, lon = coordinates
+        z, x, y = lat_lon_to_tile(lat, lon, zoom or self.radar_zoom)
+        tiles = []
+        for tile in [(z, x, y)] + neighbour_tiles(z, x, y, radius=radius, zoom_delta=0):
+            path = self.tile_cache.get_cached(layer, *tile)
+            if path:
+                tiles.append({'tile': tile, 'bounds': tile_bounds(*tile), 'path': path})
+        return tiles
+    
+    def _weather_fields(self, observations, lat_range, lon_range, names):
+        """Interpolated weather grids over the viewport, or {} with fewer than two stations"""
+        if not observations or len(observations) < 2:
+            return {}
+        return WeatherFieldInterpolator(observations, self.interpolation).fields(lat_range, lon_range, names)
+    
+    def simulate_flood_zones(self, coordinates, precipitation_data, resolution=None, observations=None):
+        """Simulate potential flood zones based on elevation and precipitation
+        
+        observations: nearby station readings (dicts with lat/lon); with two
+        or more, rainfall varies across the grid instead of being uniform.
+        """
         lat, lon = coordinates
+        precipitation = precipitation_data.get('precipitation', precipitation_data.get('intensity', 0))
         
         # Create flood risk heatmap data
-        grid_size = 50
+        grid_size = resolution or self.flood_resolution
         lat_range = np.linspace(lat - 0.1, lat + 0.1, grid_size)
         lon_range = np.linspace(lon - 0.1, lon + 0.1, grid_size)
+        precipitation = self._weather_fields(observations, lat_range, lon_range, ('precipitation',)).get(
+            'precipitation', precipitation)
+        
+        # Route rain over real terrain when elevation tiles cover the viewport
+        if self.flood_model.available():
+            terrain = self.flood_model.simulate(lat_range, lon_range, precipitation)
+            if terrain is not None:
+                return {
+                    'lat_range': lat_range,
+                    'lon_range': lon_range,
+                    'flood_risk': terrain['flood_risk'],
+                    'flood_depth_m': terrain['flood_depth_m'],
+                    'flow_accumulation': terrain['flow_accumulation'],
+                    'max_risk': float(terrain['flood_risk'].max()),
+                    'max_depth_m': float(terrain['flood_depth_m'].max()),
+                    'model': 'dem'
+                }
         
-        # Simulate elevation-based flood risk
-        flood_risk = np.zeros((grid_size, grid_size))
-        for i, lat_val in enumerate(lat_range):
-            for j, lon_val in enumerate(lon_range):
-                # Simulate risk based on distance from center and precipitation
-                distance_factor = np.sqrt((lat_val - lat)**2 + (lon_val - lon)**2)
-                precip_factor = precipitation_data.get('intensity', 0) / 10.0
-                flood_risk[i, j] = max(0, precip_factor - distance_factor * 100)
+        # Simulate risk based on distance from center and precipitation, for the whole grid at once
+        flood_risk = self._distance_flood_risk(lat_range - lat, lon_range - lon, precipitation)
         
         return {
-            'lat_range': lat_range.tolist(),
-            'lon_range': lon_range.tolist(), 
-            'flood_risk': flood_risk.tolist(),
-            'max_risk': float(np.max(flood_risk))
+            'lat_range': lat_range,
+            'lon_range': lon_range,
+            'flood_risk': flood_risk,
+            'max_risk': float(flood_risk.max()),
+            'model': 'distance'
         }
     
-    def simulate_wildfire_spread(self, coordinates, weather_data):
-        """Simulate wildfire spread based on wind and temperature"""
+    @staticmethod
+    def _distance_flood_risk(lat_offsets, lon_offsets, precipitation):
+        """Distance-from-centre flood risk
+        
+        precipitation may be a scalar, (N,) for a (N, H, W) batch, or an (H, W) grid.
+        """
+        lat_grid, lon_grid = np.meshgrid(lat_offsets, lon_offsets, indexing='ij', sparse=True)
+        distance_factor = np.sqrt(lat_grid ** 2 + lon_grid ** 2)
+        precipitation = np.asarray(precipitation, dtype=np.float64)
+        if precipitation.ndim < 2:
+            precipitation = precipitation[..., None, None]
+        precip_factor = precipitation / 10.0
+        return np.maximum(0, precip_factor - distance_factor * 100)
+    
+    def simulate_wildfire_spread(self, coordinates, weather_data, resolution=None, fuel=None, observations=None):
+        """Simulate wildfire spread driven by wind, humidity, temperature and optional fuel raster
+        
+        The danger threshold uses the local reading; with two or more nearby
+        observations the spread runs on interpolated weather grids.
+        """
         lat, lon = coordinates
         temp = weather_data.get('temperature', 20)
         wind_speed = weather_data.get('wind_speed', 0)
+        wind_direction = weather_data.get('wind_direction', 0)
         humidity = weather_data.get('humidity', 50)
         
         # Fire danger index calculation
@@ -58,41 +150,216 @@ class ClimateDataCollector:
         
         if fire_danger > 5:  # High fire danger threshold
             # Simulate fire spread zones
-            grid_size = 30
+            grid_size = resolution or self.fire_resolution
             lat_range = np.linspace(lat - 0.05, lat + 0.05, grid_size)
             lon_range = np.linspace(lon - 0.05, lon + 0.05, grid_size)
+            cell_size_m = 0.1 * 111000.0 / (grid_size - 1)
             
-            fire_risk = np.zeros((grid_size, grid_size))
-            center_i, center_j = grid_size // 2, grid_size // 2
+            fields = self._weather_fields(observations, lat_range, lon_range,
+                                         ('temperature', 'humidity', 'wind'))
+            temp = fields.get('temperature', temp)
+            humidity = fields.get('humidity', humidity)
+            wind_speed = fields.get('wind_speed', wind_speed)
+            wind_direction = fields.get('wind_direction', wind_direction)
             
-            for i in range(grid_size):
-                for j in range(grid_size):
-                    distance = np.sqrt((i - center_i)**2 + (j - center_j)**2)
-                    fire_risk[i, j] = max(0, fire_danger - distance * 0.5)
+            # Time-stepped spread from an ignition at the centre
+            arrival_time = self.fire_model.simulate(
+                (grid_size, grid_size), cell_size_m,
+                self.FIRE_STEPS, self.FIRE_STEP_MINUTES,
+                wind_speed, wind_direction, temp, humidity,
+                fuel=1.0 if fuel is None else fuel
+            )
+            horizon = self.FIRE_STEPS * self.FIRE_STEP_MINUTES
+            
+            # Risk is highest where fire arrives first, zero where it does not arrive
+            cell_danger = np.maximum(0.0, ((temp - 10) * wind_speed) / (humidity + 1))
+            fire_risk = np.where(np.isfinite(arrival_time), cell_danger * (1 - arrival_time / horizon), 0.0)
+            cell_area_km2 = (cell_size_m / 1000.0) ** 2
             
             return {
-                'lat_range': lat_range.tolist(),
-                'lon_range': lon_range.tolist(),
-                'fire_risk': fire_risk.tolist(),
+                'lat_range': lat_range,
+                'lon_range': lon_range,
+                'fire_risk': fire_risk,
+                'arrival_time': arrival_time,
+                'step_minutes': self.FIRE_STEP_MINUTES,
+                'steps': self.FIRE_STEPS,
+                'burned_area_km2': float(np.isfinite(arrival_time).sum() * cell_area_km2),
                 'fire_danger_index': float(fire_danger)
             }
         
         return None
     
-    def get_climate_overlays(self, coordinates, weather_data):
-        """Generate all climate visualization overlays"""
-        overlays = {
-            'radar_layers': self.get_weather_radar_data(coordinates),
-            'timestamp': datetime.now().isoformat()
-        }
+    def simulate_hazards_batch(self, coordinates_list, weather_list, resolution=None, include_rasters=False):
+        """Flood and fire hazard for many locations in one stacked (N, H, W) computation
+        
+        Returns one summary per location (max risk and hotspot per hazard);
+        include_rasters adds the full grids and their lat/lon ranges.
+        """
+        n = len(coordinates_list)
+        centres = np.asarray(coordinates_list, dtype=np.float64).reshape(n, 2)
+        
+        def field(name, default):
+            values = [w.get(name) for w in weather_list]
+            return np.array([default if v is None else v for v in values], dtype=np.float64)
+        
+        precipitation = field('precipitation', 0)
+        temperature = field('temperature', 20)
+        wind_speed = field('wind_speed', 0)
+        wind_direction = field('wind_direction', 0)
+        humidity = field('humidity', 50)
+        
+        # Flood: shared offset grid, one broadcast over all locations
+        flood_size = resolution or self.flood_resolution
+        flood_offsets = np.linspace(-0.1, 0.1, flood_size)
+        flood_risk = self._distance_flood_risk(flood_offsets, flood_offsets, precipitation)
+        if self.flood_model.available():
+            # Terrain differs per location, so DEM-covered cities are routed one by one
+            for i in range(n):
+                terrain = self.flood_model.simulate(centres[i, 0] + flood_offsets, centres[i, 1] + flood_offsets, precipitation[i])
+                if terrain is not None:
+                    flood_risk[i] = terrain['flood_risk']
+        flood_risk = np.where((precipitation > 1.0)[:, None, None], flood_risk, 0.0)
+        
+        # Fire: every location above the danger threshold spreads in one batched simulation
+        fire_size = resolution or self.fire_resolution
+        fire_offsets = np.linspace(-0.05, 0.05, fire_size)
+        fire_danger = ((temperature - 10) * wind_speed) / (humidity + 1)
+        burning = np.flatnonzero(fire_danger > 5)
+        fire_risk = np.zeros((n, fire_size, fire_size))
+        arrival_time = np.full((n, fire_size, fire_size), np.inf, dtype=np.float32)
+        if burning.size:
+            cell_size_m = 0.1 * 111000.0 / (fire_size - 1)
+            
+            def per_location(values):
+                return values[burning, None, None]
+            
+            arrival_time[burning] = self.fire_model.simulate(
+                (burning.size, fire_size, fire_size), cell_size_m,
+                self.FIRE_STEPS, self.FIRE_STEP_MINUTES,
+                per_location(wind_speed), per_location(wind_direction),
+                per_location(temperature), per_location(humidity)
+            )
+            horizon = self.FIRE_STEPS * self.FIRE_STEP_MINUTES
+            reached = np.isfinite(arrival_time[burning])
+            fire_risk[burning] = np.where(reached, per_location(fire_danger) * (1 - arrival_time[burning] / horizon), 0.0)
+        
+        def hotspots(grids, offsets):
+            flat_index = grids.reshape(n, -1).argmax(axis=1)
+            rows, cols = np.unravel_index(flat_index, grids.shape[1:])
+            return grids.reshape(n, -1).max(axis=1), centres[:, 0] + offsets[rows], centres[:, 1] + offsets[cols]
+        
+        flood_max, flood_lat, flood_lon = hotspots(flood_risk, flood_offsets)
+        fire_max, fire_lat, fire_lon = hotspots(fire_risk, fire_offsets)
+        cell_area_km2 = (0.1 * 111.0 / (fire_size - 1)) ** 2
+        burned_area = np.isfinite(arrival_time).reshape(n, -1).sum(axis=1) * cell_area_km2
+        
+        results = []
+        for i in range(n):
+            result = {
+                'coordinates': (float(centres[i, 0]), float(centres[i, 1])),
+                'flood_max_risk': float(flood_max[i]),
+                'flood_hotspot': (float(flood_lat[i]), float(flood_lon[i])) if flood_max[i] > 0 else None,
+                'fire_max_risk': float(fire_max[i]),
+                'fire_hotspot': (float(fire_lat[i]), float(fire_lon[i])) if fire_max[i] > 0 else None,
+                'fire_danger_index': float(fire_danger[i]),
+                'burned_area_km2': float(burned_area[i])
+            }
+            if include_rasters:
+                result.update({
+                    'flood_lat_range': centres[i, 0] + flood_offsets,
+                    'flood_lon_range': centres[i, 1] + flood_offsets,
+                    'flood_risk': flood_risk[i],
+                    'fire_lat_range': centres[i, 0] + fire_offsets,
+                    'fire_lon_range': centres[i, 1] + fire_offsets,
+                    'fire_risk': fire_risk[i],
+                    'arrival_time': arrival_time[i]
+                })
+            results.append(result)
+        return results
+    
+    def nearby_observations(self, coordinates, weather_data, station=None):
+        """Quantized readings of neighbouring stations plus the local one, or [] with no neighbours
+        
+        station: the local station's id in the observation store. The map may
+        be centred a little away from where the station was stored, so it is
+        only matched by rounded coordinates when no id is known.
+        """
+        lat, lon = coordinates
+        
+        def is_local(o):
+            if station is not None:
+                return o['station'] == station
+            return (round(o['lat'], 3), round(o['lon'], 3)) == (round(lat, 3), round(lon, 3))
+        
+        neighbours = [
+            dict(quantize_weather(o), lat=round(o['lat'], 3), lon=round(o['lon'], 3))
+            for o in self.observation_store.nearby(lat, lon, self.OBSERVATION_RADIUS_KM)
+            # The local station is represented by weather_data itself
+            if not is_local(o)
+        ]
+        if not neighbours:
+            return []
+        neighbours.sort(key=lambda o: (o['lat'], o['lon']))
+        return [dict(weather_data, lat=lat, lon=lon)] + neighbours
+    
+    def _simulate_overlays(self, coordinates, weather_data, observations=None):
+        """Flood and wildfire simulations for one (quantized) weather state"""
+        simulations = {}
         
         # Add flood simulation if precipitation detected
         if weather_data.get('precipitation', 0) > 1.0:
-            overlays['flood_zones'] = self.simulate_flood_zones(coordinates, weather_data)
+            simulations['flood_zones'] = self.simulate_flood_zones(coordinates, weather_data, observations=observations)
         
         # Add wildfire simulation if conditions are dry and hot
-        wildfire_data = self.simulate_wildfire_spread(coordinates, weather_data)
+        wildfire_data = self.simulate_wildfire_spread(coordinates, weather_data, observations=observations)
         if wildfire_data:
-            overlays['wildfire_zones'] = wildfire_data
+            simulations['wildfire_zones'] = wildfire_data
+        
+        # Build every level of detail once, alongside the cached simulation
+        for name, reducers in self.PYRAMID_REDUCERS.items():
+            if name in simulations:
+                data = simulations[name]
+                data['pyramid'] = OverlayPyramid(
+                    data['lat_range'], data['lon_range'],
+                    {field: data[field] for field in reducers if field in data},
+                    reducers
+                )
+        
+        # One composite raster over every hazard present, for the map and per-cell scoring
+        hazard_stack = HazardRasterStack.from_overlays(simulations, resolution=self.flood_resolution)
+        if hazard_stack is not None:
+            simulations['hazard_stack'] = hazard_stack
+        
+        return simulations
+    
+    @profiled('climate.get_climate_overlays')
+    def get_climate_overlays(self, coordinates, weather_data, zoom=None):
+        """Generate all climate visualization overlays
+        
+        With a map zoom, gridded overlays are returned at the pyramid level
+        matching it; without one, at full resolution.
+        """
+        overlays = {
+            'radar_layers': self.get_weather_radar_data(coordinates),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+        # Simulations run on quantized weather so every reading in a bucket shares one cached result
+        quantized = quantize_weather(weather_data)
+        # Neighbouring stations are quantized too and become part of the key
+        observations = self.nearby_observations(coordinates, quantized, station=weather_data.get('location'))
+        stations = tuple(tuple(sorted(o.items())) for o in observations[1:])
+        key = overlay_key(coordinates, quantized, self.flood_resolution, self.fire_resolution) + (stations,)
+        simulations = self.overlay_cache.get_or_compute(
+            key, lambda: self._simulate_overlays(coordinates, quantized, observations)
+        )
+        overlays.update(simulations)
+        
+        if zoom is not None:
+            for name in self.PYRAMID_REDUCERS:
+                if name in overlays:
+                    overlays[name] = dict(overlays[name], **overlays[name]['pyramid'].view(zoom))
+        if 'hazard_stack' in overlays:
+            overlays['hazard_view'] = overlays['hazard_stack'].view(zoom)
         
-        return overlays
\ No newline at end of file
+        return overlays
@@ -0,0 +1,161 @@
+import itertools
+import os
+import threading
+import time
+
+from data_pipeline.data_sources import RealTimeDataCollector
+
+# A session that has not renewed its lease for this long is treated as gone
+# (browser tabs close without telling the server)
+LEASE_TTL_SECONDS = float(os.getenv('RTACC_LEASE_TTL', 300))
+
+# Collectors nobody watches keep running this long, so switching away and back is instant
+LINGER_SECONDS = float(os.getenv('RTACC_COLLECTOR_LINGER', 60))
+
+
+class CollectorLease:
+    """One session's hold on a shared collector; renew() it more often than the lease TTL"""
+
+    def __init__(self, registry, location, lease_id, collector):
+        self.registry = registry
+        self.location = location
+        self.lease_id = lease_id
+        self.collector = collector
+        self.released = False
+
+    def renew(self):
+        """Extend the lease; returns the collector (a fresh one if the old one was reaped)"""
+        self.collector = self.registry._attach(self.location, self.lease_id)
+        return self.collector
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.registry._detach(self.location, self.lease_id)
+
+
+class CollectorRegistry:
+    """Reference-counted RealTimeDataCollectors shared by every session watching a location.
+
+    acquire() hands out a lease on the location's collector, creating and
+    starting it for the first watcher. Each live lease counts as one
+    reference; a collector whose references have all been released or have
+    expired is stopped after LINGER_SECONDS by a background reaper, so
+    N sessions on one city make the API calls of one.
+    """
+
+    def __init__(self, factory=RealTimeDataCollector, lease_ttl=LEASE_TTL_SECONDS,
+                 linger=LINGER_SECONDS, reap_interval=30.0):
+        self.factory = factory
+        self.lease_ttl = lease_ttl
+        self.linger = linger
+        self.reap_interval = reap_interval
+        self._entries = {}  # location -> {'collector', 'leases': {lease_id: expiry}, 'idle_since'}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._reaper = None
+
+    def acquire(self, location):
+        """Lease on the shared collector for a location"""
+        lease_id = next(self._ids)
+        return CollectorLease(self, location, lease_id, self._attach(location, lease_id))
+
+    def _attach(self, location, lease_id):
+        """Register or extend lease_id on the location's collector, starting one if needed"""
+        self._ensure_reaper()
+        expiry = time.monotonic() + self.lease_ttl
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry is not None:
+                entry['leases'][lease_id] = expiry
+                entry['idle_since'] = None
+                return entry['collector']
+
+        # Geocoding in the constructor is slow; build outside the lock and let the first one win
+        collector = self.factory(location)
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry is None:
+                entry = {'collector': collector, 'leases': {}, 'idle_since': None}
+                self._entries[location] = entry
+                collector.start_collection()
+            entry['leases'][lease_id] = expiry
+            entry['idle_since'] = None
+            return entry['collector']
+
+    def _detach(self, location, lease_id):
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry is not None:
+                entry['leases'].pop(lease_id, None)
+                if not entry['leases']:
+                    entry['idle_since'] = time.monotonic()
+
+    def reap(self, now=None):
+        """Drop expired leases and stop collectors idle for longer than the linger time"""
+        now = time.monotonic() if now is None else now
+        stopped = []
+        with self._lock:
+            for location, entry in list(self._entries.items()):
+                leases = entry['leases']
+                for lease_id in [i for i, expiry in leases.items() if expiry <= now]:
+                    del leases[lease_id]
+                if leases:
+                    continue
+                if entry['idle_since'] is None:
+                    entry['idle_since'] = now
+                if now - entry['idle_since'] >= self.linger:
+                    del self._entries[location]
+                    stopped.append(entry['collector'])
+        for collector in stopped:
+            collector.stop()
+        return len(stopped)
+
+    def _ensure_reaper(self):
+        if self._reaper is None:
+            with self._lock:
+                if self._reaper is None:
+                    self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+                    self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed.wait(self.reap_interval):
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"⚠️ Collector reaper error: {e}")
+
+    def shutdown(self):
+        """Stop every collector and the reaper"""
+        self._closed.set()
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for entry in entries.values():
+            entry['collector'].stop()
+
+    def collectors(self):
+        """Every running collector by location"""
+        with self._lock:
+            return {location: entry['collector'] for location, entry in self._entries.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                location: {'sessions': len(entry['leases']), 'running': entry['collector'].running}
+                for location, entry in self._entries.items()
+            }
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_collector_registry():
+    """Process-wide collector registry shared by every dashboard session"""
+    global _default_registry
+    if _default_registry is None:
+        with _default_registry_lock:
+            if _default_registry is None:
+                _default_registry = CollectorRegistry()
+    return _default_registry
@@ -2,22 +2,44 @@ import requests
 import json
 import time
 import threading
-from datetime import datetime
+from datetime import datetime, timedelta
 import numpy as np
 import os
 from dotenv import load_dotenv
 import geocoder
 
+from data_pipeline.hex_grid import HexCongestionGrid
+from data_pipeline.interpolation import get_observation_store
+from data_pipeline.point_clusters import PointClusterIndex
+from data_pipeline.serialization import pack, pack_records, unpack, unpack_records
+from data_pipeline.time_index import TimeIndexedList
+
 
 load_dotenv()
 
+
+def incident_position(record):
+    """Map position of a traffic record that reports an incident, else None"""
+    lat = record.get('lat')
+    # Records restored from a snapshot carry NaN where the field was missing
+    if record.get('incident_detected') and lat is not None and not np.isnan(lat):
+        return lat, record['lon']
+    return None
+
+
 class RealTimeDataCollector:
     def __init__(self, location="Washington, DC, USA"):
-        self.weather_data = []
-        self.traffic_data = []
-        self.news_data = []
-        self.social_data = []
+        self.weather_data = TimeIndexedList()
+        self.traffic_data = TimeIndexedList()
+        self.news_data = TimeIndexedList()
+        self.social_data = TimeIndexedList()
+        # Traffic incidents clustered for the map, caught up from traffic_data on read
+        self.incident_index = PointClusterIndex()
+        # Congestion binned into hexagons, likewise caught up on read
+        self.congestion_grid = HexCongestionGrid()
         self.running = False
+        # Set by stop() so polling threads wake from their sleep and exit promptly
+        self._stop_event = threading.Event()
     
         self.current_location = location
         self.location_coords = self._get_coordinates(location)
@@ -102,7 +124,7 @@ class RealTimeDataCollector:
         
     
         was_running = self.running
-        self.running = False
+        self.stop()
         time.sleep(2)  
         
         # Clear old data
@@ -136,11 +158,18 @@ class RealTimeDataCollector:
     def start_collection(self):
         """Start all data collection threads"""
         self.running = True
+        self._stop_event.clear()
         threading.Thread(target=self._collect_real_weather, daemon=True).start()
         threading.Thread(target=self._collect_real_news, daemon=True).start()
         threading.Thread(target=self._collect_real_traffic, daemon=True).start()
         threading.Thread(target=self._collect_real_social, daemon=True).start()
         print(f"🌐 Real-time data collection started for {self.current_location}!")
+    
+    def stop(self):
+        """Stop all data collection threads"""
+        self.running = False
+        self._stop_event.set()
+        print(f"🛑 Data collection stopped for {self.current_location}")
         
     def _collect_real_weather(self):
         """Collect REAL weather data for current location"""
@@ -250,6 +279,7 @@ class RealTimeDataCollector:
                             'temperature': temp,
                             'humidity': humidity,
                             'wind_speed': wind_speed,
+                            'wind_direction': data.get('wind', {}).get('deg', 0),
                             'precipitation': data.get('rain', {}).get('1h', 0),
                             'pressure': pressure,
                             'weather_description': data['weather'][0]['description'],
@@ -258,12 +288,15 @@ class RealTimeDataCollector:
                         }
                         
                         self.weather_data.append(weather_point)
+                        # Shared with other locations' simulations as a neighbouring station
+                        get_observation_store().add(self.location_coords['lat'], self.location_coords['lon'], weather_point,
+                                                  station=weather_point['location'])
                         print(f"🌤️ Real weather ({self.location_coords['city']}): {temp}°C, {data['weather'][0]['description']}, Risk: {risk_score:.2f}")
                         
             except Exception as e:
                 print(f"⚠️ Weather collection error: {e}")
                 
-            time.sleep(300)  # 5 minutes
+            self._stop_event.wait(300)  # 5 minutes
             
     def _collect_real_news(self):
         """Collect REAL news for current location"""
@@ -335,7 +368,7 @@ class RealTimeDataCollector:
                 # Fallback to location-specific crisis simulation
                 self._add_crisis_location_news()
                 
-            time.sleep(600)  # 10 minutes
+            self._stop_event.wait(600)  # 10 minutes
             
     def _collect_real_traffic(self):
         """Collect REAL traffic data for current location"""
@@ -381,6 +414,12 @@ class RealTimeDataCollector:
                                         free_flow_speed = free_flow.get('speed', 80)
                                         jam_factor = current_flow.get('jamFactor', 0)
                                         
+                                        # First shape point of the segment; the zone centre if there is none
+                                        links = location.get('shape', {}).get('links', [])
+                                        shape = links[0].get('points', []) if links else []
+                                        segment_lat = shape[0].get('lat', zone['lat']) if shape else zone['lat']
+                                        segment_lon = shape[0].get('lng', zone['lon']) if shape else zone['lon']
+                                        
                                         if free_flow_speed > 0:
                                             speed_ratio = current_speed / free_flow_speed
                                             congestion_level = max(0, min(1, 1 - speed_ratio))
@@ -396,6 +435,8 @@ class RealTimeDataCollector:
                                         traffic_point = {
                                             'timestamp': datetime.now(),
                                             'location': f"{zone['name']}_Real",
+                                            'lat': segment_lat,
+                                            'lon': segment_lon,
                                             'congestion_level': min(1.0, congestion_level),
                                             'incident_detected': incident_detected,
                                             'average_speed': current_speed,
@@ -410,14 +451,14 @@ class RealTimeDataCollector:
                                         print(f"🚗 Real traffic ({self.location_coords['city']}): {zone['name']} - Congestion: {congestion_level:.2f}")
                                         
                                 else:
-                                    self._add_single_traffic_simulation(zone['name'])
+                                    self._add_single_traffic_simulation(zone['name'], zone['lat'], zone['lon'])
                                     
                             else:
-                                self._add_single_traffic_simulation(zone['name'])
+                                self._add_single_traffic_simulation(zone['name'], zone['lat'], zone['lon'])
                                 
                         except Exception as e:
                             print(f"⚠️ HERE API error for {zone['name']}: {e}")
-                            self._add_single_traffic_simulation(zone['name'])
+                            self._add_single_traffic_simulation(zone['name'], zone['lat'], zone['lon'])
                             
                         time.sleep(3)
                         
@@ -428,7 +469,7 @@ class RealTimeDataCollector:
                 print(f"⚠️ Traffic collection error: {e}")
                 self._add_enhanced_traffic_simulation()
                 
-            time.sleep(180)  # 3 minutes
+            self._stop_event.wait(180)  # 3 minutes
             
     def _collect_real_social(self):
         """Collect location-specific social media data"""
@@ -492,7 +533,7 @@ class RealTimeDataCollector:
                 print(f"⚠️ Social collection error: {e}")
                 self._add_enhanced_social_simulation()
                 
-            time.sleep(300)  # 5 minutes
+            self._stop_event.wait(300)  # 5 minutes
             
     def _get_location_subreddits(self):
         """Get relevant subreddits for the current location"""
@@ -530,7 +571,7 @@ class RealTimeDataCollector:
         
         return list(set(subreddits))[:5]  # Limit to 5 subreddits
     
-    def _add_single_traffic_simulation(self, location_name):
+    def _add_single_traffic_simulation(self, location_name, lat=None, lon=None):
         """Add single simulated traffic point"""
         current_hour = datetime.now().hour
         
@@ -547,6 +588,8 @@ class RealTimeDataCollector:
         traffic_point = {
             'timestamp': datetime.now(),
             'location': f"{location_name}_Sim",
+            'lat': (self.location_coords['lat'] if lat is None else lat) + np.random.normal(0, 0.005),
+            'lon': (self.location_coords['lon'] if lon is None else lon) + np.random.normal(0, 0.005),
             'congestion_level': max(0, min(1, np.random.normal(base_congestion, 0.2))),
             'incident_detected': np.random.random() < incident_chance,
             'average_speed': max(5, np.random.normal(45 * (1 - base_congestion), 10)),
@@ -577,6 +620,8 @@ class RealTimeDataCollector:
         
         city_name = self.location_coords.get("city", "City")
         routes = [f"{city_name}_Route_{i+1}" for i in range(5)]
+        base_lat = self.location_coords.get("lat", 0.0)
+        base_lon = self.location_coords.get("lon", 0.0)
         
         for route in routes:
             # Add crisis-specific traffic conditions
@@ -592,6 +637,8 @@ class RealTimeDataCollector:
             traffic_point = {
                 'timestamp': datetime.now(),
                 'location': f"{route}_Sim",
+                'lat': base_lat + np.random.normal(0, 0.02),
+                'lon': base_lon + np.random.normal(0, 0.02),
                 'congestion_level': congestion,
                 'incident_detected': incident_detected,
                 'average_speed': max(5, np.random.normal(45 * (1 - congestion), 10)),
@@ -615,15 +662,76 @@ class RealTimeDataCollector:
         }
         self.social_data.append(social_point)
         
-    def get_latest_data(self):
-        """Get the most recent data from all sources"""
-        return {
+    def get_latest_data(self, windows=None):
+        """Get the most recent data from all sources
+
+        With `windows` (source -> minutes, e.g. {'traffic': 15}) each listed
+        source returns the records from that time window instead of a fixed
+        number of items.
+        """
+        latest = {
             'weather': self.weather_data[-10:] if self.weather_data else [],
             'traffic': self.traffic_data[-15:] if self.traffic_data else [],
             'news': self.news_data[-10:] if self.news_data else [],
             'social': self.social_data[-20:] if self.social_data else []
         }
         
+        if windows:
+            for source, minutes in windows.items():
+                if source in latest and minutes is not None:
+                    latest[source] = self.get_window(source, minutes)
+        
+        return latest
+    
+    def incident_clusters(self, bounds, zoom):
+        """Traffic incident clusters for a map view (see PointClusterIndex.clusters)
+
+        Only incidents recorded since the previous call are added to the index.
+        """
+        self.incident_index.sync(self.traffic_data, incident_position)
+        return self.incident_index.clusters(bounds, zoom)
+    
+    def congestion_cells(self):
+        """Hexagon congestion cells over every traffic record so far (see HexCongestionGrid.cells)"""
+        return self.congestion_grid.sync(self.traffic_data).cells()
+    
+    def get_window(self, source, minutes, now=None):
+        """Get records for one source from the last `minutes` minutes"""
+        return self.get_series()[source].since(timedelta(minutes=minutes), now=now)
+    
+    def get_series(self):
+        """Get the live time-indexed series for every source (no copies)"""
+        return {
+            'weather': self.weather_data,
+            'traffic': self.traffic_data,
+            'news': self.news_data,
+            'social': self.social_data
+        }
+        
+    def data_version(self):
+        """Changes whenever any source gains (or loses) records; cheap to poll"""
+        return tuple(series.version for series in self.get_series().values())
+    
+    def export_snapshot(self):
+        """Binary snapshot of every source's history (one columnar record batch each)"""
+        return pack({
+            'location': self.current_location,
+            'sources': {
+                source: np.frombuffer(pack_records(series), dtype=np.uint8)
+                for source, series in self.get_series().items()
+            }
+        })
+    
+    def import_snapshot(self, buffer):
+        """Replace the collected history with the contents of export_snapshot()"""
+        snapshot = unpack(buffer)
+        series = self.get_series()
+        for source, batch in snapshot['sources'].items():
+            if source in series:
+                series[source].clear()
+                series[source].extend(unpack_records(batch))
+        return snapshot['location']
+    
     def get_data_status(self):
         """Get status of real vs simulated data"""
         weather_real = any(item.get('real_data', False) for item in self.weather_data[-5:])
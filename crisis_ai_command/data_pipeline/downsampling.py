@@ -0,0 +1,96 @@
+import os
+
+import numpy as np
+
+# Plot width assumed when the real one is unknown (Streamlit charts fill the container)
+CHART_WIDTH_PX = int(os.getenv('RTACC_CHART_WIDTH_PX', 1200))
+
+# Above this many raw points per output point, min/max buckets are taken before LTTB
+MINMAX_RATIO = 4
+
+
+def target_points(width_px=None):
+    """Points worth sending for a chart width: a low and a high per pixel column"""
+    return 2 * (width_px or CHART_WIDTH_PX)
+
+
+def _first_per_segment(mask, segment):
+    """Index of the first True in mask within each segment (every segment has one)"""
+    hits = np.flatnonzero(mask)
+    owner = segment[hits]
+    return hits[np.r_[True, owner[1:] != owner[:-1]]]
+
+
+def minmax(x, y, n_buckets):
+    """Indices of the first, last, and min and max y of each equal-width x bucket
+
+    x must be sorted, so buckets are contiguous runs and their extremes
+    are vectorised reduceat calls rather than a loop or a sort.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    span = (x[-1] - x[0]) or 1.0
+    bucket = np.minimum(((x - x[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    lows = _first_per_segment(y == np.minimum.reduceat(y, starts)[segment], segment)
+    highs = _first_per_segment(y == np.maximum.reduceat(y, starts)[segment], segment)
+    return np.unique(np.r_[0, lows, highs, n - 1])
+
+
+def lttb(x, y, n_out):
+    """Indices of the Largest-Triangle-Three-Buckets selection of n_out points
+
+    Keeps the first and last points; from each of the n_out - 2 buckets in
+    between it keeps the point forming the largest triangle with the point
+    kept before it and the mean of the next bucket. Bucket means are
+    computed up front; the per-bucket choice is a vectorised argmax.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    n_buckets = n_out - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1]) / counts
+    # Each bucket looks ahead to the next one's mean; the last looks at the final point
+    next_x = np.r_[mean_x[1:], x[-1]]
+    next_y = np.r_[mean_y[1:], y[-1]]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        anchor = lo + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def downsample(x, y, n_out=None):
+    """Indices of at most n_out points that keep the shape and spikes of a series
+
+    Non-finite y values are dropped. Long series go through min/max
+    buckets first (MinMaxLTTB), so every local extreme is a candidate and
+    LTTB runs on a few times n_out points rather than the full history.
+    """
+    n_out = n_out or target_points()
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(y))
+    x = np.asarray(x, dtype=np.float64)[finite]
+    y = y[finite]
+    if len(y) <= n_out:
+        return finite
+    if len(y) > MINMAX_RATIO * n_out:
+        candidates = minmax(x, y, MINMAX_RATIO * n_out // 2)
+        return finite[candidates[lttb(x[candidates], y[candidates], n_out)]]
+    return finite[lttb(x, y, n_out)]
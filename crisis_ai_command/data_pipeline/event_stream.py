@@ -0,0 +1,207 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+# Events a slow client may have pending before it is told to resync instead
+CLIENT_QUEUE_SIZE = 256
+
+# Recent events kept for clients reconnecting with Last-Event-ID
+REPLAY_SIZE = 1024
+
+KEEPALIVE_SECONDS = 15.0
+
+ALL_LOCATIONS = '*'
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def delta_events(location, previous, current, new_records=None):
+    """Delta events for one location between two scoring passes
+
+    previous/current: crisis results (previous may be None); new_records:
+    {source: [records ingested since the last pass]}.
+    """
+    events = []
+    new_records = new_records or {}
+    counts = {source: len(records) for source, records in new_records.items() if records}
+    if counts:
+        events.append(('data', {'location': location, 'new_records': counts}))
+
+    # A pass whose new records leave the score unchanged only announces the data
+    if previous is None or current['crisis_score'] != previous['crisis_score']:
+        score = {'location': location, 'crisis_score': current['crisis_score'], 'timestamp': current['timestamp']}
+        if previous is not None:
+            score['delta'] = current['crisis_score'] - previous['crisis_score']
+        events.append(('score', score))
+
+    if previous is None or previous['risk_level'] != current['risk_level']:
+        events.append(('level', {
+            'location': location,
+            'risk_level': current['risk_level'],
+            'previous': previous['risk_level'] if previous else None,
+            'crisis_score': current['crisis_score']
+        }))
+
+    for record in new_records.get('traffic', []):
+        if record.get('incident_detected'):
+            # Nested, so the record's own 'location' field survives
+            events.append(('incident', {'location': location, 'incident': record}))
+    return events
+
+
+class _Subscriber:
+    __slots__ = ('queue', 'location')
+
+    def __init__(self, location):
+        self.queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+        self.location = location
+
+
+class EventBroker:
+    """Fan-out of per-location delta events to Server-Sent Events subscribers.
+
+    Runs one asyncio loop in a background thread; publish() may be called
+    from any thread. Each event is encoded once and put on every matching
+    subscriber's bounded queue. A subscriber whose queue is full has it
+    emptied and gets a single `resync` event (refetch /status) rather than
+    slowing the broker or anyone else down.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._subscribers = {}  # location -> set of _Subscriber
+        self._replay = deque(maxlen=REPLAY_SIZE)  # (id, location, encoded)
+        self._next_id = 1
+        self._thread = None
+        self.dropped = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Disconnect every client, then stop the loop"""
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._disconnect_all(), self.loop).result(timeout=5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _disconnect_all(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def publish(self, location, event, data):
+        """Queue an event for location's subscribers (thread-safe)"""
+        self.loop.call_soon_threadsafe(self._fanout, location, event, data)
+
+    def _encode(self, event_id, event, data):
+        payload = json.dumps(data, default=_json_default, separators=(',', ':'))
+        return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+    def _fanout(self, location, event, data):
+        event_id = self._next_id
+        self._next_id += 1
+        encoded = self._encode(event_id, event, data)
+        self._replay.append((event_id, location, encoded))
+
+        for subscriber in self._subscribers.get(location, set()) | self._subscribers.get(ALL_LOCATIONS, set()):
+            try:
+                subscriber.queue.put_nowait(encoded)
+            except asyncio.QueueFull:
+                self._resync(subscriber, event_id)
+
+    def _resync(self, subscriber, event_id):
+        """Replace a lagging subscriber's backlog with one resync event"""
+        queue = subscriber.queue
+        self.dropped += queue.qsize()
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(self._encode(event_id, 'resync', {'location': subscriber.location}))
+
+    def subscribe(self, location, last_event_id=None):
+        """Subscriber queue for a location (ALL_LOCATIONS for every one); call on the broker loop"""
+        subscriber = _Subscriber(location)
+        self._subscribers.setdefault(location, set()).add(subscriber)
+        if last_event_id is not None:
+            for event_id, event_location, encoded in self._replay:
+                if event_id > last_event_id and location in (event_location, ALL_LOCATIONS):
+                    try:
+                        subscriber.queue.put_nowait(encoded)
+                    except asyncio.QueueFull:
+                        self._resync(subscriber, event_id)
+                        break
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscribers = self._subscribers.get(subscriber.location)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.location]
+
+    def stats(self):
+        return {
+            'subscribers': sum(len(s) for s in self._subscribers.values()),
+            'locations': len(self._subscribers),
+            'dropped': self.dropped
+        }
+
+    async def _handle(self, reader, writer):
+        """Minimal HTTP/1.1 handler for GET /events?location=..."""
+        subscriber = None
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            url = urlparse(request_line[1]) if len(request_line) > 1 else None
+            if url is None or request_line[0] != 'GET' or url.path != '/events':
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+
+            location = parse_qs(url.query).get('location', [ALL_LOCATIONS])[0]
+            last_event_id = headers.get('last-event-id')
+            subscriber = self.subscribe(location, int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+
+            # Chunked, so HTTP clients hand each event over as soon as it arrives
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                         b"Connection: keep-alive\r\nTransfer-Encoding: chunked\r\n\r\n")
+            chunk = b"retry: 2000\n\n"
+            while True:
+                writer.write(b"%x\r\n" % len(chunk))
+                writer.write(chunk)
+                writer.write(b"\r\n")
+                await writer.drain()
+                try:
+                    chunk = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    chunk = b": keepalive\n\n"
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Client gone, or disconnected by stop()
+            pass
+        finally:
+            if subscriber is not None:
+                self.unsubscribe(subscriber)
+            writer.close()
+
+    def serve(self, host, port):
+        """Start accepting SSE clients on the broker loop; returns the asyncio server"""
+        return asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, host, port, backlog=1024), self.loop
+        ).result()
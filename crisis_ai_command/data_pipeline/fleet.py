@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import deque
+
+from data_pipeline.collector_registry import get_collector_registry
+from data_pipeline.hazard_stack import HAZARD_LAYERS
+from data_pipeline.processors import get_processor
+
+# Recent scores kept per location for its trend and sparkline
+TREND_PASSES = 20
+
+# Grid cells per side for the fleet's flood/fire summaries (the map tab simulates at full size)
+HAZARD_RESOLUTION = 32
+
+
+def _newest_record(collector):
+    """Epoch seconds of the newest record across every source, or None"""
+    times = [series.latest_time() for series in collector.get_series().values()]
+    times = [t for t in times if t is not None]
+    return max(times).timestamp() if times else None
+
+
+class FleetMonitor:
+    """Score, level, trend, hazard and freshness rows for every monitored location.
+
+    refresh() compares each collector's data version with the previous pass
+    and scores only the changed ones, in one process_crisis_detection_batch
+    call; flood and fire summaries for locations whose weather changed come
+    from one simulate_hazards_batch call. The snapshot is rebuilt only when
+    a row changes, and its `version` lets readers keep their rendered table
+    and map until then, so a fleet of hundreds costs a version check per
+    location when nothing is new.
+    """
+
+    def __init__(self, registry=None, processor=None, climate_collector=None):
+        self.registry = registry or get_collector_registry()
+        self.processor = processor or get_processor()
+        self.climate_collector = climate_collector
+        self._versions = {}
+        self._weather_versions = {}
+        self._scores = {}   # location -> deque of recent crisis scores
+        self._hazards = {}  # location -> (flood max risk, fire max risk), 0-1
+        self._rows = {}
+        self._snapshot = {'version': 0, 'generated': time.time(), 'rows': []}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Score locations with new data and return the current snapshot"""
+        collectors = self.registry.collectors()
+        with self._lock:
+            changed = []
+            for location, collector in collectors.items():
+                version = collector.data_version()
+                if self._versions.get(location) != version:
+                    changed.append((location, collector, version))
+            results = self.processor.process_crisis_detection_batch(
+                [collector.get_series() for _, collector, _ in changed],
+                regions=[location for location, _, _ in changed]
+            ) if changed else []
+            return self._ingest(changed, results, set(collectors))
+
+    def ingest(self, changed, results, monitored):
+        """Fold in results scored elsewhere (e.g. by the scoring service's own batch pass)
+
+        changed: [(location, collector, data version)], results: one crisis
+        result each; monitored: every location still watched.
+        """
+        with self._lock:
+            return self._ingest(changed, results, set(monitored))
+
+    def _ingest(self, changed, results, monitored):
+        removed = set(self._rows) - monitored
+        for location in removed:
+            for state in (self._rows, self._versions, self._weather_versions, self._scores, self._hazards):
+                state.pop(location, None)
+        if not changed and not removed:
+            return self._snapshot
+
+        self._update_hazards([(location, collector) for location, collector, _ in changed])
+        for (location, collector, version), crisis_result in zip(changed, results):
+            scores = self._scores.setdefault(location, deque(maxlen=TREND_PASSES))
+            scores.append(crisis_result['crisis_score'])
+            coords = collector.location_coords or {}
+            flood_risk, fire_risk = self._hazards.get(location, (0.0, 0.0))
+            self._rows[location] = {
+                'location': location,
+                'lat': coords.get('lat'),
+                'lon': coords.get('lon'),
+                'crisis_score': crisis_result['crisis_score'],
+                'risk_level': crisis_result['risk_level'],
+                'trend': scores[-1] - scores[0],
+                'scores': list(scores),
+                'flood_risk': flood_risk,
+                'fire_risk': fire_risk,
+                'last_update': _newest_record(collector),
+                'records': sum(len(series) for series in collector.get_series().values())
+            }
+            self._versions[location] = version
+
+        self._snapshot = {
+            'version': self._snapshot['version'] + 1,
+            'generated': time.time(),
+            'rows': sorted(self._rows.values(), key=lambda row: row['crisis_score'], reverse=True)
+        }
+        return self._snapshot
+
+    def _update_hazards(self, entries):
+        """Re-simulate flood/fire summaries for locations whose weather changed, in one batch"""
+        stale = []
+        for location, collector in entries:
+            weather = collector.weather_data
+            if weather and self._weather_versions.get(location) != weather.version and collector.location_coords:
+                stale.append((location, collector, weather.version, weather[-1]))
+        if not stale:
+            return
+        if self.climate_collector is None:
+            from data_pipeline.climate_sources import ClimateDataCollector
+            self.climate_collector = ClimateDataCollector()
+
+        try:
+            summaries = self.climate_collector.simulate_hazards_batch(
+                [(c.location_coords['lat'], c.location_coords['lon']) for _, c, _, _ in stale],
+                [reading for _, _, _, reading in stale],
+                resolution=HAZARD_RESOLUTION
+            )
+        except Exception as e:
+            print(f"⚠️ Fleet hazard simulation error: {e}")
+            return
+        # Normalised to 0-1 the same way the hazard stack does
+        flood_scale, fire_scale = HAZARD_LAYERS['flood'][2], HAZARD_LAYERS['wildfire'][2]
+        for (location, _, version, _), summary in zip(stale, summaries):
+            self._hazards[location] = (min(1.0, summary['flood_max_risk'] / flood_scale),
+                                       min(1.0, summary['fire_max_risk'] / fire_scale))
+            self._weather_versions[location] = version
+
+    def snapshot(self):
+        return self._snapshot
+
+
+_default_monitor = None
+_default_monitor_lock = threading.Lock()
+
+
+def get_fleet_monitor():
+    """Process-wide fleet monitor over the shared collector registry"""
+    global _default_monitor
+    if _default_monitor is None:
+        with _default_monitor_lock:
+            if _default_monitor is None:
+                _default_monitor = FleetMonitor()
+    return _default_monitor
@@ -0,0 +1,437 @@
+import heapq
+import os
+import re
+from collections import OrderedDict
+import numpy as np
+
+# GeoTIFF tiles when rasterio is installed, raw .npy tiles always
+try:
+    import rasterio
+    from rasterio.windows import Window
+    GEOTIFF_AVAILABLE = True
+except ImportError:
+    GEOTIFF_AVAILABLE = False
+
+# Directory of 1°x1° elevation tiles named like SRTM (N37W123.npy / N37W123.tif)
+DEM_DIR = os.getenv('RTACC_DEM_DIR')
+
+# Elevations at or below this are treated as nodata (SRTM voids are -32768)
+NODATA_BELOW = -1000.0
+
+# D8 neighbour offsets (row, col); rows increase northwards like the overlay grids
+D8_OFFSETS = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+
+METERS_PER_DEGREE = 111000.0
+
+_TILE_NAME = re.compile(r'^([NS])(\d{1,2})([EW])(\d{1,3})$', re.IGNORECASE)
+
+
+def tile_name(lat_floor, lon_floor):
+    """SRTM-style name of the tile whose south-west corner is (lat_floor, lon_floor)"""
+    return (f"{'N' if lat_floor >= 0 else 'S'}{abs(lat_floor):02d}"
+            f"{'E' if lon_floor >= 0 else 'W'}{abs(lon_floor):03d}")
+
+
+def _distinct(indices):
+    """Sorted distinct values of an index array (cheaper than np.unique on hot loops)"""
+    indices = np.sort(indices)
+    return indices[np.r_[True, indices[1:] != indices[:-1]]] if indices.size else indices
+
+
+def _pair_slices(shape, d_row, d_col):
+    """Slices (a, b) such that b[i] is the (d_row, d_col) neighbour of a[i]"""
+    def axis(n, d):
+        return (slice(0, n - d), slice(d, n)) if d >= 0 else (slice(-d, n), slice(0, n + d))
+
+    a_row, b_row = axis(shape[0], d_row)
+    a_col, b_col = axis(shape[1], d_col)
+    return (a_row, a_col), (b_row, b_col)
+
+
+class DEMTileStore:
+    """Elevation tiles read through memory maps, one 1°x1° tile per file.
+
+    Tiles are north-up rasters whose first and last rows/columns lie on the
+    tile edges (the SRTM layout). Only the tiles under a requested window are
+    opened, and only the pixels sampled onto the output grid are paged in, so
+    memory stays proportional to the output grid whatever the DEM's extent.
+    """
+
+    def __init__(self, root=DEM_DIR, max_open_tiles=16):
+        self.root = root
+        self.max_open_tiles = max_open_tiles
+        self._tiles = OrderedDict()
+        self._index = None
+
+    def _scan(self):
+        """Map (lat_floor, lon_floor) to tile paths found under root"""
+        index = {}
+        for filename in os.listdir(self.root):
+            stem, ext = os.path.splitext(filename)
+            match = _TILE_NAME.match(stem)
+            if not match or ext.lower() not in ('.npy', '.tif', '.tiff'):
+                continue
+            if ext.lower() != '.npy' and not GEOTIFF_AVAILABLE:
+                continue
+            lat_hemi, lat_deg, lon_hemi, lon_deg = match.groups()
+            key = (int(lat_deg) * (1 if lat_hemi.upper() == 'N' else -1),
+                   int(lon_deg) * (1 if lon_hemi.upper() == 'E' else -1))
+            # Prefer .npy (true memmap) when both formats are present
+            if key not in index or ext.lower() == '.npy':
+                index[key] = os.path.join(self.root, filename)
+        return index
+
+    def available(self):
+        return bool(self.root) and os.path.isdir(self.root)
+
+    def _open(self, key):
+        """Open (or reuse) the tile for key; returns None when it does not exist"""
+        if self._index is None:
+            self._index = self._scan()
+        path = self._index.get(key)
+        if path is None:
+            return None
+
+        tile = self._tiles.get(key)
+        if tile is None:
+            if path.endswith('.npy'):
+                tile = np.load(path, mmap_mode='r')
+            else:
+                tile = rasterio.open(path)
+            self._tiles[key] = tile
+            if len(self._tiles) > self.max_open_tiles:
+                _, evicted = self._tiles.popitem(last=False)
+                if not isinstance(evicted, np.ndarray):
+                    evicted.close()
+        else:
+            self._tiles.move_to_end(key)
+        return tile
+
+    def _read_pixels(self, tile, rows, cols):
+        """Elevation at the pixels rows x cols of a tile, reading only what is needed"""
+        if isinstance(tile, np.ndarray):
+            return np.asarray(tile[np.ix_(rows, cols)], dtype=np.float32)
+        # GeoTIFF: one windowed read over the bounding box of the sampled pixels
+        window = Window(cols.min(), rows.min(), cols.max() - cols.min() + 1, rows.max() - rows.min() + 1)
+        block = tile.read(1, window=window).astype(np.float32)
+        return block[np.ix_(rows - rows.min(), cols - cols.min())]
+
+    def _bilinear(self, tile, rows, cols, height, width):
+        """Bilinear elevation at fractional pixel positions rows x cols
+
+        Interpolating (rather than taking the nearest pixel) keeps integer
+        DEMs sampled finer than their native resolution from turning into
+        terraces of flats, which would otherwise break D8 routing.
+        """
+        row0 = np.floor(rows).astype(int)
+        col0 = np.floor(cols).astype(int)
+        row1 = np.minimum(row0 + 1, height - 1)
+        col1 = np.minimum(col0 + 1, width - 1)
+
+        # Read each needed pixel once, then gather the four corners from that block
+        needed_rows = np.unique(np.concatenate([row0, row1]))
+        needed_cols = np.unique(np.concatenate([col0, col1]))
+        block = self._read_pixels(tile, needed_rows, needed_cols)
+        r0, r1 = np.searchsorted(needed_rows, row0), np.searchsorted(needed_rows, row1)
+        c0, c1 = np.searchsorted(needed_cols, col0), np.searchsorted(needed_cols, col1)
+
+        # Voids must not bleed into their neighbours
+        block[block <= NODATA_BELOW] = np.nan
+        fr = (rows - row0)[:, None].astype(np.float32)
+        fc = (cols - col0)[None, :].astype(np.float32)
+        top = block[np.ix_(r0, c0)] * (1 - fc) + block[np.ix_(r0, c1)] * fc
+        bottom = block[np.ix_(r1, c0)] * (1 - fc) + block[np.ix_(r1, c1)] * fc
+        return top * (1 - fr) + bottom * fr
+
+    def sample(self, lat_range, lon_range):
+        """Elevation grid (len(lat_range), len(lon_range)) in metres; NaN where no tile covers"""
+        lat_range = np.asarray(lat_range, dtype=np.float64)
+        lon_range = np.asarray(lon_range, dtype=np.float64)
+        elevation = np.full((len(lat_range), len(lon_range)), np.nan, dtype=np.float32)
+
+        lat_tiles = np.floor(lat_range).astype(int)
+        lon_tiles = np.floor(lon_range).astype(int)
+        for lat_floor in np.unique(lat_tiles):
+            out_rows = np.flatnonzero(lat_tiles == lat_floor)
+            for lon_floor in np.unique(lon_tiles):
+                tile = self._open((int(lat_floor), int(lon_floor)))
+                if tile is None:
+                    continue
+                out_cols = np.flatnonzero(lon_tiles == lon_floor)
+                height, width = tile.shape if isinstance(tile, np.ndarray) else (tile.height, tile.width)
+
+                # Fractional pixel positions; row 0 is the tile's northern edge
+                rows = np.clip((lat_floor + 1 - lat_range[out_rows]) * (height - 1), 0, height - 1)
+                cols = np.clip((lon_range[out_cols] - lon_floor) * (width - 1), 0, width - 1)
+                elevation[np.ix_(out_rows, out_cols)] = self._bilinear(tile, rows, cols, height, width)
+
+        return elevation
+
+
+class DEMFloodModel:
+    """Terrain-aware flood estimate: D8 routing plus fill-and-spill ponding.
+
+    Rain falling on each cell (precipitation times a runoff coefficient) is
+    routed downhill along D8 flow directions into the sink of its basin.
+    Basins are then flooded in spill order (a priority flood over the basin
+    adjacency graph): each lake fills to the level that holds its inflow,
+    capped at its spill level, and the excess overflows into the lake
+    downstream. Water leaving the grid edge is lost.
+    """
+
+    def __init__(self, tiles=None, runoff_coefficient=0.6, full_risk_depth_m=1.0):
+        self.tiles = tiles or DEMTileStore()
+        self.runoff_coefficient = runoff_coefficient
+        # Ponding depth that maps to a flood risk of 1.0
+        self.full_risk_depth_m = full_risk_depth_m
+
+    def available(self):
+        return self.tiles.available()
+
+    @staticmethod
+    def flow_directions(elevation, cell_dy, cell_dx):
+        """D8 receiver (flat index) of every cell; sinks receive themselves
+
+        Cells on a flat drain towards an equally high neighbour that already
+        drains, growing inwards from the flat's outlets, so only flats with
+        no lower exit remain sinks.
+        """
+        height, width = elevation.shape
+        padded = np.pad(elevation, 1, constant_values=np.inf)
+        best_slope = np.zeros(elevation.shape, dtype=np.float32)
+        receivers = np.arange(elevation.size).reshape(elevation.shape)
+        rows, cols = np.indices(elevation.shape)
+
+        for d_row, d_col in D8_OFFSETS:
+            neighbour = padded[1 + d_row:1 + d_row + height, 1 + d_col:1 + d_col + width]
+            slope = (elevation - neighbour) / np.hypot(d_row * cell_dy, d_col * cell_dx)
+            steeper = slope > best_slope
+            best_slope[steeper] = slope[steeper]
+            receivers[steeper] = ((rows + d_row) * width + cols + d_col)[steeper]
+
+        # Breadth-first over flats, in padded flat indices so neighbours never fall off the grid
+        stride = width + 2
+        padded_elevation = padded.ravel()
+        interior = ((rows + 1) * stride + cols + 1).ravel()
+        receivers = receivers.ravel()
+        is_sink = receivers == np.arange(elevation.size)
+        pending = np.zeros(padded.size, dtype=bool)
+        draining = np.zeros(padded.size, dtype=bool)
+        pending[interior[is_sink]] = True
+        draining[interior[~is_sink]] = True
+        steps = [(d_row * stride + d_col, d_row * width + d_col) for d_row, d_col in D8_OFFSETS]
+        padded_steps = np.array([step for step, _ in steps])
+
+        candidates = interior[is_sink]
+        while candidates.size:
+            resolved = []
+            for padded_step, grid_step in steps:
+                neighbour = candidates + padded_step
+                onto_flat = (pending[candidates] & draining[neighbour] &
+                             (padded_elevation[neighbour] == padded_elevation[candidates]))
+                chosen = candidates[onto_flat]
+                grid = (chosen // stride - 1) * width + chosen % stride - 1
+                receivers[grid] = grid + grid_step
+                pending[chosen] = False
+                resolved.append(chosen)
+            resolved = np.concatenate(resolved)
+            draining[resolved] = True
+            candidates = _distinct((resolved[:, None] + padded_steps).ravel())
+            candidates = candidates[pending[candidates]]
+        return receivers
+
+    @staticmethod
+    def flow_accumulation(receivers, weights):
+        """Sum of `weights` over every cell draining through each cell
+
+        Topological (Kahn) order processed a frontier at a time: a cell is
+        pushed downstream once all of its donors have been pushed into it.
+        """
+        n = receivers.size
+        accumulation = np.asarray(weights, dtype=np.float64).ravel().copy()
+        draining = receivers != np.arange(n)
+        in_degree = np.bincount(receivers[draining], minlength=n)
+
+        frontier = np.flatnonzero((in_degree == 0) & draining)
+        while frontier.size:
+            targets = receivers[frontier]
+            np.add.at(accumulation, targets, accumulation[frontier])
+            np.subtract.at(in_degree, targets, 1)
+            targets = _distinct(targets)
+            frontier = targets[(in_degree[targets] == 0) & draining[targets]]
+        return accumulation
+
+    @staticmethod
+    def basin_ids(receivers):
+        """Compact basin id of every cell (cells sharing a terminal sink) and the basin count"""
+        outlet = receivers.copy()
+        while True:
+            jumped = outlet[outlet]
+            if np.array_equal(jumped, outlet):
+                break
+            outlet = jumped
+        _, ids = np.unique(outlet, return_inverse=True)
+        return ids, int(ids.max()) + 1
+
+    @staticmethod
+    def basin_graph(elevation, ids, n_basins, outlets=None):
+        """Undirected basin adjacency with the spill elevation of each link
+
+        Node n_basins stands for the area outside the grid, reached from the
+        grid edge and from any `outlets` cells. Crossing between two cells
+        means rising to the higher of the two.
+        """
+        id_grid = ids.reshape(elevation.shape)
+        u, v, spill = [], [], []
+        for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            a, b = _pair_slices(elevation.shape, d_row, d_col)
+            boundary = id_grid[a] != id_grid[b]
+            u.append(id_grid[a][boundary])
+            v.append(id_grid[b][boundary])
+            spill.append(np.maximum(elevation[a], elevation[b])[boundary])
+
+        edge = np.zeros(elevation.shape, dtype=bool) if outlets is None else np.array(outlets, dtype=bool)
+        edge[0, :] = edge[-1, :] = edge[:, 0] = edge[:, -1] = True
+        u.append(id_grid[edge])
+        v.append(np.full(int(edge.sum()), n_basins))
+        spill.append(elevation[edge])
+
+        u, v, spill = np.concatenate(u), np.concatenate(v), np.concatenate(spill).astype(np.float64)
+        low, high = np.minimum(u, v), np.maximum(u, v)
+
+        # Keep the lowest spill per basin pair
+        key = low.astype(np.int64) * (n_basins + 1) + high
+        order = np.lexsort((spill, key))
+        first = np.r_[True, key[order][1:] != key[order][:-1]]
+        return low[order][first], high[order][first], spill[order][first]
+
+    @staticmethod
+    def spill_order(n_basins, low, high, spill):
+        """Priority flood from outside the grid over the basin graph
+
+        Returns each basin's water level (the lowest level at which water
+        can leave it for the outside), the basin it spills into, the lake it
+        belongs to (basins flooded together share a root) and the pop order.
+        """
+        outside = n_basins
+        # CSR adjacency over both link directions
+        nodes = np.concatenate([low, high])
+        neighbours = np.concatenate([high, low])
+        weights = np.concatenate([spill, spill])
+        order = np.argsort(nodes, kind='stable')
+        neighbours, weights = neighbours[order].tolist(), weights[order].tolist()
+        indptr = np.searchsorted(nodes[order], np.arange(n_basins + 2)).tolist()
+
+        level = [np.inf] * (n_basins + 1)
+        parent = [outside] * (n_basins + 1)
+        lake = list(range(n_basins + 1))
+        done = [False] * (n_basins + 1)
+        popped = []
+        heap = [(-np.inf, outside, outside)]
+        while heap:
+            node_level, node, source = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            level[node] = node_level
+            parent[node] = source
+            # Reached without rising above the source's level: same lake
+            if source != outside and node_level <= level[source]:
+                lake[node] = lake[source]
+            popped.append(node)
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbour = neighbours[k]
+                if not done[neighbour]:
+                    heapq.heappush(heap, (max(weights[k], node_level), neighbour, node))
+
+        return np.array(level), np.array(parent), np.array(lake), popped[1:]
+
+    @staticmethod
+    def fill_levels(elevation, labels, volumes, pour, cell_area):
+        """Water level of each lake holding volumes[label] m³, capped at its pour level"""
+        n_labels = volumes.size
+        flat = elevation.ravel().astype(np.float64)
+        order = np.lexsort((flat, labels))
+        sorted_labels = labels[order]
+        sorted_elev = flat[order]
+
+        # Rank of each cell within its lake and running elevation sums per lake
+        starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, sorted_labels.size]))
+        rank = np.arange(sorted_labels.size) - group_start
+        cumulative = np.cumsum(sorted_elev)
+        running_sum = cumulative - np.r_[0.0, cumulative][group_start]
+
+        # Volume held when water stands at each cell's elevation
+        held = cell_area * ((rank + 1) * sorted_elev - running_sum)
+        fits = (held <= volumes[sorted_labels]) & (sorted_elev <= pour[sorted_labels])
+        flooded_cells = np.bincount(sorted_labels[fits], minlength=n_labels)
+
+        levels = np.full(n_labels, -np.inf)
+        lakes = np.flatnonzero(flooded_cells)
+        last = np.searchsorted(sorted_labels, lakes) + flooded_cells[lakes] - 1
+        levels[lakes] = (volumes[lakes] / cell_area + running_sum[last]) / flooded_cells[lakes]
+        levels[lakes] = np.minimum(levels[lakes], pour[lakes])
+        return levels
+
+    def pond(self, elevation, receivers, runoff_m3, cell_area, outlets=None):
+        """Ponding depth per cell from fill-and-spill over D8 basins
+
+        runoff_m3 is the volume shed by each cell: a scalar or a grid.
+        Water reaching an `outlets` cell leaves the grid, as at the edge.
+        """
+        ids, n_basins = self.basin_ids(receivers)
+        level, parent, lake, popped = self.spill_order(
+            n_basins, *self.basin_graph(elevation, ids, n_basins, outlets))
+
+        # Storage of every lake up to its spill level
+        cell_lake = lake[ids]
+        flat = elevation.ravel().astype(np.float64)
+        storage = np.maximum(0.0, level[cell_lake] - flat) * cell_area
+        capacity = np.bincount(cell_lake, weights=storage, minlength=n_basins + 1)
+        runoff = np.broadcast_to(np.asarray(runoff_m3, dtype=np.float64), elevation.shape).ravel()
+        inflow = np.bincount(cell_lake, weights=runoff, minlength=n_basins + 1)
+
+        # Upstream lakes first: whatever a lake cannot hold spills downstream
+        held = np.zeros(n_basins + 1)
+        for basin in reversed(popped):
+            if lake[basin] != basin:
+                continue
+            held[basin] = min(inflow[basin], capacity[basin])
+            downstream = lake[parent[basin]]
+            if downstream != n_basins:
+                inflow[downstream] += inflow[basin] - held[basin]
+
+        levels = self.fill_levels(elevation, cell_lake, held, level, cell_area)
+        return np.maximum(0.0, levels[cell_lake] - flat).reshape(elevation.shape)
+
+    def simulate(self, lat_range, lon_range, precipitation_mm):
+        """Flood depth and flow accumulation over a lat/lon grid, or None without DEM coverage
+
+        precipitation_mm is a scalar or an (H, W) grid, e.g. interpolated from nearby stations.
+        """
+        elevation = self.tiles.sample(lat_range, lon_range)
+        if np.isnan(elevation).all():
+            return None
+        # Voids (mostly open water) are outlets: filled at the lowest known
+        # elevation so flow finds them, and linked to the outside so nothing ponds there
+        voids = np.isnan(elevation)
+        elevation = np.where(voids, np.nanmin(elevation), elevation)
+
+        mid_lat = float(np.mean(lat_range))
+        cell_dy = abs(lat_range[1] - lat_range[0]) * METERS_PER_DEGREE
+        cell_dx = abs(lon_range[1] - lon_range[0]) * METERS_PER_DEGREE * np.cos(np.radians(mid_lat))
+        cell_area = cell_dy * cell_dx
+
+        receivers = self.flow_directions(elevation, cell_dy, cell_dx)
+        # Contributing area in cells; each cell sheds the same runoff volume
+        accumulation = self.flow_accumulation(receivers, np.ones(elevation.size))
+        runoff_m3 = np.asarray(precipitation_mm, dtype=np.float64) / 1000.0 * self.runoff_coefficient * cell_area
+        depth = self.pond(elevation, receivers, runoff_m3, cell_area, outlets=voids)
+
+        return {
+            'elevation': elevation,
+            'flow_accumulation': accumulation.reshape(elevation.shape),
+            'flood_depth_m': depth,
+            'flood_risk': np.clip(depth / self.full_risk_depth_m, 0.0, 1.0)
+        }
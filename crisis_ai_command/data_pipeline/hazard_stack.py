@@ -0,0 +1,156 @@
+import numpy as np
+
+from data_pipeline.overlay_pyramid import OverlayPyramid
+from data_pipeline.serialization import pack, unpack
+
+# Hazard layers: overlay key, risk field and the raw risk that counts as certain (1.0)
+HAZARD_LAYERS = {
+    'flood': ('flood_zones', 'flood_risk', 1.0),
+    'wildfire': ('wildfire_zones', 'fire_risk', 50.0)
+}
+
+NO_HAZARD = -1
+
+
+def _axis_weights(source, target):
+    """Lower index, upper weight and in-range mask for linear interpolation along one axis"""
+    source = np.asarray(source, dtype=np.float64)
+    position = np.interp(target, source, np.arange(source.size), left=np.nan, right=np.nan)
+    inside = ~np.isnan(position)
+    position = np.where(inside, position, 0.0)
+    lower = np.minimum(np.floor(position).astype(int), source.size - 2)
+    return lower, position - lower, inside
+
+
+def resample(lat_src, lon_src, grid, lat_dst, lon_dst):
+    """Bilinearly resample a (H, W) grid onto another regular lat/lon grid (zero outside)"""
+    grid = np.asarray(grid, dtype=np.float64)
+    row, row_weight, row_inside = _axis_weights(lat_src, lat_dst)
+    col, col_weight, col_inside = _axis_weights(lon_src, lon_dst)
+    fr = row_weight[:, None]
+    fc = col_weight[None, :]
+    top = grid[np.ix_(row, col)] * (1 - fc) + grid[np.ix_(row, col + 1)] * fc
+    bottom = grid[np.ix_(row + 1, col)] * (1 - fc) + grid[np.ix_(row + 1, col + 1)] * fc
+    return np.where(row_inside[:, None] & col_inside[None, :], top * (1 - fr) + bottom * fr, 0.0)
+
+
+class HazardRasterStack:
+    """All hazard layers on one common grid, with a composite and per-cell attribution.
+
+    Each layer is normalised to 0-1 risk. The composite treats weighted
+    layers as independent chances, 1 - prod(1 - w * risk), so one certain
+    hazard saturates it and overlapping hazards compound. `dominant` holds
+    the index (into `names`) of the largest weighted layer per cell, or
+    NO_HAZARD where every layer is zero.
+    """
+
+    def __init__(self, lat_range, lon_range, layers, weights=None):
+        self.lat_range = np.asarray(lat_range, dtype=np.float64)
+        self.lon_range = np.asarray(lon_range, dtype=np.float64)
+        self.names = list(layers)
+        self.weights = {name: 1.0 for name in self.names}
+        self.weights.update(weights or {})
+        self.layers = np.stack([np.clip(layers[name], 0.0, 1.0) for name in self.names]) if self.names else \
+            np.zeros((0, self.lat_range.size, self.lon_range.size))
+        self.composite, self.dominant = self._combine(self.layers)
+        self._pyramid = None
+
+    def _combine(self, layers):
+        weights = np.array([self.weights[name] for name in self.names]).reshape(-1, 1, 1)
+        weighted = np.clip(layers * weights, 0.0, 1.0)
+        composite = 1.0 - np.prod(1.0 - weighted, axis=0)
+        if not self.names:
+            return composite, np.full(composite.shape, NO_HAZARD, dtype=np.int8)
+        dominant = np.where(weighted.max(axis=0) > 0, weighted.argmax(axis=0), NO_HAZARD).astype(np.int8)
+        return composite, dominant
+
+    @classmethod
+    def from_overlays(cls, overlays, resolution=256, weights=None):
+        """Resample every hazard overlay present onto the union of their extents"""
+        present = {name: overlays[key] for name, (key, _, _) in HAZARD_LAYERS.items() if key in overlays}
+        if not present:
+            return None
+
+        south = min(float(np.min(data['lat_range'])) for data in present.values())
+        north = max(float(np.max(data['lat_range'])) for data in present.values())
+        west = min(float(np.min(data['lon_range'])) for data in present.values())
+        east = max(float(np.max(data['lon_range'])) for data in present.values())
+        lat_range = np.linspace(south, north, resolution)
+        lon_range = np.linspace(west, east, resolution)
+
+        layers = {}
+        for name, data in present.items():
+            _, field, full_risk = HAZARD_LAYERS[name]
+            layers[name] = resample(data['lat_range'], data['lon_range'], data[field], lat_range, lon_range) / full_risk
+        return cls(lat_range, lon_range, layers, weights)
+
+    @property
+    def pyramid(self):
+        if self._pyramid is None:
+            self._pyramid = OverlayPyramid(
+                self.lat_range, self.lon_range,
+                {name: self.layers[k] for k, name in enumerate(self.names)},
+                {name: 'max' for name in self.names}
+            )
+        return self._pyramid
+
+    @property
+    def nbytes(self):
+        return self.layers.nbytes + self.composite.nbytes + self.dominant.nbytes + self.pyramid.nbytes
+
+    def view(self, zoom=None, level=None):
+        """Composite, attribution and layers at the pyramid level for a map zoom (or an explicit level)"""
+        if (zoom is None and not level) or not self.names:
+            level, lat_range, lon_range = 0, self.lat_range, self.lon_range
+            layers, composite, dominant = self.layers, self.composite, self.dominant
+        else:
+            reduced = self.pyramid.view(zoom, level)
+            level, lat_range, lon_range = reduced['pyramid_level'], reduced['lat_range'], reduced['lon_range']
+            layers = np.stack([reduced[name] for name in self.names])
+            composite, dominant = self._combine(layers)
+        return {
+            'lat_range': lat_range,
+            'lon_range': lon_range,
+            'composite': composite,
+            'dominant': dominant,
+            'names': self.names,
+            'layers': dict(zip(self.names, layers)),
+            'pyramid_level': level
+        }
+
+    def risk_at(self, lat, lon):
+        """Composite risk and dominant hazard name at the nearest cell (None outside the grid)"""
+        if not (self.lat_range[0] <= lat <= self.lat_range[-1] and self.lon_range[0] <= lon <= self.lon_range[-1]):
+            return None
+        row = int(np.abs(self.lat_range - lat).argmin())
+        col = int(np.abs(self.lon_range - lon).argmin())
+        dominant = int(self.dominant[row, col])
+        return {
+            'composite': float(self.composite[row, col]),
+            'dominant': self.names[dominant] if dominant != NO_HAZARD else None,
+            'layers': {name: float(self.layers[k, row, col]) for k, name in enumerate(self.names)}
+        }
+
+    def to_bytes(self):
+        """Binary frame of the stack (see data_pipeline.serialization)"""
+        return pack({
+            'lat_range': self.lat_range,
+            'lon_range': self.lon_range,
+            'names': self.names,
+            'weights': self.weights,
+            'layers': self.layers
+        })
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        data = unpack(buffer)
+        return cls(data['lat_range'], data['lon_range'], dict(zip(data['names'], data['layers'])), data['weights'])
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
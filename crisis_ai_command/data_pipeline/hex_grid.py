@@ -0,0 +1,207 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Centre-to-corner size of a hexagon
+HEX_SIZE_KM = 1.0
+
+# Congestion readings lose half their weight in a cell's rolling mean after this long
+HALF_LIFE_MINUTES = 30.0
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON_EQUATOR = 111.32
+
+SQRT3 = np.sqrt(3.0)
+
+
+def _km_per_deg_lon(ref_lat):
+    return KM_PER_DEG_LON_EQUATOR * np.cos(np.radians(ref_lat))
+
+
+def hex_cells(lats, lons, size_km=HEX_SIZE_KM, ref_lat=0.0):
+    """Axial (q, r) of the pointy-top hexagon holding each point, as two int arrays
+
+    Points are projected onto a local plane in km (equirectangular around
+    ref_lat), so hexagons are regular near the reference latitude.
+    """
+    x = np.asarray(lons, dtype=np.float64) * _km_per_deg_lon(ref_lat)
+    y = np.asarray(lats, dtype=np.float64) * KM_PER_DEG_LAT
+    q = (SQRT3 / 3 * x - y / 3) / size_km
+    r = (2 / 3 * y) / size_km
+
+    # Cube rounding: round all three cube coordinates, then fix the one that moved most
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_centers(q, r, size_km=HEX_SIZE_KM, ref_lat=0.0):
+    """Latitude and longitude arrays of hexagon centres"""
+    q = np.asarray(q, dtype=np.float64)
+    r = np.asarray(r, dtype=np.float64)
+    x = size_km * SQRT3 * (q + r / 2)
+    y = size_km * 1.5 * r
+    return y / KM_PER_DEG_LAT, x / _km_per_deg_lon(ref_lat)
+
+
+def hex_polygons(q, r, size_km=HEX_SIZE_KM, ref_lat=0.0):
+    """(N, 7, 2) closed [lon, lat] rings of hexagon outlines, GeoJSON order"""
+    lat, lon = hex_centers(q, r, size_km, ref_lat)
+    angles = np.radians(30 + 60 * np.arange(7))
+    ring_lat = lat[:, None] + size_km * np.sin(angles) / KM_PER_DEG_LAT
+    ring_lon = lon[:, None] + size_km * np.cos(angles) / _km_per_deg_lon(ref_lat)
+    return np.stack([ring_lon, ring_lat], axis=-1)
+
+
+def _finite(value):
+    return value is not None and bool(np.isfinite(value))
+
+
+def _epoch(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)) and value == value:
+        return float(value)
+    return time.time()
+
+
+class HexCongestionGrid:
+    """Congestion readings binned into a hexagonal grid, updated incrementally.
+
+    Per cell it keeps an exponentially time-decayed mean congestion (half
+    life HALF_LIFE_MINUTES), plus total sample and incident counts. A batch
+    of readings is binned and folded in with vectorised numpy, so the cost
+    of an update is proportional to the batch, and reading the grid back is
+    proportional to the number of cells, however many raw readings went in.
+    """
+
+    def __init__(self, size_km=HEX_SIZE_KM, half_life_minutes=HALF_LIFE_MINUTES):
+        self.size_km = size_km
+        self.tau = half_life_minutes * 60.0 / np.log(2)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ref_lat = None
+        self._index = {}  # (q, r) -> row
+        self._q = np.zeros(0, dtype=np.int64)
+        self._r = np.zeros(0, dtype=np.int64)
+        self._weighted_sum = np.zeros(0)
+        self._weight = np.zeros(0)
+        self._updated = np.zeros(0)
+        self._samples = np.zeros(0, dtype=np.int64)
+        self._incidents = np.zeros(0, dtype=np.int64)
+        self._synced = 0
+        self._first = None
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def __len__(self):
+        return len(self._index)
+
+    def _rows(self, q, r):
+        """Row of each (q, r) pair, appending rows for cells not seen before"""
+        keys = list(zip(q.tolist(), r.tolist()))
+        new = [key for key in dict.fromkeys(keys) if key not in self._index]
+        if new:
+            start = len(self._index)
+            for offset, key in enumerate(new):
+                self._index[key] = start + offset
+            new_q, new_r = np.array(new, dtype=np.int64).T
+            self._q = np.concatenate([self._q, new_q])
+            self._r = np.concatenate([self._r, new_r])
+            for name in ('_weighted_sum', '_weight', '_updated', '_samples', '_incidents'):
+                column = getattr(self, name)
+                setattr(self, name, np.concatenate([column, np.zeros(len(new), dtype=column.dtype)]))
+        return np.fromiter((self._index[key] for key in keys), dtype=np.int64, count=len(keys))
+
+    def _add(self, lats, lons, congestion, incidents, times):
+        if self.ref_lat is None:
+            self.ref_lat = float(np.round(np.mean(lats), 1))
+        q, r = hex_cells(lats, lons, self.size_km, self.ref_lat)
+        cells, first, inverse = np.unique(q * (1 << 32) + r, return_index=True, return_inverse=True)
+        rows = self._rows(q[first], r[first])
+
+        # Decay each cell's running sums to the batch time, then add the batch weighted by age
+        now = float(np.max(times))
+        last = np.where(self._updated[rows] > 0, self._updated[rows], now)
+        decay = np.exp(-np.maximum(now - last, 0.0) / self.tau)
+        weights = np.exp(-(now - times) / self.tau)
+        n = len(cells)
+        self._weighted_sum[rows] = self._weighted_sum[rows] * decay + np.bincount(inverse, weights * congestion, n)
+        self._weight[rows] = self._weight[rows] * decay + np.bincount(inverse, weights, n)
+        self._updated[rows] = now
+        self._samples[rows] += np.bincount(inverse, minlength=n)
+        self._incidents[rows] += np.bincount(inverse, incidents, n).astype(np.int64)
+
+    def add(self, lats, lons, congestion, incidents=None, times=None):
+        """Fold a batch of readings into the grid (times in epoch seconds, default now)"""
+        lats = np.asarray(lats, dtype=np.float64)
+        if lats.size == 0:
+            return
+        incidents = np.zeros(lats.size) if incidents is None else np.asarray(incidents, dtype=np.float64)
+        times = np.full(lats.size, time.time()) if times is None else np.asarray(times, dtype=np.float64)
+        with self._lock:
+            self._add(lats, np.asarray(lons, dtype=np.float64), np.asarray(congestion, dtype=np.float64),
+                      incidents, times)
+
+    def sync(self, records):
+        """Fold in traffic records appended since the last sync (rebuilding if the series was reset)"""
+        with self._lock:
+            first = records[0] if len(records) else None
+            if len(records) < self._synced or first is not self._first:
+                self._reset()
+            self._first = first
+            # Records restored from a snapshot carry NaN where the field was missing
+            batch = [record for record in records[self._synced:]
+                     if _finite(record.get('lat')) and _finite(record.get('congestion_level'))]
+            self._synced = len(records)
+            if batch:
+                self._add(
+                    np.array([record['lat'] for record in batch], dtype=np.float64),
+                    np.array([record['lon'] for record in batch], dtype=np.float64),
+                    np.array([record['congestion_level'] for record in batch], dtype=np.float64),
+                    np.array([bool(record.get('incident_detected')) for record in batch], dtype=np.float64),
+                    np.array([_epoch(record.get('timestamp')) for record in batch], dtype=np.float64)
+                )
+        return self
+
+    def cells(self):
+        """Every cell as arrays: q, r, lat, lon (centres), mean congestion, samples, incidents; plus ref_lat"""
+        with self._lock:
+            if not self._index:
+                empty = np.zeros(0)
+                return {'q': empty, 'r': empty, 'lat': empty, 'lon': empty,
+                        'congestion': empty, 'samples': empty, 'incidents': empty, 'ref_lat': 0.0}
+            lat, lon = hex_centers(self._q, self._r, self.size_km, self.ref_lat)
+            return {
+                'q': self._q.copy(),
+                'r': self._r.copy(),
+                'lat': lat,
+                'lon': lon,
+                'congestion': self._weighted_sum / np.maximum(self._weight, 1e-12),
+                'samples': self._samples.copy(),
+                'incidents': self._incidents.copy(),
+                'ref_lat': self.ref_lat
+            }
+
+    def geojson(self, cells=None):
+        """GeoJSON FeatureCollection of the cell outlines, with feature ids 'q,r'"""
+        cells = self.cells() if cells is None else cells
+        rings = hex_polygons(cells['q'], cells['r'], self.size_km, cells['ref_lat']).round(6).tolist()
+        return {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'id': f"{q},{r}", 'geometry': {'type': 'Polygon', 'coordinates': [ring]}}
+                for q, r, ring in zip(cells['q'].tolist(), cells['r'].tolist(), rings)
+            ]
+        }
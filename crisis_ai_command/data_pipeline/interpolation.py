@@ -0,0 +1,233 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Scalar weather fields interpolated directly; wind is interpolated as a vector
+SCALAR_FIELDS = ('temperature', 'humidity', 'pressure', 'precipitation')
+
+
+def _distances_km(lat, lon, point_lat, point_lon):
+    """Equirectangular distances between targets (G,) and points (P,), as (G, P)"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))[:, None]
+    lon = np.radians(np.asarray(lon, dtype=np.float64))[:, None]
+    point_lat = np.radians(np.asarray(point_lat, dtype=np.float64))[None, :]
+    point_lon = np.radians(np.asarray(point_lon, dtype=np.float64))[None, :]
+    x = (point_lon - lon) * np.cos((lat + point_lat) / 2)
+    return EARTH_RADIUS_KM * np.hypot(x, point_lat - lat)
+
+
+class GridIndex:
+    """Uniform lat/lon bucket index over points for radius and bounding-box queries"""
+
+    def __init__(self, lats, lons, cell_deg=0.5):
+        self.cell_deg = cell_deg
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.buckets = {}
+        rows = np.floor(self.lats / cell_deg).astype(int)
+        cols = np.floor(self.lons / cell_deg).astype(int)
+        for index, key in enumerate(zip(rows.tolist(), cols.tolist())):
+            self.buckets.setdefault(key, []).append(index)
+
+    def query_box(self, south, north, west, east):
+        """Indices of points inside a lat/lon box"""
+        found = []
+        for row in range(math.floor(south / self.cell_deg), math.floor(north / self.cell_deg) + 1):
+            for col in range(math.floor(west / self.cell_deg), math.floor(east / self.cell_deg) + 1):
+                found.extend(self.buckets.get((row, col), ()))
+        found = np.array(found, dtype=np.int64)
+        if found.size:
+            inside = ((self.lats[found] >= south) & (self.lats[found] <= north) &
+                      (self.lons[found] >= west) & (self.lons[found] <= east))
+            found = found[inside]
+        return found
+
+    def query_radius(self, lat, lon, radius_km):
+        """Indices of points within radius_km of (lat, lon)"""
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        dlon = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        candidates = self.query_box(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+        if candidates.size:
+            distances = _distances_km([lat], [lon], self.lats[candidates], self.lons[candidates])[0]
+            candidates = candidates[distances <= radius_km]
+        return candidates
+
+
+def idw(point_lats, point_lons, values, lat_range, lon_range, power=2.0, neighbours=8):
+    """Inverse-distance weighted (H, W) grid from scattered point values
+
+    Each grid node uses its `neighbours` nearest points; nodes sitting on a
+    point take its value exactly.
+    """
+    lat_grid, lon_grid = np.meshgrid(lat_range, lon_range, indexing='ij')
+    distances = _distances_km(lat_grid.ravel(), lon_grid.ravel(), point_lats, point_lons)
+    values = np.asarray(values, dtype=np.float64)
+
+    if neighbours and distances.shape[1] > neighbours:
+        nearest = np.argpartition(distances, neighbours - 1, axis=1)[:, :neighbours]
+        distances = np.take_along_axis(distances, nearest, axis=1)
+        values = values[nearest]
+    else:
+        values = np.broadcast_to(values, distances.shape)
+
+    exact = distances < 1e-6
+    with np.errstate(divide='ignore'):
+        weights = np.where(exact, 0.0, 1.0 / distances ** power)
+    weights = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), weights)
+    grid = (weights * values).sum(axis=1) / weights.sum(axis=1)
+    return grid.reshape(lat_grid.shape)
+
+
+def kriging_lite(point_lats, point_lons, values, lat_range, lon_range,
+                 range_km=50.0, nugget=0.05, max_points=32):
+    """Ordinary kriging with a fixed exponential variogram (no fitting)
+
+    The sill is the sample variance, so only the correlation range is
+    assumed. One (P+1)-square system is solved for every grid node at once.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    point_lats = np.asarray(point_lats, dtype=np.float64)
+    point_lons = np.asarray(point_lons, dtype=np.float64)
+    if values.size > max_points:
+        centre_lat, centre_lon = float(np.mean(lat_range)), float(np.mean(lon_range))
+        keep = np.argsort(_distances_km([centre_lat], [centre_lon], point_lats, point_lons)[0])[:max_points]
+        point_lats, point_lons, values = point_lats[keep], point_lons[keep], values[keep]
+
+    sill = max(float(values.var()), 1e-9)
+
+    def variogram(h):
+        return np.where(h > 0, nugget * sill + (1 - nugget) * sill * (1 - np.exp(-3 * h / range_km)), 0.0)
+
+    n = values.size
+    system = np.ones((n + 1, n + 1))
+    system[:n, :n] = variogram(_distances_km(point_lats, point_lons, point_lats, point_lons))
+    system[n, n] = 0.0
+
+    lat_grid, lon_grid = np.meshgrid(lat_range, lon_range, indexing='ij')
+    rhs = np.ones((n + 1, lat_grid.size))
+    rhs[:n] = variogram(_distances_km(lat_grid.ravel(), lon_grid.ravel(), point_lats, point_lons)).T
+    weights = np.linalg.lstsq(system, rhs, rcond=None)[0][:n]
+    return (weights.T @ values).reshape(lat_grid.shape)
+
+
+class WeatherFieldInterpolator:
+    """Continuous weather fields over a grid from scattered observations.
+
+    Observations are dicts with lat, lon and any weather fields. Scalars are
+    interpolated directly; wind is interpolated as (u, v) components so that
+    e.g. 350° and 10° average to north rather than south.
+    """
+
+    def __init__(self, observations, method='idw', **options):
+        self.observations = [o for o in observations if o.get('lat') is not None and o.get('lon') is not None]
+        self.method = method
+        self.options = options
+
+    def _interpolate(self, lats, lons, values, lat_range, lon_range):
+        if np.allclose(values, values[0]):
+            return np.full((len(lat_range), len(lon_range)), values[0])
+        if self.method == 'kriging' and values.size >= 3:
+            return kriging_lite(lats, lons, values, lat_range, lon_range, **self.options)
+        return idw(lats, lons, values, lat_range, lon_range, **self.options)
+
+    def _field(self, name):
+        usable = [o for o in self.observations if o.get(name) is not None]
+        return (np.array([o['lat'] for o in usable]), np.array([o['lon'] for o in usable]),
+                np.array([o[name] for o in usable], dtype=np.float64))
+
+    def fields(self, lat_range, lon_range, names=SCALAR_FIELDS + ('wind',)):
+        """Interpolated (H, W) grids per field; wind yields wind_speed and wind_direction"""
+        grids = {}
+        for name in names:
+            if name == 'wind':
+                usable = [o for o in self.observations
+                          if o.get('wind_speed') is not None and o.get('wind_direction') is not None]
+                if not usable:
+                    continue
+                lats = np.array([o['lat'] for o in usable])
+                lons = np.array([o['lon'] for o in usable])
+                speed = np.array([o['wind_speed'] for o in usable], dtype=np.float64)
+                direction = np.radians([o['wind_direction'] for o in usable])
+                u = self._interpolate(lats, lons, speed * np.sin(direction), lat_range, lon_range)
+                v = self._interpolate(lats, lons, speed * np.cos(direction), lat_range, lon_range)
+                # Speed is interpolated on its own so opposing winds do not cancel to calm
+                grids['wind_speed'] = self._interpolate(lats, lons, speed, lat_range, lon_range)
+                grids['wind_direction'] = np.degrees(np.arctan2(u, v)) % 360.0
+                continue
+
+            lats, lons, values = self._field(name)
+            if values.size:
+                grids[name] = self._interpolate(lats, lons, values, lat_range, lon_range)
+        return grids
+
+
+class ObservationStore:
+    """Recent weather observations from every monitored location, with a spatial index.
+
+    Collectors add each reading with its coordinates; simulations for any
+    location can then read neighbouring conditions without an API call.
+    One observation is kept per station: the reporting location's name when
+    given, else its rounded coordinates.
+    """
+
+    def __init__(self, max_age_seconds=3 * 3600, cell_deg=0.5):
+        self.max_age_seconds = max_age_seconds
+        self.cell_deg = cell_deg
+        self._observations = OrderedDict()  # station key -> observation
+        self._index = None
+        self._lock = threading.Lock()
+
+    def add(self, lat, lon, record, station=None):
+        timestamp = record.get('timestamp')
+        observed_at = timestamp.timestamp() if isinstance(timestamp, datetime) else time.time()
+        key = station if station is not None else (round(float(lat), 3), round(float(lon), 3))
+        observation = dict(record, lat=float(lat), lon=float(lon), observed_at=observed_at, station=key)
+        with self._lock:
+            self._observations.pop(key, None)
+            self._observations[key] = observation
+            self._index = None
+
+    def _current(self):
+        """Fresh observations and their index (rebuilt lazily after changes)"""
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            # Readings arrive roughly, not strictly, in time order, so check every one
+            stale = [key for key, o in self._observations.items() if o['observed_at'] < cutoff]
+            for key in stale:
+                self._observations.pop(key)
+            if stale:
+                self._index = None
+            observations = list(self._observations.values())
+            if self._index is None:
+                self._index = GridIndex([o['lat'] for o in observations],
+                                        [o['lon'] for o in observations], self.cell_deg)
+            return observations, self._index
+
+    def nearby(self, lat, lon, radius_km=150.0):
+        """Observations within radius_km of (lat, lon)"""
+        observations, index = self._current()
+        if not observations:
+            return []
+        return [observations[i] for i in index.query_radius(lat, lon, radius_km)]
+
+    def __len__(self):
+        return len(self._current()[0])
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_observation_store():
+    """Process-wide observation store shared by every collector"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = ObservationStore()
+    return _default_store
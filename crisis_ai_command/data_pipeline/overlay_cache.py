@@ -0,0 +1,139 @@
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Quantization step per weather field; readings inside one step share an overlay
+WEATHER_STEPS = {
+    'temperature': 1.0,      # °C
+    'wind_speed': 1.0,       # km/h
+    'wind_direction': 10.0,  # degrees
+    'humidity': 5.0,         # %
+    'precipitation': 0.5     # mm
+}
+
+COORDINATE_DECIMALS = 3  # ~100 m
+
+
+def quantize_weather(weather_data, steps=WEATHER_STEPS):
+    """Weather readings snapped to their quantization step (missing fields stay missing)"""
+    quantized = {}
+    for field, step in steps.items():
+        value = weather_data.get(field)
+        if value is not None:
+            quantized[field] = round(float(value) / step) * step
+            if field == 'wind_direction':
+                quantized[field] %= 360.0
+    return quantized
+
+
+def overlay_key(coordinates, weather_data, *resolution):
+    """Cache key: rounded coordinates, quantized weather and the grid resolution"""
+    lat, lon = coordinates
+    quantized = quantize_weather(weather_data)
+    return (
+        round(float(lat), COORDINATE_DECIMALS),
+        round(float(lon), COORDINATE_DECIMALS),
+        tuple(sorted(quantized.items())),
+        resolution
+    )
+
+
+def _nbytes(value):
+    """Approximate memory held by an overlay (numpy buffers dominate)"""
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, (int, np.integer)):
+        return int(nbytes)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Make cached arrays read-only so no caller can corrupt a shared entry"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    return value
+
+
+class OverlayCache:
+    """LRU cache of simulated climate overlays under a memory budget.
+
+    Entries are keyed by overlay_key(), so Streamlit reruns and other
+    sessions rendering the same city in the same weather reuse one set of
+    flood and fire grids instead of re-simulating them.
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value
+        _freeze(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_overlay_cache():
+    """Process-wide overlay cache shared by every session"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = OverlayCache()
+    return _default_cache
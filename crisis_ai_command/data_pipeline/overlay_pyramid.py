@@ -0,0 +1,87 @@
+import numpy as np
+
+# Block reducers; 'max'/'min' keep hazards visible at coarse levels, 'mean' smooths
+REDUCERS = {
+    'max': np.maximum,
+    'min': np.minimum,
+    'mean': np.add
+}
+
+TILE_SIZE_PX = 256
+
+
+def _block_starts(n, factor):
+    return np.arange(0, n, factor)
+
+
+def block_reduce(grid, factor, how='max'):
+    """Reduce the last two axes of grid by factor x factor blocks (ragged edge blocks allowed)"""
+    grid = np.asarray(grid)
+    height, width = grid.shape[-2:]
+    rows, cols = _block_starts(height, factor), _block_starts(width, factor)
+    ufunc = REDUCERS[how]
+    reduced = ufunc.reduceat(ufunc.reduceat(grid, rows, axis=-2), cols, axis=-1)
+    if how == 'mean':
+        counts = np.outer(np.diff(np.r_[rows, height]), np.diff(np.r_[cols, width]))
+        reduced = reduced / counts
+    return reduced
+
+
+def reduce_axis(values, factor):
+    """Block centres of a 1-D coordinate axis"""
+    values = np.asarray(values, dtype=np.float64)
+    starts = _block_starts(values.size, factor)
+    return np.add.reduceat(values, starts) / np.diff(np.r_[starts, values.size])
+
+
+class OverlayPyramid:
+    """Resolution pyramid of one gridded overlay.
+
+    Level 0 is the simulated grid; level k block-reduces it by 2**k on both
+    axes, straight from level 0 so every level is exact. The map picks the
+    coarsest level that still gives about `px_per_cell` screen pixels per
+    cell at its zoom, so zooming only swaps levels and never re-simulates.
+    """
+
+    def __init__(self, lat_range, lon_range, fields, reducers, min_size=8):
+        self.reducers = dict(reducers)
+        self.levels = []
+
+        factor = 1
+        while True:
+            level = {
+                'lat_range': reduce_axis(lat_range, factor) if factor > 1 else np.asarray(lat_range),
+                'lon_range': reduce_axis(lon_range, factor) if factor > 1 else np.asarray(lon_range)
+            }
+            for name, grid in fields.items():
+                level[name] = block_reduce(grid, factor, self.reducers.get(name, 'max')) if factor > 1 else np.asarray(grid)
+            for value in level.values():
+                value.setflags(write=False)
+            self.levels.append(level)
+
+            if min(len(level['lat_range']), len(level['lon_range'])) <= min_size:
+                break
+            factor *= 2
+
+    @property
+    def nbytes(self):
+        # Level 0 shares its arrays with the overlay it was built from
+        return sum(value.nbytes for level in self.levels[1:] for value in level.values())
+
+    def level_for_zoom(self, zoom, viewport_px=1000, px_per_cell=6):
+        """Index of the coarsest level detailed enough for a map at `zoom`"""
+        lon_range = self.levels[0]['lon_range']
+        span_deg = abs(float(lon_range[-1] - lon_range[0])) or 1e-9
+        viewport_deg = 360.0 / 2 ** zoom * viewport_px / TILE_SIZE_PX
+        cells_needed = span_deg / viewport_deg * viewport_px / px_per_cell
+
+        for index in range(len(self.levels) - 1, -1, -1):
+            if len(self.levels[index]['lon_range']) >= cells_needed:
+                return index
+        return 0
+
+    def view(self, zoom=None, level=None, **viewport):
+        """Arrays of one level (chosen from zoom unless given), plus the level index"""
+        if level is None:
+            level = 0 if zoom is None else self.level_for_zoom(zoom, **viewport)
+        return dict(self.levels[level], pyramid_level=level)
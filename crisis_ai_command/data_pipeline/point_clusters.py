@@ -0,0 +1,145 @@
+import math
+import threading
+
+from data_pipeline.overlay_pyramid import TILE_SIZE_PX
+
+MAX_LATITUDE = 85.0511
+
+# (west, south, east, north) of the whole Web Mercator map
+WORLD_BOUNDS = (-180.0, -MAX_LATITUDE, 180.0, MAX_LATITUDE)
+
+
+def _project(lat, lon):
+    """Web Mercator position in [0, 1] x [0, 1]"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin = math.sin(math.radians(lat))
+    return (lon + 180.0) / 360.0, 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+
+
+def _unproject(x, y):
+    return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))), x * 360.0 - 180.0
+
+
+def viewport_bounds(lat, lon, zoom, width_px=1000, height_px=600):
+    """(west, south, east, north) of a map view centred on lat/lon"""
+    x, y = _project(lat, lon)
+    world_px = TILE_SIZE_PX * 2 ** zoom
+    half_x, half_y = width_px / 2 / world_px, height_px / 2 / world_px
+    north, west = _unproject(x - half_x, max(0.0, y - half_y))
+    south, east = _unproject(x + half_x, min(1.0, y + half_y))
+    return max(-180.0, west), south, min(180.0, east), north
+
+
+class PointClusterIndex:
+    """Hierarchical grid clustering of map points, in the spirit of supercluster.
+
+    Each zoom level buckets points into Web Mercator cells about `radius_px`
+    screen pixels wide; a cell at zoom z+1 is exactly one quarter of a cell
+    at zoom z, so the levels nest. A cell keeps only its count, coordinate
+    sums (for the centroid) and its first item, so add() is O(zoom levels)
+    and a view reads at most the cells its bounds cover, whatever the total
+    number of points. Above max_zoom the individual points are returned.
+    """
+
+    def __init__(self, min_zoom=0, max_zoom=16, radius_px=40):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.radius_px = radius_px
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # zoom -> {(cx, cy): [count, sum_x, sum_y, first_item]}
+        self._levels = {zoom: {} for zoom in range(self.min_zoom, self.max_zoom + 1)}
+        # Every point by its max_zoom cell, for views zoomed in past clustering
+        self._points = {}
+        self._count = 0
+        self._synced = 0
+        self._first = None
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def __len__(self):
+        return self._count
+
+    def _cell_size(self, zoom):
+        return self.radius_px / (TILE_SIZE_PX * 2 ** zoom)
+
+    def _add(self, lat, lon, item):
+        x, y = _project(lat, lon)
+        for zoom, cells in self._levels.items():
+            size = self._cell_size(zoom)
+            key = (int(x / size), int(y / size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [1, x, y, item]
+            else:
+                cell[0] += 1
+                cell[1] += x
+                cell[2] += y
+        size = self._cell_size(self.max_zoom)
+        self._points.setdefault((int(x / size), int(y / size)), []).append((x, y, item))
+        self._count += 1
+
+    def add(self, lat, lon, item=None):
+        with self._lock:
+            self._add(lat, lon, item)
+
+    def sync(self, records, point):
+        """Index records appended to an append-only series since the last sync
+
+        point(record) returns (lat, lon), or None to skip the record. If the
+        series was cleared or replaced, the index is rebuilt from scratch.
+        """
+        with self._lock:
+            first = records[0] if len(records) else None
+            if len(records) < self._synced or first is not self._first:
+                self._reset()
+            self._first = first
+            for record in records[self._synced:]:
+                position = point(record)
+                if position is not None:
+                    self._add(position[0], position[1], record)
+            self._synced = len(records)
+        return self
+
+    def _covered(self, cells, size, bounds):
+        """Cells of one level inside bounds: a lookup per covered cell, or a scan if fewer are occupied"""
+        west, south, east, north = bounds
+        x0, y0 = _project(north, west)
+        x1, y1 = _project(south, east)
+        cx0, cx1 = int(x0 / size), int(x1 / size)
+        cy0, cy1 = int(y0 / size), int(y1 / size)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(cells):
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cell = cells.get((cx, cy))
+                    if cell is not None:
+                        yield cell
+        else:
+            for (cx, cy), cell in cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    yield cell
+
+    def clusters(self, bounds, zoom):
+        """Clusters and single points for a view: dicts with lat, lon, count and (for singles) item
+
+        bounds: (west, south, east, north) in degrees, e.g. from viewport_bounds().
+        """
+        zoom = max(self.min_zoom, int(zoom))
+        with self._lock:
+            if zoom > self.max_zoom:
+                features = []
+                for points in self._covered(self._points, self._cell_size(self.max_zoom), bounds):
+                    for x, y, item in points:
+                        lat, lon = _unproject(x, y)
+                        features.append({'lat': lat, 'lon': lon, 'count': 1, 'item': item})
+                return features
+
+            features = []
+            for count, sum_x, sum_y, item in self._covered(self._levels[zoom], self._cell_size(zoom), bounds):
+                lat, lon = _unproject(sum_x / count, sum_y / count)
+                features.append({'lat': lat, 'lon': lon, 'count': count, 'item': item if count == 1 else None})
+            return features
@@ -2,52 +2,60 @@ import torch
 import numpy as np
 from datetime import datetime, timedelta
 import logging
+import threading
+
+from data_pipeline.profiling import profiled
+from data_pipeline.resource_allocation import ResourceAllocator
+from data_pipeline.scoring_rules import get_scoring_rules
 
 class CUDADataProcessor:
-    def __init__(self):
+    def __init__(self, risk_windows=None, weights=None, thresholds=None, rules=None, region=None):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model_ready = False
         
+        # Weights, caps, multipliers, thresholds and windows live in scoring_rules.json
+        # (hot-reloaded); constructor arguments override them for this processor only
+        self.rules = rules or get_scoring_rules()
+        self.region = region
+        self.rule_overrides = {}
+        if risk_windows:
+            self.rule_overrides['windows'] = dict(risk_windows)
+        if weights:
+            self.rule_overrides['weights'] = dict(weights)
+        if thresholds:
+            self.rule_overrides['thresholds'] = dict(thresholds)
+        self.resource_allocator = ResourceAllocator()
+        
         if torch.cuda.is_available():
             print(f"🚀 Processor initialized on: {self.device}")
             print(f"   GPU: {torch.cuda.get_device_name(0)}")
             print(f"   VRAM: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
         else:
             print("🚀 Processor initialized on: CPU")
+    
+    def scoring_plan(self, region=None):
+        """Compiled scoring plan for a region (defaults to the processor's region)"""
+        return self.rules.plan(region or self.region, self.rule_overrides or None)
             
-    def process_crisis_detection(self, data):
-        """Enhanced crisis detection with more realistic thresholds"""
+    def process_crisis_detection(self, data, now=None, region=None):
+        """Enhanced crisis detection with more realistic thresholds
+        
+        `now` sets the end of the scoring windows for time-indexed series
+        (defaults to the current time; used when replaying history).
+        `region` selects per-region rules from the scoring configuration.
+        """
         try:
-            # Calculate individual risk scores with improved logic
-            weather_risk = self._calculate_weather_risk(data.get('weather', []))
-            traffic_risk = self._calculate_traffic_risk(data.get('traffic', []))
-            social_risk = self._calculate_social_risk(data.get('social', []))
-            news_risk = self._calculate_news_risk(data.get('news', []))
+            plan = self.scoring_plan(region)
             
-            # Weighted overall crisis score (more conservative)
-            weights = {
-                'weather': 0.20,    # Reduced from 0.25
-                'traffic': 0.25,    # Reduced from 0.30
-                'social': 0.25,     # Reduced from 0.30
-                'news': 0.30        # Increased from 0.15 (news is most reliable indicator)
-            }
+            # Calculate individual risk scores with improved logic
+            weather_risk = self._calculate_weather_risk(data.get('weather', []), now, plan)
+            traffic_risk = self._calculate_traffic_risk(data.get('traffic', []), now, plan)
+            social_risk = self._calculate_social_risk(data.get('social', []), now, plan)
+            news_risk = self._calculate_news_risk(data.get('news', []), now, plan)
             
-            crisis_score = (
-                weather_risk * weights['weather'] +
-                traffic_risk * weights['traffic'] +
-                social_risk * weights['social'] +
-                news_risk * weights['news']
-            )
-            
-            # More realistic risk level thresholds
-            if crisis_score >= 0.75:          # Raised from 0.7
-                risk_level = 'CRITICAL'
-            elif crisis_score >= 0.55:        # Raised from 0.5
-                risk_level = 'HIGH'
-            elif crisis_score >= 0.35:        # Raised from 0.3
-                risk_level = 'MEDIUM'
-            else:
-                risk_level = 'LOW'
+            # Weighted overall crisis score and risk level from the configured thresholds
+            crisis_score = float(plan.crisis_score(weather_risk, traffic_risk, social_risk, news_risk))
+            risk_level = plan.risk_level(crisis_score)
             
             return {
                 'crisis_score': crisis_score,
@@ -64,103 +72,132 @@ class CUDADataProcessor:
             print(f"⚠️ Crisis detection error: {e}")
             return self._default_crisis_result()
     
-    def _calculate_weather_risk(self, weather_data):
-        """Calculate weather risk with more realistic thresholds"""
-        if not weather_data:
-            return 0.1  # Baseline risk when no data
+    def process_crisis_detection_batch(self, data_list, now=None, regions=None):
+        """Score many locations at once with one vectorized pass per region
         
-        latest_weather = weather_data[-1]
-        risk_score = latest_weather.get('risk_score', 0)
+        data_list: list of per-location data dicts (as for process_crisis_detection)
+        regions: optional list of region names, one per location
+        """
+        regions = regions or [None] * len(data_list)
+        results = [None] * len(data_list)
         
-        # More conservative weather risk calculation
-        if risk_score > 0.8:
-            return min(0.9, risk_score)  # Cap at 0.9 unless truly extreme
-        elif risk_score > 0.6:
-            return risk_score * 0.8      # Reduce by 20%
-        elif risk_score > 0.3:
-            return risk_score * 0.7      # Reduce by 30%
-        else:
-            return risk_score * 0.5      # Normal weather is low risk
-    
-    def _calculate_traffic_risk(self, traffic_data):
-        """Calculate traffic risk with improved logic"""
-        if not traffic_data:
-            return 0.15  # Baseline traffic risk
+        groups = {}
+        for index, region in enumerate(regions):
+            groups.setdefault(region, []).append(index)
         
-        recent_traffic = traffic_data[-5:] if len(traffic_data) >= 5 else traffic_data
+        timestamp = datetime.now()
+        gpu_accelerated = torch.cuda.is_available()
+        for region, indices in groups.items():
+            plan = self.scoring_plan(region)
+            rows = [self._extract_features(data_list[i], now, plan) for i in indices]
+            features = {key: np.array([row[key] for row in rows], dtype=np.float64) for key in rows[0]}
+            scores = plan.evaluate(features)
+            
+            for position, index in enumerate(indices):
+                results[index] = {
+                    'crisis_score': float(scores['crisis_score'][position]),
+                    'risk_level': plan.level_names[scores['level_index'][position]],
+                    'weather_risk': float(scores['weather_risk'][position]),
+                    'traffic_risk': float(scores['traffic_risk'][position]),
+                    'social_risk': float(scores['social_risk'][position]),
+                    'news_risk': float(scores['news_risk'][position]),
+                    'gpu_accelerated': gpu_accelerated,
+                    'timestamp': timestamp
+                }
         
-        # Calculate average congestion and incident rate
+        return results
+    
+    def _extract_features(self, data, now, plan):
+        """Reduce one location's recent records to the scalar features the plan scores"""
+        features = {}
+        features.update(self._weather_features(data.get('weather', []), now, plan))
+        features.update(self._traffic_features(data.get('traffic', []), now, plan))
+        features.update(self._social_features(data.get('social', []), now, plan))
+        features.update(self._news_features(data.get('news', []), now, plan))
+        return features
+    
+    def _weather_features(self, weather_data, now, plan):
+        recent_weather = self._recent(weather_data, 'weather', now, plan)
+        return {
+            'weather_count': len(recent_weather),
+            'weather_latest': recent_weather[-1].get('risk_score', 0) if recent_weather else 0.0
+        }
+    
+    def _traffic_features(self, traffic_data, now, plan):
+        recent_traffic = self._recent(traffic_data, 'traffic', now, plan)
+        
+        # Average congestion and incident rate
         congestion_levels = [t.get('congestion_level', 0) for t in recent_traffic]
         incidents = [t.get('incident_detected', False) for t in recent_traffic]
         
-        avg_congestion = np.mean(congestion_levels) if congestion_levels else 0
-        incident_rate = sum(incidents) / len(incidents) if incidents else 0
-        
-        # More realistic traffic risk scoring
-        base_risk = avg_congestion * 0.6  # Normal congestion isn't a crisis
-        incident_risk = incident_rate * 0.4  # Incidents add risk
-        
-        total_risk = base_risk + incident_risk
-        
-        # Traffic alone rarely causes critical situations
-        return min(0.8, total_risk)  # Cap traffic risk at 0.8
+        return {
+            'traffic_count': len(recent_traffic),
+            'traffic_congestion': np.mean(congestion_levels) if congestion_levels else 0.0,
+            'traffic_incident_rate': sum(incidents) / len(incidents) if incidents else 0.0
+        }
     
-    def _calculate_social_risk(self, social_data):
-        """Calculate social media risk with more conservative approach"""
-        if not social_data:
-            return 0.1  # Baseline social risk
+    def _social_features(self, social_data, now, plan):
+        recent_social = self._recent(social_data, 'social', now, plan)
         
-        recent_social = social_data[-10:] if len(social_data) >= 10 else social_data
-        
-        # Analyze sentiment and crisis keywords
+        # Sentiment and crisis keyword rate
         sentiments = [s.get('sentiment', 0) for s in recent_social]
         crisis_mentions = [s.get('crisis_keywords', False) for s in recent_social]
         
-        avg_sentiment = np.mean(sentiments) if sentiments else 0
-        crisis_rate = sum(crisis_mentions) / len(crisis_mentions) if crisis_mentions else 0
-        
-        # Social media risk calculation (more conservative)
-        sentiment_risk = max(0, -avg_sentiment) * 0.3  # Negative sentiment contributes
-        crisis_keyword_risk = crisis_rate * 0.4
-        
-        # Social media can be noisy, so we're more conservative
-        total_risk = (sentiment_risk + crisis_keyword_risk) * 0.7  # Reduce overall impact
-        
-        return min(0.7, total_risk)  # Cap social risk at 0.7
+        return {
+            'social_count': len(recent_social),
+            'social_sentiment': np.mean(sentiments) if sentiments else 0.0,
+            'social_crisis_rate': sum(crisis_mentions) / len(crisis_mentions) if crisis_mentions else 0.0
+        }
     
-    def _calculate_news_risk(self, news_data):
-        """Calculate news risk - most reliable indicator"""
-        if not news_data:
-            return 0.05  # Very low baseline when no news
-        
-        recent_news = news_data[-10:] if len(news_data) >= 10 else news_data
+    def _news_features(self, news_data, now, plan):
+        recent_news = self._recent(news_data, 'news', now, plan)
         
         # News severity analysis
         severities = [n.get('severity', 0) for n in recent_news]
         
-        if not severities:
-            return 0.05
-        
-        # News risk calculation
-        max_severity = max(severities)
-        avg_severity = np.mean(severities)
-        high_severity_count = sum(1 for s in severities if s > 0.5)
-        
-        # Weight recent high-severity news more heavily
-        if max_severity > 0.7:
-            base_risk = max_severity * 0.8
-        elif max_severity > 0.4:
-            base_risk = max_severity * 0.6
-        else:
-            base_risk = avg_severity * 0.4
-        
-        # Boost risk if multiple high-severity articles
-        if high_severity_count > 2:
-            base_risk = min(0.9, base_risk * 1.3)
-        elif high_severity_count > 0:
-            base_risk = min(0.8, base_risk * 1.1)
-        
-        return base_risk
+        return {
+            'news_count': len(severities),
+            'news_max': max(severities) if severities else 0.0,
+            'news_mean': np.mean(severities) if severities else 0.0,
+            'news_high_count': sum(1 for s in severities if s > plan.news_high_severity)
+        }
+    
+    @profiled('processor.weather_risk')
+    def _calculate_weather_risk(self, weather_data, now=None, plan=None):
+        """Calculate weather risk from the latest reading (baseline when no data)"""
+        plan = plan or self.scoring_plan()
+        f = self._weather_features(weather_data, now, plan)
+        return float(plan.weather_risk(f['weather_count'], f['weather_latest']))
+    
+    @profiled('processor.traffic_risk')
+    def _calculate_traffic_risk(self, traffic_data, now=None, plan=None):
+        """Calculate traffic risk from congestion and incident rate (capped; traffic alone rarely is critical)"""
+        plan = plan or self.scoring_plan()
+        f = self._traffic_features(traffic_data, now, plan)
+        return float(plan.traffic_risk(f['traffic_count'], f['traffic_congestion'], f['traffic_incident_rate']))
+    
+    @profiled('processor.social_risk')
+    def _calculate_social_risk(self, social_data, now=None, plan=None):
+        """Calculate social media risk with more conservative approach"""
+        plan = plan or self.scoring_plan()
+        f = self._social_features(social_data, now, plan)
+        return float(plan.social_risk(f['social_count'], f['social_sentiment'], f['social_crisis_rate']))
+    
+    @profiled('processor.news_risk')
+    def _calculate_news_risk(self, news_data, now=None, plan=None):
+        """Calculate news risk - most reliable indicator"""
+        plan = plan or self.scoring_plan()
+        f = self._news_features(news_data, now, plan)
+        return float(plan.news_risk(f['news_count'], f['news_max'], f['news_mean'], f['news_high_count']))
+    
+    def _recent(self, items, source, now, plan):
+        """Recent records for a source: a time window for indexed series, else the last N items"""
+        if not items:
+            return []
+        if hasattr(items, 'since'):
+            return items.since(timedelta(minutes=plan.windows[source]), now=now)
+        count = plan.sample_counts[source]
+        return items[-count:] if len(items) >= count else items
     
     def predict_crisis_evolution(self, data, current_crisis):
         """Predict how the crisis might evolve"""
@@ -195,6 +232,7 @@ class CUDADataProcessor:
                 'trend_analysis': {}
             }
     
+    @profiled('processor.analyze_trends')
     def _analyze_trends(self, data):
         """Analyze trends in the crisis data"""
         trends = {}
@@ -232,8 +270,31 @@ class CUDADataProcessor:
         
         return trends
     
-    def optimize_resources(self, crisis_result, available_resources):
-        """Optimize emergency resource allocation"""
+    @profiled('processor.optimize_resources')
+    def optimize_resources(self, crisis_result, available_resources, location_coords=None):
+        """Optimize emergency resource allocation
+        
+        available_resources: list of units ({'id', 'type', 'lat', 'lon'}).
+        With the location's coordinates, the plan's needs are dispatched
+        from those units (see allocate_resources) and the plan gains
+        'assignments' and 'unmet_needs'; otherwise only the plan is returned.
+        """
+        plan = self._resource_plan(crisis_result)
+        if location_coords and isinstance(available_resources, list) and available_resources:
+            allocation = ResourceAllocator().allocate([{
+                'id': 'location',
+                'lat': location_coords['lat'],
+                'lon': location_coords['lon'],
+                'crisis_score': crisis_result['crisis_score'],
+                'risk_level': crisis_result['risk_level'],
+                'resources_needed': plan['resources_needed']
+            }], available_resources)
+            plan['assignments'] = allocation['assignments']
+            plan['unmet_needs'] = allocation['unmet_needs'].get('location', {})
+        return plan
+    
+    def _resource_plan(self, crisis_result):
+        """Deployment, urgency and needed resources for a crisis result's risk level"""
         crisis_score = crisis_result['crisis_score']
         risk_level = crisis_result['risk_level']
         
@@ -278,6 +339,28 @@ class CUDADataProcessor:
             'optimization_timestamp': datetime.now()
         }
     
+    def allocate_resources(self, incidents, available_resources):
+        """Allocate a shared pool of units across many concurrent incidents
+        
+        incidents: [{'id', 'lat', 'lon', 'crisis_result'}, ...]
+        available_resources: [{'id', 'type', 'lat', 'lon'}, ...]
+        Repeated calls re-solve only the unit types whose demand changed.
+        """
+        allocator_incidents = []
+        for incident in incidents:
+            crisis_result = incident['crisis_result']
+            plan = self._resource_plan(crisis_result)
+            allocator_incidents.append({
+                'id': incident['id'],
+                'lat': incident['lat'],
+                'lon': incident['lon'],
+                'crisis_score': crisis_result['crisis_score'],
+                'risk_level': crisis_result['risk_level'],
+                'resources_needed': plan['resources_needed']
+            })
+        
+        return self.resource_allocator.allocate(allocator_incidents, available_resources)
+    
     def _default_crisis_result(self):
         """Return default crisis result when processing fails"""
         return {
@@ -289,4 +372,22 @@ class CUDADataProcessor:
             'news_risk': 0.1,
             'gpu_accelerated': torch.cuda.is_available(),
             'timestamp': datetime.now()
-        }
\ No newline at end of file
+        }
+
+
+_default_processor = None
+_default_processor_lock = threading.Lock()
+
+
+def get_processor():
+    """Process-wide processor shared by every dashboard session
+
+    Scoring is stateless apart from the hot-reloaded rules, which are
+    already shared, so one instance serves any number of sessions.
+    """
+    global _default_processor
+    if _default_processor is None:
+        with _default_processor_lock:
+            if _default_processor is None:
+                _default_processor = CUDADataProcessor()
+    return _default_processor
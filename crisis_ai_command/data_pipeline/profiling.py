@@ -0,0 +1,343 @@
+import argparse
+import contextvars
+import functools
+import json
+import os
+import signal
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Latest samples per stage behind the rolling percentiles (the histograms cover all time)
+ROLLING_SAMPLES = int(os.getenv('RTACC_ROLLING_SAMPLES', 500))
+
+# Release tag written into every render log line, for comparing builds
+RELEASE = os.getenv('RTACC_RELEASE', 'dev')
+
+# Append one JSON line per dashboard render here when set
+RENDER_LOG_PATH = os.getenv('RTACC_RENDER_LOG')
+
+# Render trace that stages recorded on this thread/context are attributed to
+_current_render = contextvars.ContextVar('rtacc_render', default=None)
+
+
+def _nearest_rank(ordered, pct):
+    return ordered[min(len(ordered) - 1, max(0, int(round(len(ordered) * pct / 100.0)) - 1))]
+
+
+def rolling_summary(samples):
+    """Count and nearest-rank percentiles of a window of samples"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'p50': _nearest_rank(ordered, 50),
+        'p90': _nearest_rank(ordered, 90),
+        'p99': _nearest_rank(ordered, 99),
+        'max': ordered[-1]
+    }
+
+
+class LatencyHistogram:
+    """Log-linear (HDR-style) latency histogram over nanosecond samples.
+
+    Each power of two is split into SUB_BUCKETS linear buckets, giving a
+    fixed relative precision (~1/SUB_BUCKETS) from nanoseconds to minutes
+    with a small, constant-size counts array and an O(1) record().
+    """
+
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_EXPONENT = 40  # ~18 minutes in nanoseconds
+
+    def __init__(self):
+        self.counts = [0] * ((self.MAX_EXPONENT + 2) * self.SUB_BUCKETS)
+        self.total = 0
+        self.sum_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def _index(self, value_ns):
+        if value_ns < self.SUB_BUCKETS:
+            return value_ns
+        exponent = value_ns.bit_length() - self.SUB_BUCKET_BITS - 1
+        if exponent > self.MAX_EXPONENT:
+            return len(self.counts) - 1
+        sub_bucket = value_ns >> exponent  # in [SUB_BUCKETS, 2 * SUB_BUCKETS)
+        return (exponent + 1) * self.SUB_BUCKETS + sub_bucket - self.SUB_BUCKETS
+
+    def _bucket_upper_ns(self, index):
+        if index < self.SUB_BUCKETS:
+            return index
+        exponent, sub_bucket = divmod(index, self.SUB_BUCKETS)
+        exponent -= 1
+        return ((sub_bucket + self.SUB_BUCKETS + 1) << exponent) - 1
+
+    def record(self, value_ns):
+        value_ns = max(0, int(value_ns))
+        self.counts[self._index(value_ns)] += 1
+        self.total += 1
+        self.sum_ns += value_ns
+        if self.min_ns is None or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def percentile(self, pct):
+        """Upper bound (ns) of the bucket holding the pct-th percentile"""
+        if not self.total:
+            return 0
+        target = max(1, int(round(self.total * pct / 100.0)))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                # The last bucket also holds everything beyond the range; its bound would under-report
+                if index == len(self.counts) - 1:
+                    return self.max_ns
+                return min(self._bucket_upper_ns(index), self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        """Count, mean and percentile latencies in milliseconds"""
+        if not self.total:
+            return {'count': 0}
+        return {
+            'count': self.total,
+            'mean_ms': self.sum_ns / self.total / 1e6,
+            'min_ms': self.min_ns / 1e6,
+            'p50_ms': self.percentile(50) / 1e6,
+            'p90_ms': self.percentile(90) / 1e6,
+            'p99_ms': self.percentile(99) / 1e6,
+            'p999_ms': self.percentile(99.9) / 1e6,
+            'max_ms': self.max_ns / 1e6
+        }
+
+
+class StageProfiler:
+    """Per-stage latency histograms that can be switched on and off at runtime
+
+    Besides the all-time histograms, each stage keeps its last
+    ROLLING_SAMPLES samples (in ms) for rolling percentiles, and render()
+    groups the stages of one dashboard render into a trace that can be
+    logged and exported.
+    """
+
+    def __init__(self, enabled=False, log_path=RENDER_LOG_PATH):
+        self.enabled = enabled
+        self.histograms = {}
+        self.rolling = {}  # stage or metric -> deque of recent samples
+        self.renders = deque(maxlen=ROLLING_SAMPLES)
+        self.log_path = log_path
+        self._log_lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.histograms = {}
+        self.rolling = {}
+        self.renders.clear()
+
+    def _window(self, name):
+        window = self.rolling.get(name)
+        if window is None:
+            window = self.rolling.setdefault(name, deque(maxlen=ROLLING_SAMPLES))
+        return window
+
+    def record(self, stage, elapsed_ns):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        histogram.record(elapsed_ns)
+        elapsed_ms = elapsed_ns / 1e6
+        self._window(stage).append(elapsed_ms)
+        trace = _current_render.get()
+        if trace is not None:
+            trace['stages'][stage] = trace['stages'].get(stage, 0.0) + elapsed_ms
+
+    def observe(self, metric, value):
+        """Record a non-latency sample (e.g. serialized figure bytes) while enabled"""
+        if not self.enabled:
+            return
+        self._window(metric).append(value)
+        trace = _current_render.get()
+        if trace is not None:
+            trace['metrics'][metric] = trace['metrics'].get(metric, 0) + value
+
+    @contextmanager
+    def render(self, name, **tags):
+        """Time one dashboard render, collecting every stage recorded inside it into a trace"""
+        if not self.enabled:
+            yield None
+            return
+        trace = {'timestamp': time.time(), 'release': RELEASE, 'render': name, 'tags': tags,
+                 'stages': {}, 'metrics': {}}
+        token = _current_render.set(trace)
+        start = time.perf_counter_ns()
+        try:
+            yield trace
+        finally:
+            _current_render.reset(token)
+            elapsed_ns = time.perf_counter_ns() - start
+            trace['total_ms'] = elapsed_ns / 1e6
+            self.record(name, elapsed_ns)
+            self.renders.append(trace)
+            if self.log_path:
+                self._append_log(trace)
+
+    def _append_log(self, trace):
+        try:
+            with self._log_lock, open(self.log_path, 'a') as f:
+                f.write(json.dumps(trace, default=str) + '\n')
+        except OSError as e:
+            print(f"⚠️ Could not write render log {self.log_path}: {e}")
+
+    def rolling_snapshot(self):
+        """Rolling percentiles of every stage (ms) and metric over its recent samples"""
+        return {name: rolling_summary(list(window)) for name, window in sorted(self.rolling.items())}
+
+    def export_renders(self):
+        """Recent render traces as JSON lines, the format of the render log"""
+        return ''.join(json.dumps(trace, default=str) + '\n' for trace in list(self.renders))
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of code as one stage sample"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def snapshot(self):
+        """Summaries for every stage, keyed by stage name"""
+        return {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())}
+
+    def report(self):
+        """Print a latency table for every recorded stage"""
+        snapshot = self.snapshot()
+        print(f"⏱️ Stage latency report ({'enabled' if self.enabled else 'disabled'})")
+        if not snapshot:
+            print("   No samples recorded")
+        for stage, summary in snapshot.items():
+            print(f"   {stage:<40} n={summary['count']:<7} "
+                  f"p50={summary['p50_ms']:8.3f}ms p99={summary['p99_ms']:8.3f}ms "
+                  f"max={summary['max_ms']:8.3f}ms")
+        return snapshot
+
+    def dump(self, path):
+        """Write the current snapshot to `path` as JSON"""
+        snapshot = self.snapshot()
+        with open(path, 'w') as f:
+            json.dump({'timestamp': time.time(), 'stages': snapshot}, f, indent=2)
+        return snapshot
+
+    def install_signal_handler(self, signum=None, toggle_signum=None):
+        """Dump the report on `signum` (default SIGUSR1), optionally toggle on `toggle_signum`
+
+        Signal handlers can only be installed from the main thread; returns
+        False when that is not possible (e.g. inside a Streamlit script thread).
+        """
+        signum = signum or getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+        try:
+            signal.signal(signum, lambda *_: self.report())
+            if toggle_signum is not None:
+                signal.signal(toggle_signum, lambda *_: self.disable() if self.enabled else self.enable())
+        except ValueError:
+            return False
+        return True
+
+
+# Process-wide profiler; RTACC_PROFILE=1 switches it on at startup
+PROFILER = StageProfiler(enabled=os.getenv('RTACC_PROFILE') == '1')
+
+
+def profiled(stage=None):
+    """Decorator recording a function's latency under `stage` while PROFILER is enabled
+
+    When profiling is off the wrapper costs one attribute check.
+    """
+    def decorator(func):
+        name = stage or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorator
+
+
+def load_render_log(path):
+    """Render traces from a JSON-lines render log"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_render_logs(baseline, candidate):
+    """Per render and stage: p50/p90 of a baseline and a candidate log, and the p50 change
+
+    Both arguments are lists of render traces (see load_render_log). Render
+    totals appear as stage 'total'; metrics such as figure bytes are compared
+    the same way.
+    """
+    def samples(traces):
+        collected = {}
+        for trace in traces:
+            values = dict(trace.get('stages', {}), **trace.get('metrics', {}))
+            values['total'] = trace.get('total_ms')
+            for name, value in values.items():
+                if value is not None:
+                    collected.setdefault((trace['render'], name), []).append(value)
+        return collected
+
+    before, after = samples(baseline), samples(candidate)
+    rows = []
+    for key in sorted(set(before) | set(after)):
+        old, new = rolling_summary(before.get(key, [])), rolling_summary(after.get(key, []))
+        row = {'render': key[0], 'stage': key[1],
+               'baseline_p50': old.get('p50'), 'baseline_p90': old.get('p90'),
+               'candidate_p50': new.get('p50'), 'candidate_p90': new.get('p90')}
+        if old.get('p50') and new.get('p50') is not None:
+            row['p50_change_pct'] = (new['p50'] - old['p50']) / old['p50'] * 100
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two RTACC render logs (RTACC_RENDER_LOG)")
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help="only show p50 changes above this percent")
+    args = parser.parse_args()
+
+    rows = compare_render_logs(load_render_log(args.baseline), load_render_log(args.candidate))
+    print(f"{'render':<40} {'stage':<40} {'p50 before':>11} {'p50 after':>11} {'change':>8}")
+    for row in rows:
+        change = row.get('p50_change_pct')
+        if change is not None and abs(change) < args.threshold:
+            continue
+        before = f"{row['baseline_p50']:.2f}" if row['baseline_p50'] is not None else '-'
+        after = f"{row['candidate_p50']:.2f}" if row['candidate_p50'] is not None else '-'
+        print(f"{row['render']:<40} {row['stage']:<40} {before:>11} {after:>11} "
+              f"{'' if change is None else f'{change:+.1f}%':>8}")
+
+
+if __name__ == '__main__':
+    main()
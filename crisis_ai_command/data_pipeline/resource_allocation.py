@@ -0,0 +1,272 @@
+import json
+import os
+import time
+from datetime import datetime
+import numpy as np
+
+# Hungarian assignment when scipy is installed, greedy dispatch otherwise
+try:
+    from scipy.optimize import linear_sum_assignment
+    HUNGARIAN_AVAILABLE = True
+except ImportError:
+    HUNGARIAN_AVAILABLE = False
+
+# JSON list of response units ({'id', 'type', 'lat', 'lon'}); without one, a
+# default pool is stationed at the monitored location
+UNITS_FILE = os.getenv('RTACC_UNITS_FILE')
+
+DEFAULT_UNIT_COUNTS = {
+    'police': 4,
+    'ambulance': 3,
+    'fire_department': 2,
+    'emergency_management': 1
+}
+
+
+def unit_pool(location_coords, path=UNITS_FILE):
+    """Response units available to a location: from the units file, else the default pool at its centre"""
+    if path:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Units file error ({path}): {e}")
+    return [
+        {'id': f"{unit_type}-{n + 1}", 'type': unit_type,
+         'lat': location_coords['lat'], 'lon': location_coords['lon']}
+        for unit_type, count in DEFAULT_UNIT_COUNTS.items()
+        for n in range(count)
+    ]
+
+
+class ResourceAllocator:
+    """Assign a finite pool of response units across many concurrent incidents.
+
+    Each incident asks for unit types (from the processor's resource plan for
+    its risk level). Units of one type are matched to the open slots of that
+    type by minimizing travel_weight * travel_minutes - risk_weight * score,
+    so a unit is only sent where the risk it covers outweighs its travel cost.
+    Types are solved independently, which keeps every problem small, and
+    re-optimization only re-solves the types whose inputs changed.
+    """
+
+    # Average response speeds used to turn distance into travel time
+    UNIT_SPEEDS_KMH = {
+        'ambulance': 60,
+        'fire_department': 50,
+        'police': 70,
+        'emergency_management': 50
+    }
+    DEFAULT_SPEED_KMH = 50
+
+    # Plan entries that are served by a dispatchable unit type
+    NEED_ALIASES = {
+        'standby_medical': 'ambulance',
+        'patrol': 'police',
+        'routine_patrol': 'police'
+    }
+
+    # Units requested per need at each risk level
+    DEMAND_PER_NEED = {
+        'CRITICAL': 2,
+        'HIGH': 1,
+        'MEDIUM': 1,
+        'LOW': 1
+    }
+
+    def __init__(self, risk_weight=60.0, travel_weight=1.0, reassignment_penalty=5.0):
+        # risk_weight is the travel time (minutes) worth spending on a score of 1.0
+        self.risk_weight = risk_weight
+        self.travel_weight = travel_weight
+        # Discount for keeping a unit on its current incident, avoids churn between solves
+        self.reassignment_penalty = reassignment_penalty
+
+        self.incidents = {}
+        self.units = {}
+        self.assignments = {}      # unit_id -> (incident_id, unit_type, slot, travel_minutes)
+        self._signatures = {}      # unit_type -> inputs of the last solve
+        self._type_costs = {}      # unit_type -> objective of the last solve
+
+    def allocate(self, incidents, units):
+        """Solve the full allocation for a set of incidents and available units"""
+        previous_units = self.units
+        self.incidents = {incident['id']: dict(incident) for incident in incidents}
+        self.units = {}
+        for unit in units:
+            unit = dict(unit)
+            previous = previous_units.get(unit['id'], {}).get('current_assignment')
+            if previous is not None:
+                unit.setdefault('current_assignment', previous)
+            self.units[unit['id']] = unit
+        return self.reoptimize()
+
+    def update_scores(self, score_updates):
+        """Update incident scores/levels ({id: score} or {id: {...}}) and re-solve affected types"""
+        for incident_id, update in score_updates.items():
+            incident = self.incidents.get(incident_id)
+            if incident is None:
+                continue
+            if isinstance(update, dict):
+                incident.update(update)
+            else:
+                incident['crisis_score'] = float(update)
+        return self.reoptimize()
+
+    def update_incidents(self, incidents=None, removed=()):
+        """Add or replace incidents and drop resolved ones, then re-solve"""
+        for incident in incidents or []:
+            self.incidents[incident['id']] = dict(incident)
+        for incident_id in removed:
+            self.incidents.pop(incident_id, None)
+        return self.reoptimize()
+
+    def reoptimize(self):
+        """Re-solve only the unit types whose units or demand changed since the last solve"""
+        start = time.perf_counter()
+        slots_by_type = self._build_slots()
+        units_by_type = {}
+        for unit in self.units.values():
+            units_by_type.setdefault(unit['type'], []).append(unit)
+
+        solved_types = []
+        solver = 'hungarian' if HUNGARIAN_AVAILABLE else 'greedy'
+        for unit_type in set(units_by_type) | set(self._signatures):
+            type_units = units_by_type.get(unit_type, [])
+            type_slots = slots_by_type.get(unit_type, [])
+            signature = self._signature(type_units, type_slots)
+            if self._signatures.get(unit_type) == signature:
+                continue
+
+            self._solve_type(unit_type, type_units, type_slots)
+            self._signatures[unit_type] = signature
+            solved_types.append(unit_type)
+
+        result = self._result(slots_by_type)
+        result.update({
+            'solver': solver,
+            'solved_types': solved_types,
+            'solve_time_ms': (time.perf_counter() - start) * 1000,
+            'optimization_timestamp': datetime.now()
+        })
+        return result
+
+    def _build_slots(self):
+        """Expand incident needs into per-type demand slots (needs no unit serves, e.g. monitoring, are skipped)"""
+        slots_by_type = {}
+        for incident_id, incident in self.incidents.items():
+            demand = self.DEMAND_PER_NEED.get(incident.get('risk_level', 'LOW'), 1)
+            for need in incident.get('resources_needed', []):
+                unit_type = self.NEED_ALIASES.get(need, need)
+                if unit_type not in self.UNIT_SPEEDS_KMH:
+                    continue
+                for slot in range(demand):
+                    slots_by_type.setdefault(unit_type, []).append((incident_id, slot))
+        return slots_by_type
+
+    def _signature(self, type_units, type_slots):
+        units = tuple(sorted((u['id'], u['lat'], u['lon']) for u in type_units))
+        slots = tuple(
+            (incident_id, slot,
+             self.incidents[incident_id]['lat'],
+             self.incidents[incident_id]['lon'],
+             round(float(self.incidents[incident_id].get('crisis_score', 0)), 4))
+            for incident_id, slot in type_slots
+        )
+        return hash((units, slots))
+
+    def _travel_minutes(self, unit_type, type_units, type_slots):
+        """Travel time matrix (units x slots) from great-circle distance"""
+        unit_lat = np.radians([u['lat'] for u in type_units])[:, None]
+        unit_lon = np.radians([u['lon'] for u in type_units])[:, None]
+        slot_lat = np.radians([self.incidents[i]['lat'] for i, _ in type_slots])[None, :]
+        slot_lon = np.radians([self.incidents[i]['lon'] for i, _ in type_slots])[None, :]
+
+        a = (np.sin((slot_lat - unit_lat) / 2) ** 2 +
+             np.cos(unit_lat) * np.cos(slot_lat) * np.sin((slot_lon - unit_lon) / 2) ** 2)
+        distance_km = 2 * 6371.0 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+        speed = self.UNIT_SPEEDS_KMH.get(unit_type, self.DEFAULT_SPEED_KMH)
+        return distance_km / speed * 60.0
+
+    def _solve_type(self, unit_type, type_units, type_slots):
+        """Assign units of one type to its demand slots"""
+        for unit_id in [u for u, a in self.assignments.items() if a[1] == unit_type]:
+            del self.assignments[unit_id]
+        self._type_costs[unit_type] = 0.0
+
+        if not type_units or not type_slots:
+            return
+
+        travel = self._travel_minutes(unit_type, type_units, type_slots)
+        scores = np.array([float(self.incidents[i].get('crisis_score', 0)) for i, _ in type_slots])
+        cost = self.travel_weight * travel - self.risk_weight * scores[None, :]
+
+        # Keep units on their previous incident unless moving is clearly better
+        slot_index = {slot: k for k, slot in enumerate(type_slots)}
+        for row, unit in enumerate(type_units):
+            previous = unit.get('current_assignment')
+            if previous is not None and previous in slot_index:
+                cost[row, slot_index[previous]] -= self.reassignment_penalty
+
+        if HUNGARIAN_AVAILABLE:
+            # Dummy "stay idle" columns at zero cost let units skip unprofitable slots
+            padded = np.hstack([cost, np.zeros((len(type_units), len(type_units)))])
+            rows, cols = linear_sum_assignment(padded)
+            pairs = [(r, c) for r, c in zip(rows, cols) if c < len(type_slots) and cost[r, c] < 0]
+        else:
+            pairs = self._greedy_assign(cost)
+
+        for row, col in pairs:
+            unit = type_units[row]
+            incident_id, slot = type_slots[col]
+            self.assignments[unit['id']] = (incident_id, unit_type, slot, float(travel[row, col]))
+            unit['current_assignment'] = (incident_id, slot)
+            self._type_costs[unit_type] += float(cost[row, col])
+
+        assigned = {type_units[row]['id'] for row, _ in pairs}
+        for unit in type_units:
+            if unit['id'] not in assigned:
+                unit.pop('current_assignment', None)
+
+    def _greedy_assign(self, cost):
+        """Cheapest-pair-first assignment used when scipy is not installed"""
+        cost = cost.copy()
+        pairs = []
+        n_rows, n_cols = cost.shape
+        for _ in range(min(n_rows, n_cols)):
+            flat = int(np.argmin(cost))
+            row, col = divmod(flat, n_cols)
+            if cost[row, col] >= 0:
+                break
+            pairs.append((row, col))
+            cost[row, :] = np.inf
+            cost[:, col] = np.inf
+        return pairs
+
+    def _result(self, slots_by_type):
+        """Summarize the current assignment state"""
+        assignments = []
+        served = {}
+        for unit_id, (incident_id, unit_type, slot, travel_minutes) in self.assignments.items():
+            assignments.append({
+                'unit_id': unit_id,
+                'unit_type': unit_type,
+                'incident_id': incident_id,
+                'travel_minutes': travel_minutes
+            })
+            served[(incident_id, unit_type, slot)] = True
+
+        unmet_needs = {}
+        for unit_type, type_slots in slots_by_type.items():
+            for incident_id, slot in type_slots:
+                if (incident_id, unit_type, slot) not in served:
+                    needs = unmet_needs.setdefault(incident_id, {})
+                    needs[unit_type] = needs.get(unit_type, 0) + 1
+
+        return {
+            'assignments': assignments,
+            'unmet_needs': unmet_needs,
+            'objective': float(sum(self._type_costs.values())),
+            'incidents': len(self.incidents),
+            'units': len(self.units)
+        }
@@ -0,0 +1,274 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_RULES_PATH = os.getenv(
+    'RTACC_SCORING_RULES',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_rules.json')
+)
+
+# Plans compiled for ad-hoc overrides (backtests, per-processor settings) kept per rules version
+PLAN_CACHE_SIZE = int(os.getenv('RTACC_PLAN_CACHE_SIZE', 256))
+
+
+def merge_rules(base, overrides):
+    """Deep-merge rule overrides into a copy of `base` (lists are replaced, not merged)"""
+    merged = copy.deepcopy(base)
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_rules(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _band_arrays(bands):
+    """Lower bounds, multipliers and caps of an ordered band list"""
+    above = np.array([-np.inf if b.get('above') is None else b['above'] for b in bands], dtype=np.float64)
+    multipliers = np.array([b.get('multiplier', 1.0) for b in bands], dtype=np.float64)
+    caps = np.array([b.get('cap', np.inf) for b in bands], dtype=np.float64)
+    return above, multipliers, caps
+
+
+class ScoringPlan:
+    """Scoring rules compiled into array operations.
+
+    Every method accepts scalars or equally shaped arrays (one entry per
+    location), so the same plan scores a single location or a whole batch.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.windows = dict(rules['windows'])
+        self.sample_counts = dict(rules['sample_counts'])
+
+        self.weights = dict(rules['weights'])
+
+        thresholds = rules['thresholds']
+        if not isinstance(thresholds, dict):
+            thresholds = dict(thresholds)
+        ordered = sorted(thresholds.items(), key=lambda item: item[1], reverse=True)
+        self.level_names = [level for level, _ in ordered] + ['LOW']
+        self.level_cutoffs = np.array([cutoff for _, cutoff in ordered], dtype=np.float64)
+
+        weather = rules['weather']
+        self.weather_baseline = weather['baseline']
+        self.weather_bands = _band_arrays(weather['bands'])
+
+        traffic = rules['traffic']
+        self.traffic_baseline = traffic['baseline']
+        self.traffic_congestion_weight = traffic['congestion_weight']
+        self.traffic_incident_weight = traffic['incident_weight']
+        self.traffic_cap = traffic.get('cap', np.inf)
+
+        social = rules['social']
+        self.social_baseline = social['baseline']
+        self.social_sentiment_weight = social['sentiment_weight']
+        self.social_keyword_weight = social['keyword_weight']
+        self.social_damping = social.get('damping', 1.0)
+        self.social_cap = social.get('cap', np.inf)
+
+        news = rules['news']
+        self.news_baseline = news['baseline']
+        self.news_bands = _band_arrays(news['bands'])
+        self.news_band_on_max = np.array([b.get('on', 'max') == 'max' for b in news['bands']])
+        self.news_high_severity = news['high_severity']
+        self.news_boost_counts = np.array([b['min_count'] for b in news['boosts']], dtype=np.float64)
+        self.news_boost_multipliers = np.array([b['multiplier'] for b in news['boosts']], dtype=np.float64)
+        self.news_boost_caps = np.array([b.get('cap', np.inf) for b in news['boosts']], dtype=np.float64)
+
+    def _apply_bands(self, bands, values):
+        """First band whose lower bound `values` exceeds: min(cap, values * multiplier)"""
+        above, multipliers, caps = bands
+        conditions = [values > above[k] for k in range(len(above))]
+        choices = [np.minimum(caps[k], values * multipliers[k]) for k in range(len(above))]
+        return np.select(conditions, choices, default=0.0)
+
+    def weather_risk(self, count, latest_risk_score):
+        banded = self._apply_bands(self.weather_bands, np.asarray(latest_risk_score, dtype=np.float64))
+        return np.where(np.asarray(count) > 0, banded, self.weather_baseline)
+
+    def traffic_risk(self, count, avg_congestion, incident_rate):
+        total = (np.asarray(avg_congestion, dtype=np.float64) * self.traffic_congestion_weight +
+                 np.asarray(incident_rate, dtype=np.float64) * self.traffic_incident_weight)
+        return np.where(np.asarray(count) > 0, np.minimum(self.traffic_cap, total), self.traffic_baseline)
+
+    def social_risk(self, count, avg_sentiment, crisis_rate):
+        sentiment_risk = np.maximum(0, -np.asarray(avg_sentiment, dtype=np.float64)) * self.social_sentiment_weight
+        keyword_risk = np.asarray(crisis_rate, dtype=np.float64) * self.social_keyword_weight
+        total = (sentiment_risk + keyword_risk) * self.social_damping
+        return np.where(np.asarray(count) > 0, np.minimum(self.social_cap, total), self.social_baseline)
+
+    def news_risk(self, count, max_severity, avg_severity, high_severity_count):
+        max_severity = np.asarray(max_severity, dtype=np.float64)
+        avg_severity = np.asarray(avg_severity, dtype=np.float64)
+
+        # Bands are selected on the max severity and scale either the max or the mean
+        above, multipliers, caps = self.news_bands
+        conditions = [max_severity > above[k] for k in range(len(above))]
+        choices = [
+            np.minimum(caps[k], (max_severity if self.news_band_on_max[k] else avg_severity) * multipliers[k])
+            for k in range(len(above))
+        ]
+        base = np.select(conditions, choices, default=0.0)
+
+        # Boost when several high-severity articles agree
+        high_count = np.asarray(high_severity_count, dtype=np.float64)
+        boost_conditions = [high_count >= c for c in self.news_boost_counts]
+        boost_choices = [np.minimum(cap, base * m)
+                         for m, cap in zip(self.news_boost_multipliers, self.news_boost_caps)]
+        boosted = np.select(boost_conditions, boost_choices, default=base)
+        return np.where(np.asarray(count) > 0, boosted, self.news_baseline)
+
+    def crisis_score(self, weather_risk, traffic_risk, social_risk, news_risk):
+        w = self.weights
+        return (np.asarray(weather_risk) * w['weather'] +
+                np.asarray(traffic_risk) * w['traffic'] +
+                np.asarray(social_risk) * w['social'] +
+                np.asarray(news_risk) * w['news'])
+
+    def level_index(self, crisis_score):
+        """Index into level_names for each score (thresholds are inclusive)"""
+        score = np.asarray(crisis_score, dtype=np.float64)
+        index = np.full(score.shape, len(self.level_cutoffs), dtype=np.int64)
+        for k in range(len(self.level_cutoffs) - 1, -1, -1):
+            index[score >= self.level_cutoffs[k]] = k
+        return index
+
+    def risk_level(self, crisis_score):
+        return self.level_names[int(self.level_index(crisis_score))]
+
+    def evaluate(self, features):
+        """Score a batch of locations from per-location feature arrays"""
+        weather = self.weather_risk(features['weather_count'], features['weather_latest'])
+        traffic = self.traffic_risk(features['traffic_count'], features['traffic_congestion'],
+                                    features['traffic_incident_rate'])
+        social = self.social_risk(features['social_count'], features['social_sentiment'],
+                                  features['social_crisis_rate'])
+        news = self.news_risk(features['news_count'], features['news_max'], features['news_mean'],
+                              features['news_high_count'])
+        score = self.crisis_score(weather, traffic, social, news)
+        return {
+            'weather_risk': weather,
+            'traffic_risk': traffic,
+            'social_risk': social,
+            'news_risk': news,
+            'crisis_score': score,
+            'level_index': self.level_index(score)
+        }
+
+
+class ScoringRules:
+    """Scoring rules loaded from a JSON file and hot-reloaded when it changes.
+
+    The file is re-checked at most every `reload_interval` seconds from the
+    scoring path itself, so no watcher thread is needed. Compiled plans are
+    swapped in atomically; a broken edit is reported and the previous rules
+    stay in effect. Plans for rule overrides are compiled on first use and
+    kept in an LRU of `plan_cache_size` entries.
+    """
+
+    def __init__(self, path=DEFAULT_RULES_PATH, reload_interval=2.0, plan_cache_size=PLAN_CACHE_SIZE):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.plan_cache_size = plan_cache_size
+        self.version = 0
+        self._rules = None
+        self._plans = {}
+        self._override_plans = OrderedDict()
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.reload(force=True)
+
+    def reload(self, force=False):
+        """Reload and recompile the rules if the file changed; returns True on a swap"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if self._rules is None:
+                raise
+            print(f"⚠️ Scoring rules unavailable ({e}), keeping version {self.version}")
+            return False
+
+        if not force and mtime == self._mtime:
+            return False
+
+        try:
+            with open(self.path) as f:
+                rules = json.load(f)
+            # Compile every region up front so a bad edit never reaches scoring
+            plans = {(None, None): ScoringPlan(rules)}
+            for region, overrides in rules.get('regions', {}).items():
+                plans[(region, None)] = ScoringPlan(merge_rules(rules, overrides))
+        except Exception as e:
+            if self._rules is None:
+                raise
+            print(f"⚠️ Invalid scoring rules in {self.path}: {e}, keeping version {self.version}")
+            self._mtime = mtime
+            return False
+
+        self._rules, self._plans, self._override_plans = rules, plans, OrderedDict()
+        self._mtime = mtime
+        self.version += 1
+        if self.version > 1:
+            print(f"🔁 Scoring rules reloaded (version {self.version})")
+        return True
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        # Only one thread checks the file; the others keep scoring with the current plans
+        if self._lock.acquire(blocking=False):
+            try:
+                self._last_check = now
+                self.reload()
+            finally:
+                self._lock.release()
+
+    def plan(self, region=None, overrides=None):
+        """Compiled plan for a region (falls back to the global rules) plus optional overrides"""
+        self._maybe_reload()
+        rules, plans, cache = self._rules, self._plans, self._override_plans
+        if region not in rules.get('regions', {}):
+            region = None
+        if not overrides:
+            return plans[(region, None)]
+
+        key = (region, json.dumps(overrides, sort_keys=True, default=str))
+        with self._lock:
+            plan = cache.get(key)
+            if plan is not None:
+                cache.move_to_end(key)
+                return plan
+
+        # Compile outside the lock; a racing thread compiling the same key just wins or loses the insert
+        merged = rules
+        if region is not None:
+            merged = merge_rules(merged, rules['regions'][region])
+        plan = ScoringPlan(merge_rules(merged, overrides))
+        with self._lock:
+            cache[key] = plan
+            cache.move_to_end(key)
+            while len(cache) > self.plan_cache_size:
+                cache.popitem(last=False)
+        return plan
+
+
+_default_rules = None
+_default_rules_lock = threading.Lock()
+
+
+def get_scoring_rules():
+    """Process-wide rules instance shared by every processor"""
+    global _default_rules
+    if _default_rules is None:
+        with _default_rules_lock:
+            if _default_rules is None:
+                _default_rules = ScoringRules()
+    return _default_rules
@@ -0,0 +1,535 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import requests
+
+from data_pipeline.collector_registry import get_collector_registry
+from data_pipeline.data_sources import incident_position
+from data_pipeline.event_stream import EventBroker, delta_events
+from data_pipeline.fleet import FleetMonitor
+from data_pipeline.hex_grid import HexCongestionGrid
+from data_pipeline.point_clusters import PointClusterIndex, WORLD_BOUNDS
+from data_pipeline.processors import get_processor
+from data_pipeline.serialization import pack, pack_records, unpack, unpack_records
+
+SERVICE_HOST = os.getenv('RTACC_SERVICE_HOST', '127.0.0.1')
+SERVICE_PORT = int(os.getenv('RTACC_SERVICE_PORT', 8765))
+EVENTS_PORT = int(os.getenv('RTACC_EVENTS_PORT', SERVICE_PORT + 1))
+FRAME_CONTENT_TYPE = 'application/x-rtacc-frame'
+
+# Scored results kept per location for /history
+HISTORY_LENGTH = 720
+
+# On-demand locations nobody has queried for this long stop being watched
+IDLE_LOCATION_SECONDS = 600
+
+# Every location is rescored at least this often, new data or not, as records age out of the risk windows
+RESCORE_SECONDS = int(os.getenv('RTACC_RESCORE_SECONDS', 30))
+
+
+def _overlay_payload(overlays):
+    """Serializable part of get_climate_overlays(): grids and summaries, no pyramid objects"""
+    payload = {'timestamp': overlays.get('timestamp'), 'radar_layers': overlays.get('radar_layers', {})}
+    for name in ('flood_zones', 'wildfire_zones'):
+        if name in overlays:
+            payload[name] = {k: v for k, v in overlays[name].items() if k != 'pyramid'}
+    if 'hazard_view' in overlays:
+        payload['hazard_view'] = overlays['hazard_view']
+    return payload
+
+
+class ScoringService:
+    """Headless collection and scoring loop with precomputed query responses.
+
+    Every `interval` seconds the service scores each watched location whose
+    collector has new records and re-encodes its "status" and "history"
+    responses as binary frames (data_pipeline.serialization). Readers only
+    ever get the last published bytes, so UI traffic never waits on
+    collection or scoring. Overlays and incident clusters are encoded on
+    first request per zoom and reused until the location's weather or
+    traffic changes; each pass folds only new traffic records into the
+    location's incident index and congestion grid, and republishes the
+    grid's cells.
+
+    A pass with no new data is only a version comparison per location, so
+    the interval can be short. Risks are scored over time windows, so each
+    location is also rescored once every RESCORE_SECONDS and a quiet feed's
+    score decays instead of staying frozen. With a broker, each pass also
+    pushes delta events (see data_pipeline.event_stream) to subscribers.
+    """
+
+    def __init__(self, locations=(), interval=1.0, registry=None, processor=None, climate_collector=None,
+                 broker=None):
+        self.interval = interval
+        self.broker = broker
+        self.registry = registry or get_collector_registry()
+        self.processor = processor or get_processor()
+        self.climate_collector = climate_collector
+        self.pinned = set(locations)
+        self._leases = {}
+        self._versions = {}
+        self._history = {}
+        self._results = {}  # location -> last crisis result
+        self._seen = {}     # location -> {source: records already announced}
+        self._last_query = {}
+        self._responses = {}  # (kind, location) -> (etag, bytes); replaced wholesale on publish
+        self._overlays = {}   # (location, zoom) -> (weather version, etag, bytes)
+        self._overlay_locks = {}  # (location, zoom) -> lock held while that overlay is simulated
+        self._incidents = {}  # location -> PointClusterIndex over the collector's whole traffic series
+        self._congestion = {}  # location -> HexCongestionGrid over the collector's whole traffic series
+        self._traffic_versions = {}  # location -> traffic series version last folded in
+        self._clusters = {}   # (location, zoom) -> (traffic version, etag, bytes)
+        # Fleet overview rows, fed from each pass's batch results rather than scored again
+        self.fleet = FleetMonitor(registry=self.registry, processor=self.processor, climate_collector=climate_collector)
+        self._fleet_version = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        for location in locations:
+            self.watch(location)
+
+    def watch(self, location):
+        """Start collecting for a location (idempotent)"""
+        with self._lock:
+            self._last_query[location] = time.monotonic()
+            if location in self._leases:
+                return
+        # Acquiring may build a collector (slow geocoding), so not under the lock
+        lease = self.registry.acquire(location)
+        with self._lock:
+            if location not in self._leases:
+                self._leases[location] = lease
+                return
+        lease.release()
+
+    def _unwatch_idle(self, now):
+        with self._lock:
+            idle = [location for location in self._leases
+                    if location not in self.pinned and now - self._last_query.get(location, now) > IDLE_LOCATION_SECONDS]
+            for location in idle:
+                self._leases.pop(location).release()
+                self._versions.pop(location, None)
+                self._results.pop(location, None)
+                self._seen.pop(location, None)
+                for key in [key for key in self._overlays if key[0] == location]:
+                    del self._overlays[key]
+                for key in [key for key in self._overlay_locks if key[0] == location]:
+                    del self._overlay_locks[key]
+                self._incidents.pop(location, None)
+                self._congestion.pop(location, None)
+                self._traffic_versions.pop(location, None)
+                for key in [key for key in self._clusters if key[0] == location]:
+                    del self._clusters[key]
+        return idle
+
+    def tick(self, now=None):
+        """Score every location with new data, or due a rescore, and publish its responses"""
+        now = time.time() if now is None else now
+        bucket = int(now // RESCORE_SECONDS)
+        self._unwatch_idle(time.monotonic())
+        with self._lock:
+            leases = dict(self._leases)
+
+        changed = []
+        for location, lease in leases.items():
+            collector = lease.renew()
+            version = collector.data_version()
+            if self._versions.get(location) != (version, bucket):
+                changed.append((location, collector, version))
+        if not changed:
+            self._publish_fleet([], [], leases)
+            return 0
+
+        # One vectorized scoring pass over every changed location
+        results = self.processor.process_crisis_detection_batch(
+            [collector.get_series() for _, collector, _ in changed],
+            now=now,
+            regions=[location for location, _, _ in changed]
+        )
+
+        responses = dict(self._responses)
+        for (location, collector, version), crisis_result in zip(changed, results):
+            history = self._history.setdefault(location, [])
+            history.append({
+                'timestamp': crisis_result['timestamp'],
+                'crisis_score': crisis_result['crisis_score'],
+                'risk_level': crisis_result['risk_level'],
+                'weather_risk': crisis_result['weather_risk'],
+                'traffic_risk': crisis_result['traffic_risk'],
+                'social_risk': crisis_result['social_risk'],
+                'news_risk': crisis_result['news_risk']
+            })
+            del history[:-HISTORY_LENGTH]
+
+            status = {
+                'location': location,
+                'version': list(version),
+                'coordinates': collector.location_coords,
+                'crisis_result': crisis_result,
+                'latest': collector.get_latest_data()
+            }
+            responses[('status', location)] = self._encode(pack(status))
+            responses[('history', location)] = self._encode(pack_records(history))
+            self._index_traffic(location, collector, responses)
+            self._versions[location] = (version, bucket)
+        self._responses = responses
+        self._publish_fleet(changed, results, leases)
+        
+        # Pushed after publishing, so a subscriber refetching /status sees the new data
+        if self.broker is not None:
+            for (location, collector, _), crisis_result in zip(changed, results):
+                for event, data in delta_events(location, self._results.get(location), crisis_result,
+                                                self._new_records(location, collector)):
+                    self.broker.publish(location, event, data)
+        for (location, _, _), crisis_result in zip(changed, results):
+            self._results[location] = crisis_result
+        return len(changed)
+
+    def _publish_fleet(self, changed, results, monitored):
+        snapshot = self.fleet.ingest(changed, results, monitored)
+        if snapshot['version'] != self._fleet_version:
+            self._fleet_version = snapshot['version']
+            responses = dict(self._responses)
+            responses[('fleet', None)] = self._encode(pack(snapshot))
+            self._responses = responses
+
+    def _index_traffic(self, location, collector, responses):
+        """Fold traffic records appended since the last pass into the location's incident index and congestion grid"""
+        traffic = collector.traffic_data
+        # Read first, so records appended while syncing are picked up next pass
+        version = traffic.version
+        if self._traffic_versions.get(location) == version:
+            return
+        self._incidents.setdefault(location, PointClusterIndex()).sync(traffic, incident_position)
+        grid = self._congestion.setdefault(location, HexCongestionGrid())
+        responses[('congestion', location)] = self._encode(pack(grid.sync(traffic).cells()))
+        self._traffic_versions[location] = version
+
+    def _new_records(self, location, collector):
+        """Records per source ingested since the previous pass for this location"""
+        seen = self._seen.setdefault(location, {})
+        new_records = {}
+        for source, series in collector.get_series().items():
+            count = len(series)
+            start = seen.get(source, count)
+            # A cleared series (location change, snapshot import) starts over
+            new_records[source] = list(series[start:count]) if start <= count else list(series[:count])
+            seen[source] = count
+        return new_records
+
+    @staticmethod
+    def _encode(body):
+        return hashlib.blake2b(body, digest_size=12).hexdigest(), body
+
+    def response(self, kind, location, zoom=None):
+        """(etag, frame) for a query, or None while the location has no scored data yet"""
+        if kind == 'fleet':
+            return self._responses.get(('fleet', None))
+        with self._lock:
+            self._last_query[location] = time.monotonic()
+            watched = location in self._leases
+        if not watched:
+            self.watch(location)
+            return None
+        if kind == 'clusters':
+            return self._cluster_response(location, zoom)
+        if kind != 'overlays':
+            return self._responses.get((kind, location))
+        return self._overlay_response(location, zoom)
+
+    def _cluster_response(self, location, zoom):
+        """Every incident cluster at a zoom over the location's whole traffic series
+
+        Encoded once per traffic version; readers keep the clusters inside
+        their own view.
+        """
+        index = self._incidents.get(location)
+        if index is None:
+            return None
+        version = self._traffic_versions.get(location)
+        key = (location, zoom)
+        cached = self._clusters.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1:]
+        etag, body = self._encode(pack(index.clusters(WORLD_BOUNDS, zoom)))
+        with self._lock:
+            if location in self._leases:
+                self._clusters[key] = (version, etag, body)
+        return etag, body
+
+    def _overlay_response(self, location, zoom):
+        """Overlay frame for the location's latest weather, simulated once per weather version
+        
+        Concurrent requests for the same overlay wait on one simulation
+        instead of each running their own.
+        """
+        with self._lock:
+            # The location may have been unwatched since response() checked it
+            lease = self._leases.get(location)
+            if self.climate_collector is None:
+                from data_pipeline.climate_sources import ClimateDataCollector
+                self.climate_collector = ClimateDataCollector()
+        if lease is None:
+            return None
+
+        collector = lease.collector
+        weather = collector.weather_data[-1] if collector.weather_data else None
+        if weather is None:
+            return None
+        weather_version = collector.weather_data.version
+
+        key = (location, zoom)
+        cached = self._overlays.get(key)
+        if cached is not None and cached[0] == weather_version:
+            return cached[1:]
+        with self._lock:
+            key_lock = self._overlay_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            cached = self._overlays.get(key)
+            if cached is not None and cached[0] == weather_version:
+                return cached[1:]
+            coords = collector.location_coords
+            overlays = self.climate_collector.get_climate_overlays((coords['lat'], coords['lon']), weather, zoom=zoom)
+            etag, body = self._encode(pack(_overlay_payload(overlays)))
+            with self._lock:
+                if location in self._leases:
+                    self._overlays[key] = (weather_version, etag, body)
+        return etag, body
+
+    def locations(self):
+        with self._lock:
+            return sorted(self._leases)
+
+    def run(self):
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️ Scoring service error: {e}")
+            self._stopped.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            leases, self._leases = self._leases, {}
+        for lease in leases.values():
+            lease.release()
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """GET /status, /history, /overlays, /clusters and /congestion?location=...[&zoom=...], plus /fleet and /health"""
+
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        kind = url.path.strip('/')
+
+        if kind == 'health':
+            health = {'locations': self.service.locations()}
+            if self.service.broker is not None:
+                health['events'] = self.service.broker.stats()
+            return self._send_json(200, health)
+        if kind not in ('status', 'history', 'overlays', 'clusters', 'congestion', 'fleet'):
+            return self._send_json(404, {'error': f"Unknown endpoint {url.path}"})
+        if 'location' not in params and kind != 'fleet':
+            return self._send_json(400, {'error': "Missing location parameter"})
+        if 'zoom' not in params and kind == 'clusters':
+            return self._send_json(400, {'error': "Missing zoom parameter"})
+
+        location = params['location'][0] if 'location' in params else None
+        zoom = int(params['zoom'][0]) if 'zoom' in params else None
+        response = self.service.response(kind, location, zoom)
+        if response is None:
+            # Accepted: the location (or, for /fleet, the first one) is being watched and will have data shortly
+            return self._send_json(202, {'location': location, 'status': 'collecting'})
+
+        etag, body = response
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', FRAME_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(service, host=SERVICE_HOST, port=SERVICE_PORT):
+    """HTTP server answering from the service's published responses (call serve_forever())"""
+    handler = type('BoundServiceRequestHandler', (ServiceRequestHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+class ServiceClient:
+    """Reader for a ScoringService; revalidates with ETags so unchanged responses cost a 304"""
+
+    def __init__(self, base_url=None, timeout=5.0):
+        self.base_url = (base_url or os.getenv('RTACC_SERVICE_URL') or f"http://{SERVICE_HOST}:{SERVICE_PORT}").rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._cache = {}  # (kind, location, zoom) -> (etag, decoded)
+
+    def _get(self, kind, location, zoom=None, decode=unpack):
+        key = (kind, location, zoom)
+        params = {}
+        if location is not None:
+            params['location'] = location
+        if zoom is not None:
+            params['zoom'] = zoom
+        headers = {}
+        if key in self._cache:
+            headers['If-None-Match'] = self._cache[key][0]
+
+        response = self.session.get(f"{self.base_url}/{kind}", params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return self._cache[key][1]
+        if response.status_code == 202:
+            return None
+        response.raise_for_status()
+        value = decode(response.content)
+        self._cache[key] = (response.headers.get('ETag'), value)
+        return value
+
+    def status(self, location):
+        """Latest crisis_result, raw data and coordinates, or None while collection starts"""
+        return self._get('status', location)
+
+    def history(self, location):
+        """Scored results over time as a list of records"""
+        return self._get('history', location, decode=unpack_records)
+
+    def overlays(self, location, zoom=None):
+        return self._get('overlays', location, zoom)
+
+    def clusters(self, location, zoom):
+        """Incident clusters at a zoom over the location's whole traffic history"""
+        return self._get('clusters', location, int(zoom))
+
+    def congestion(self, location):
+        """Hexagon congestion cells (see HexCongestionGrid.cells) over the whole traffic history"""
+        return self._get('congestion', location)
+
+    def fleet(self):
+        """Fleet overview snapshot (see FleetMonitor), or None before the first scoring pass"""
+        return self._get('fleet', None)
+
+    def events(self, location=None, events_url=None):
+        """Yield (event, data) from the service's event stream as they are pushed"""
+        if events_url is None:
+            parsed = urlparse(self.base_url)
+            events_url = f"{parsed.scheme}://{parsed.hostname}:{EVENTS_PORT}"
+        params = {'location': location} if location else {}
+        with self.session.get(f"{events_url}/events", params=params, stream=True, timeout=(self.timeout, None)) as response:
+            response.raise_for_status()
+            event, data = 'message', []
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if line:
+                    field, _, value = line.partition(':')
+                    if field == 'event':
+                        event = value.strip()
+                    elif field == 'data':
+                        data.append(value.strip())
+                    continue
+                if data:
+                    yield event, json.loads('\n'.join(data))
+                event, data = 'message', []
+
+
+class RemoteCollector:
+    """Stands in for a RealTimeDataCollector by reading a location's status from the service"""
+
+    EMPTY = {'weather': [], 'traffic': [], 'news': [], 'social': []}
+
+    def __init__(self, client, location):
+        self.client = client
+        self.current_location = location
+        self._status = None
+        # Never fed here: only outlines the cells the service publishes
+        self.congestion_grid = HexCongestionGrid()
+
+    def refresh(self):
+        status = self.client.status(self.current_location)
+        if status is not None:
+            self._status = status
+        return self._status
+
+    def data_version(self):
+        status = self.refresh()
+        return tuple(status['version']) if status else None
+
+    @property
+    def location_coords(self):
+        return self._status['coordinates'] if self._status else {}
+
+    def get_latest_data(self):
+        return self._status['latest'] if self._status else dict(self.EMPTY)
+
+    def crisis_result(self):
+        """Crisis result scored by the service, or None before its first pass"""
+        return self._status['crisis_result'] if self._status else None
+
+    def incident_clusters(self, bounds, zoom):
+        """The service's incident clusters for a view (clustered there over the whole traffic series)"""
+        west, south, east, north = bounds
+        return [c for c in self.client.clusters(self.current_location, zoom) or []
+                if west <= c['lon'] <= east and south <= c['lat'] <= north]
+
+    def congestion_cells(self):
+        """The service's hexagon congestion cells, accumulated there over the whole traffic series"""
+        return self.client.congestion(self.current_location) or self.congestion_grid.cells()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RTACC headless scoring service")
+    parser.add_argument('locations', nargs='*', default=["Washington, DC, USA"])
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--events-port', type=int, default=EVENTS_PORT, help="Server-Sent Events port")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between scoring passes")
+    args = parser.parse_args()
+
+    broker = EventBroker().start()
+    broker.serve(args.host, args.events_port)
+    service = ScoringService(args.locations, interval=args.interval, broker=broker).start()
+    server = serve(service, args.host, args.port)
+    print(f"🛰️ Scoring service on http://{args.host}:{args.port} for {', '.join(args.locations)}")
+    print(f"📡 Live events on http://{args.host}:{args.events_port}/events?location=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        broker.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+import json
+import struct
+from datetime import datetime
+import numpy as np
+
+# Frame layout:
+#   MAGIC (8 bytes) | version (uint16) | reserved (uint16) | header length (uint32)
+#   | JSON header | padding | buffers, each starting on an ALIGNMENT boundary
+# Buffer offsets in the header are relative to the first buffer, so a frame
+# can be read straight out of bytes, a memoryview or an mmap with np.frombuffer.
+MAGIC = b'RTACCBIN'
+VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct('<8sHHI')
+
+
+def _align(size):
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _frame(header, buffers):
+    """Assemble a frame from a header dict and a list of contiguous arrays"""
+    specs = []
+    offset = 0
+    for array in buffers:
+        specs.append({'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset = _align(offset + array.nbytes)
+    header = dict(header, version=VERSION, buffers=specs)
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    data_start = _align(_PREFIX.size + len(header_bytes))
+    out = bytearray(data_start + offset)
+    _PREFIX.pack_into(out, 0, MAGIC, VERSION, 0, len(header_bytes))
+    out[_PREFIX.size:_PREFIX.size + len(header_bytes)] = header_bytes
+    for spec, array in zip(specs, buffers):
+        start = data_start + spec['offset']
+        out[start:start + array.nbytes] = array.tobytes()
+    return bytes(out)
+
+
+def _read_frame(buffer):
+    """Header dict and zero-copy array views of a frame"""
+    view = memoryview(buffer)
+    magic, version, _, header_length = _PREFIX.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an RTACC binary frame")
+    if version > VERSION:
+        raise ValueError(f"Unsupported RTACC binary version {version}")
+
+    header = json.loads(bytes(view[_PREFIX.size:_PREFIX.size + header_length]).decode('utf-8'))
+    data_start = _align(_PREFIX.size + header_length)
+    arrays = []
+    for spec in header['buffers']:
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        array = np.frombuffer(view, dtype=dtype, count=count, offset=data_start + spec['offset'])
+        arrays.append(array.reshape(spec['shape']))
+    return header, arrays
+
+
+def _encode(value, buffers):
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Object arrays cannot be serialized")
+        buffers.append(np.ascontiguousarray(value))
+        return {'__array__': len(buffers) - 1}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise TypeError("Only string dict keys can be serialized")
+        return {key: _encode(item, buffers) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(item, buffers) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item, buffers) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(value, arrays):
+    if isinstance(value, dict):
+        if '__array__' in value:
+            return arrays[value['__array__']]
+        if '__datetime__' in value:
+            return datetime.fromisoformat(value['__datetime__'])
+        if '__tuple__' in value:
+            return tuple(_decode(item, arrays) for item in value['__tuple__'])
+        return {key: _decode(item, arrays) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item, arrays) for item in value]
+    return value
+
+
+def pack(value):
+    """Serialize nested dicts/lists of numpy arrays, scalars, strings and datetimes"""
+    buffers = []
+    tree = _encode(value, buffers)
+    return _frame({'kind': 'tree', 'tree': tree}, buffers)
+
+
+def unpack(buffer):
+    """Inverse of pack(); arrays are read-only views into `buffer` (no copy)"""
+    header, arrays = _read_frame(buffer)
+    if header['kind'] != 'tree':
+        raise ValueError(f"Expected a tree frame, got {header['kind']!r}")
+    return _decode(header['tree'], arrays)
+
+
+def _column(values):
+    """Column spec and buffers for one record field"""
+    present = [v for v in values if v is not None]
+    missing = len(present) != len(values)
+
+    if present and all(isinstance(v, datetime) for v in present):
+        data = np.array([v.timestamp() if v is not None else np.nan for v in values], dtype=np.float64)
+        return {'type': 'datetime'}, [data]
+    if present and all(isinstance(v, (bool, np.bool_)) for v in present) and not missing:
+        return {'type': 'bool'}, [np.array(values, dtype=np.bool_)]
+    if all(isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool) for v in present):
+        if not missing and all(isinstance(v, (int, np.integer)) for v in present):
+            return {'type': 'number'}, [np.array(values, dtype=np.int64)]
+        data = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return {'type': 'number'}, [data]
+
+    # Strings (and anything else, as JSON) go in one UTF-8 buffer with Arrow-style offsets
+    kind = 'string' if all(isinstance(v, str) for v in present) else 'json'
+    encoded = [b'' if v is None else (v if kind == 'string' else json.dumps(v, default=str)).encode('utf-8')
+               for v in values]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    buffers = [np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets]
+    if missing:
+        buffers.append(np.array([v is not None for v in values], dtype=np.bool_))
+    return {'type': kind}, buffers
+
+
+def pack_records(records, fields=None):
+    """Serialize a batch of flat record dicts column by column
+
+    Numbers, booleans and datetimes become typed arrays (None -> NaN);
+    strings and nested values share a UTF-8 buffer with offsets.
+    """
+    records = list(records)
+    if fields is None:
+        fields = []
+        for record in records:
+            for key in record:
+                if key not in fields:
+                    fields.append(key)
+
+    buffers = []
+    columns = []
+    for name in fields:
+        spec, column_buffers = _column([record.get(name) for record in records])
+        spec.update(name=name, buffers=list(range(len(buffers), len(buffers) + len(column_buffers))))
+        columns.append(spec)
+        buffers.extend(column_buffers)
+    return _frame({'kind': 'records', 'count': len(records), 'columns': columns}, buffers)
+
+
+def unpack_columns(buffer):
+    """Columns of a record batch; numeric and datetime columns are zero-copy arrays"""
+    header, arrays = _read_frame(buffer)
+    if header['kind'] != 'records':
+        raise ValueError(f"Expected a records frame, got {header['kind']!r}")
+
+    columns = {}
+    for spec in header['columns']:
+        column_arrays = [arrays[i] for i in spec['buffers']]
+        if spec['type'] in ('number', 'bool', 'datetime'):
+            columns[spec['name']] = column_arrays[0]
+            continue
+        data, offsets = column_arrays[0], column_arrays[1]
+        valid = column_arrays[2] if len(column_arrays) > 2 else None
+        raw = data.tobytes()
+        values = []
+        for i in range(len(offsets) - 1):
+            if valid is not None and not valid[i]:
+                values.append(None)
+                continue
+            text = raw[offsets[i]:offsets[i + 1]].decode('utf-8')
+            values.append(text if spec['type'] == 'string' else json.loads(text))
+        columns[spec['name']] = values
+    return header, columns
+
+
+def unpack_records(buffer):
+    """Inverse of pack_records(): a list of record dicts"""
+    header, columns = unpack_columns(buffer)
+    types = {spec['name']: spec['type'] for spec in header['columns']}
+
+    records = [{} for _ in range(header['count'])]
+    for name, column in columns.items():
+        kind = types[name]
+        values = column.tolist() if isinstance(column, np.ndarray) else column
+        for record, value in zip(records, values):
+            if kind == 'datetime':
+                value = None if value != value else datetime.fromtimestamp(value)
+            elif kind == 'number' and isinstance(value, float) and value != value:
+                value = None
+            record[name] = value
+    return records
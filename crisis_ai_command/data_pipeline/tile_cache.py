@@ -0,0 +1,243 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+TILE_CACHE_DIR = os.getenv(
+    'RTACC_TILE_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'rtacc', 'tiles')
+)
+
+# OpenWeatherMap weather map 2.0 layers
+OPENWEATHER_LAYERS = {
+    'precipitation': 'PR0',
+    'temperature': 'TA2',
+    'wind': 'WND',
+    'pressure': 'APM'
+}
+OPENWEATHER_TILE_URL = "http://maps.openweathermap.org/maps/2.0/weather/{op}/{z}/{x}/{y}?appid={appid}"
+
+# How long a cached tile stays fresh, per layer (radar moves faster than pressure)
+DEFAULT_TTL_SECONDS = {
+    'precipitation': 600,
+    'wind': 900,
+    'temperature': 1800,
+    'pressure': 1800
+}
+
+MAX_LATITUDE = 85.0511287798  # Web Mercator limit
+
+
+def lat_lon_to_tile(lat, lon, zoom):
+    """Slippy-map (z, x, y) of the tile containing a point"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    n = 1 << zoom
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return zoom, min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_bounds(z, x, y):
+    """Lat/lon edges of a slippy-map tile"""
+    n = 1 << z
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return {
+        'north': latitude(y),
+        'south': latitude(y + 1),
+        'west': x / n * 360.0 - 180.0,
+        'east': (x + 1) / n * 360.0 - 180.0
+    }
+
+
+def neighbour_tiles(z, x, y, radius=1, zoom_delta=1):
+    """Tiles around (z, x, y): the same-zoom ring plus parents and children within zoom_delta"""
+    n = 1 << z
+    tiles = []
+    for dy in range(-radius, radius + 1):
+        for dx in range(-radius, radius + 1):
+            if (dx or dy) and 0 <= y + dy < n:
+                tiles.append((z, (x + dx) % n, y + dy))  # x wraps around the antimeridian
+    for delta in range(1, zoom_delta + 1):
+        if z - delta >= 0:
+            tiles.append((z - delta, x >> delta, y >> delta))
+        span = 1 << delta
+        for cy in range(span):
+            for cx in range(span):
+                tiles.append((z + delta, x * span + cx, y * span + cy))
+    return tiles
+
+
+class TileCache:
+    """Size-bounded on-disk LRU cache of map tiles with a per-layer TTL.
+
+    Tiles live under root/<layer>/<z>/<x>/<y>.png. An in-memory index keeps
+    recency order and sizes, so lookups never touch the disk; at startup it
+    is rebuilt from the files (oldest first). Stale tiles are still served
+    when a refresh fails. Background prefetching keeps the tiles around the
+    current view (and one zoom level up and down) warm, so map renders read
+    from local storage instead of waiting on the tile server.
+    """
+
+    def __init__(self, root=TILE_CACHE_DIR, max_bytes=256 * 1024 * 1024, ttl=None,
+                 url_template=OPENWEATHER_TILE_URL, layers=OPENWEATHER_LAYERS,
+                 api_key=None, prefetch_workers=4, timeout=10, retry_after=60):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = dict(DEFAULT_TTL_SECONDS, **(ttl or {}))
+        self.url_template = url_template
+        self.layers = dict(layers)
+        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._index = OrderedDict()  # key -> (path, size, fetched_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._failed = {}
+        self._executor = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='tile-prefetch')
+        self._load_index()
+
+    def _path(self, key):
+        layer, z, x, y = key
+        return os.path.join(self.root, layer, str(z), str(x), f"{y}.png")
+
+    def _load_index(self):
+        """Rebuild the index from tiles already on disk, least recently fetched first"""
+        entries = []
+        if os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if not filename.endswith('.png'):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    parts = os.path.relpath(path, self.root).split(os.sep)
+                    if len(parts) != 4:
+                        continue
+                    try:
+                        key = (parts[0], int(parts[1]), int(parts[2]), int(parts[3][:-4]))
+                        stat = os.stat(path)
+                    except (ValueError, OSError):
+                        continue
+                    entries.append((stat.st_mtime, key, path, stat.st_size))
+
+        for fetched_at, key, path, size in sorted(entries):
+            self._index[key] = (path, size, fetched_at)
+            self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._index:
+            _, (path, size, _) = self._index.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def url(self, layer, z, x, y):
+        return self.url_template.format(op=self.layers[layer], z=z, x=x, y=y, appid=self.api_key or '')
+
+    def is_fresh(self, layer, z, x, y):
+        entry = self._index.get((layer, z, x, y))
+        return entry is not None and time.time() - entry[2] < self.ttl.get(layer, 600)
+
+    def get_cached(self, layer, z, x, y):
+        """Local path of a cached tile (fresh or stale), or None; never touches the network"""
+        key = (layer, z, x, y)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            self._index.move_to_end(key)
+            return entry[0]
+
+    def fetch(self, layer, z, x, y):
+        """Download a tile into the cache; returns its path or None on failure"""
+        key = (layer, z, x, y)
+        if not self.api_key or time.time() - self._failed.get(key, 0) < self.retry_after:
+            return None
+
+        try:
+            response = requests.get(self.url(layer, z, x, y), timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self._failed[key] = time.time()
+            print(f"⚠️ Tile fetch failed for {layer} {z}/{x}/{y}: {e}")
+            return None
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial tile
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(response.content)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._index[key] = (path, len(response.content), time.time())
+            self._bytes += len(response.content)
+            self._failed.pop(key, None)
+            self._evict()
+        return path
+
+    def get(self, layer, z, x, y):
+        """Fresh tile path, fetching synchronously if needed (falls back to a stale copy)"""
+        if self.is_fresh(layer, z, x, y):
+            return self.get_cached(layer, z, x, y)
+        return self.fetch(layer, z, x, y) or self.get_cached(layer, z, x, y)
+
+    def _fetch_in_background(self, key):
+        try:
+            self.fetch(*key)
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+    def prefetch(self, layer, z, x, y, radius=1, zoom_delta=1):
+        """Refresh (z, x, y) and its neighbourhood in the background; returns the number queued"""
+        if not self.api_key:
+            return 0
+        queued = 0
+        for tile in [(z, x, y)] + neighbour_tiles(z, x, y, radius, zoom_delta):
+            key = (layer,) + tile
+            if self.is_fresh(*key):
+                continue
+            with self._lock:
+                if key in self._in_flight:
+                    continue
+                self._in_flight.add(key)
+            self._executor.submit(self._fetch_in_background, key)
+            queued += 1
+        return queued
+
+    def stats(self):
+        return {
+            'tiles': len(self._index),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'in_flight': len(self._in_flight)
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tile_cache():
+    """Process-wide tile cache shared by every collector and map"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = TileCache()
+    return _default_cache
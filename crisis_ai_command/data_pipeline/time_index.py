@@ -0,0 +1,152 @@
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+class TimeIndexedList(list):
+    """List of timestamped records with a sorted timestamp index for window queries.
+
+    Behaves like the plain lists the collectors used before (append, slicing,
+    len, iteration), but keeps a parallel list of epoch seconds so that
+    "last N minutes" queries are a binary search plus a slice of the window
+    rather than a scan or a copy of the whole history.
+    """
+
+    def __init__(self, records=(), time_key='timestamp'):
+        super().__init__()
+        self.time_key = time_key
+        self._times = []
+        # Bumped on every change so readers can tell whether anything is new
+        self.version = 0
+        self.extend(records)
+
+    def _record_time(self, record):
+        """Epoch seconds for a record, kept monotonic so the index stays sorted"""
+        value = record.get(self.time_key) if isinstance(record, dict) else None
+        if isinstance(value, datetime):
+            ts = value.timestamp()
+        elif isinstance(value, (int, float)):
+            ts = float(value)
+        else:
+            ts = time.time()
+
+        # Collectors append in arrival order; clamp rare clock jitter instead
+        # of re-sorting so positions in the index always match the list
+        if self._times and ts < self._times[-1]:
+            ts = self._times[-1]
+        return ts
+
+    def append(self, record):
+        ts = self._record_time(record)
+        # Append the record before its timestamp so concurrent readers never
+        # see an index entry without a matching record
+        super().append(record)
+        self._times.append(ts)
+        self.version += 1
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def __iadd__(self, records):
+        self.extend(records)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._times.clear()
+        self.version += 1
+
+    def _reindex(self):
+        """Rebuild the timestamp index from the records after an out-of-order change"""
+        self._times = []
+        for record in self:
+            self._times.append(self._record_time(record))
+        self.version += 1
+
+    # Removals drop the matching index entries, which keeps it sorted; anything
+    # that can put a record out of order (assignment, insert, sort) re-indexes
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        del self._times[index]
+        self.version += 1
+
+    def pop(self, index=-1):
+        record = super().pop(index)
+        self._times.pop(index)
+        self.version += 1
+        return record
+
+    def remove(self, record):
+        self.pop(self.index(record))
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def insert(self, index, record):
+        super().insert(index, record)
+        self._reindex()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._reindex()
+
+    def reverse(self):
+        super().reverse()
+        self._reindex()
+
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._reindex()
+        return self
+
+    def _to_epoch(self, value):
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return float(value)
+
+    def index_range(self, start=None, end=None):
+        """Positions [lo, hi) of records with start <= timestamp <= end"""
+        times = self._times
+        hi_limit = len(times)
+        start = self._to_epoch(start)
+        end = self._to_epoch(end)
+
+        lo = bisect_left(times, start, 0, hi_limit) if start is not None else 0
+        hi = bisect_right(times, end, 0, hi_limit) if end is not None else hi_limit
+        return lo, max(lo, hi)
+
+    def window(self, start=None, end=None):
+        """Records whose timestamp falls within [start, end]"""
+        lo, hi = self.index_range(start, end)
+        return list.__getitem__(self, slice(lo, hi))
+
+    def since(self, duration, now=None):
+        """Records from the last `duration` (timedelta or seconds)"""
+        if isinstance(duration, timedelta):
+            duration = duration.total_seconds()
+        now = self._to_epoch(now) if now is not None else time.time()
+        return self.window(now - duration, None)
+
+    def count_since(self, duration, now=None):
+        """Number of records in the last `duration` without materializing them"""
+        if isinstance(duration, timedelta):
+            duration = duration.total_seconds()
+        now = self._to_epoch(now) if now is not None else time.time()
+        lo, hi = self.index_range(now - duration, None)
+        return hi - lo
+
+    def epoch_times(self, lo=0, hi=None):
+        """Index timestamps (epoch seconds) of records [lo, hi) as an array"""
+        return np.array(self._times[lo:hi], dtype=np.float64)
+
+    def latest_time(self):
+        """Timestamp of the newest record, or None when empty"""
+        if not self._times:
+            return None
+        return datetime.fromtimestamp(self._times[-1])
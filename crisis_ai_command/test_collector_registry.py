@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.collector_registry import CollectorRegistry
+from data_pipeline.processors import get_processor
+import threading
+import time
+
+
+class FakeCollector:
+    """Records starts and stops instead of polling APIs"""
+    created = []
+
+    def __init__(self, location):
+        self.location = location
+        self.running = False
+        self.starts = 0
+        FakeCollector.created.append(self)
+
+    def start_collection(self):
+        self.running = True
+        self.starts += 1
+
+    def stop(self):
+        self.running = False
+
+
+def registry(**options):
+    FakeCollector.created = []
+    return CollectorRegistry(factory=FakeCollector, reap_interval=3600, **options)
+
+
+def test_sessions_share_one_collector():
+    print("\n🧪 Testing sessions on one location share a collector")
+    shared = registry()
+    leases = [shared.acquire("Paris") for _ in range(5)]
+    tokyo = shared.acquire("Tokyo")
+
+    assert len({id(lease.collector) for lease in leases}) == 1
+    assert leases[0].collector.starts == 1 and leases[0].collector.running
+    assert tokyo.collector is not leases[0].collector
+    assert shared.stats() == {'Paris': {'sessions': 5, 'running': True}, 'Tokyo': {'sessions': 1, 'running': True}}
+    assert set(shared.collectors()) == {'Paris', 'Tokyo'}
+    shared.shutdown()
+    assert not any(c.running for c in FakeCollector.created)
+    print("   ✅ Five sessions, one started collector; shutdown stops them all")
+
+
+def test_release_and_linger():
+    print("\n🧪 Testing collectors linger after the last session leaves")
+    shared = registry(linger=60)
+    first, second = shared.acquire("Paris"), shared.acquire("Paris")
+    collector = first.collector
+    first.release()
+    first.release()  # releasing twice is harmless
+    assert shared.reap(time.monotonic() + 120) == 0 and collector.running  # one session still watching
+    second.release()
+
+    now = time.monotonic()
+    assert shared.reap(now + 30) == 0 and collector.running
+    again = shared.acquire("Paris")
+    assert again.collector is collector  # coming back within the linger reuses it
+    again.release()
+    assert shared.reap(time.monotonic() + 61) == 1 and not collector.running
+    assert shared.collectors() == {}
+    print("   ✅ Idle collectors survive the linger window and stop after it")
+
+
+def test_expired_leases_are_reaped():
+    print("\n🧪 Testing abandoned sessions expire")
+    shared = registry(lease_ttl=10, linger=0)
+    lease = shared.acquire("Paris")
+    collector = lease.collector
+    assert shared.reap(time.monotonic() + 5) == 0
+    assert shared.reap(time.monotonic() + 11) == 1 and not collector.running
+
+    renewed = lease.renew()
+    assert renewed is not collector and renewed.running
+    assert shared.stats()['Paris']['sessions'] == 1
+    print("   ✅ A tab that stops renewing is dropped; renewing afterwards starts a fresh collector")
+
+
+def test_concurrent_acquire_starts_once():
+    print("\n🧪 Testing concurrent first acquires")
+    shared = registry()
+    barrier = threading.Barrier(8)
+    leases = []
+
+    def watch():
+        barrier.wait()
+        leases.append(shared.acquire("Paris"))
+
+    threads = [threading.Thread(target=watch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(lease.collector) for lease in leases}) == 1
+    assert sum(c.starts for c in FakeCollector.created) == 1
+    assert shared.stats()['Paris']['sessions'] == 8
+    print("   ✅ Racing sessions end up on the one collector that was started")
+
+
+def test_processor_is_shared():
+    print("\n🧪 Testing the process-wide processor")
+    assert get_processor() is get_processor()
+    print("   ✅ Every session scores with the same processor")
+
+
+if __name__ == "__main__":
+    test_sessions_share_one_collector()
+    test_release_and_linger()
+    test_expired_leases_are_reaped()
+    test_concurrent_acquire_starts_once()
+    test_processor_is_shared()
+    print("\n✅ Collector registry tests complete!")
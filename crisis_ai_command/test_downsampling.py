@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.downsampling import downsample, lttb, minmax, target_points, MINMAX_RATIO
+import numpy as np
+
+
+def noisy_series(n, seed=6):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.float64) * 60.0
+    y = np.sin(np.arange(n) / 500.0) + rng.normal(0, 0.05, n)
+    return x, y
+
+
+def test_lttb_keeps_endpoints_and_length():
+    print("\n🧪 Testing LTTB selection")
+    x, y = noisy_series(10000)
+    for n_out in (3, 50, 1200):
+        keep = lttb(x, y, n_out)
+        assert len(keep) == n_out
+        assert keep[0] == 0 and keep[-1] == len(x) - 1
+        assert (np.diff(keep) > 0).all()
+
+    spike = np.zeros(1000)
+    spike[437] = 5.0
+    assert 437 in lttb(np.arange(1000), spike, 20)
+    assert np.array_equal(lttb(x[:10], y[:10], 50), np.arange(10))
+    print("   ✅ n_out points in order, first and last kept, a lone spike survives")
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    print("\n🧪 Testing min/max buckets")
+    x, y = noisy_series(20000)
+    keep = minmax(x, y, 100)
+    assert keep[0] == 0 and keep[-1] == len(x) - 1 and len(keep) <= 2 * 100 + 2
+    bucket = np.minimum(((x - x[0]) / (x[-1] - x[0]) * 100).astype(np.int64), 99)
+    for b in range(100):
+        inside = bucket == b
+        assert y[inside].min() in y[keep] and y[inside].max() in y[keep]
+    assert np.array_equal(minmax(x[:50], y[:50], 100), np.arange(50))
+    print(f"   ✅ {len(keep)} points hold the low and high of all 100 buckets")
+
+
+def test_downsample():
+    print("\n🧪 Testing the downsample entry point")
+    assert target_points(600) == 1200
+
+    x, y = noisy_series(MINMAX_RATIO * 500 * 5)
+    y[1234] = 9.0
+    y[5678] = -9.0
+    y[::97] = np.nan
+    keep = downsample(x, y, 500)
+    assert len(keep) == 500 and np.isfinite(y[keep]).all()
+    assert {1234, 5678} <= set(keep.tolist())
+    finite = np.flatnonzero(np.isfinite(y))
+    assert keep[0] == finite[0] and keep[-1] == finite[-1]
+
+    short_y = np.array([1.0, np.nan, 3.0, 4.0])
+    assert downsample(np.arange(4), short_y, 10).tolist() == [0, 2, 3]
+    mid_x, mid_y = noisy_series(MINMAX_RATIO * 500 - 1)
+    assert len(downsample(mid_x, mid_y, 500)) == 500  # LTTB alone below the min/max threshold
+    print("   ✅ NaNs dropped, spikes and endpoints kept, at most n_out points")
+
+
+if __name__ == "__main__":
+    test_lttb_keeps_endpoints_and_length()
+    test_minmax_keeps_every_bucket_extreme()
+    test_downsample()
+    print("\n✅ Downsampling tests complete!")
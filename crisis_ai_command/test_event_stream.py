@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.event_stream import EventBroker, delta_events, CLIENT_QUEUE_SIZE, ALL_LOCATIONS
+from data_pipeline.scoring_service import ServiceClient
+from datetime import datetime
+import json
+import threading
+import time
+
+
+def result(score, level):
+    return {'crisis_score': score, 'risk_level': level, 'timestamp': datetime(2024, 5, 1, 12, 0)}
+
+
+def kinds(events):
+    return [event for event, _ in events]
+
+
+def test_delta_events():
+    print("\n🧪 Testing delta events between scoring passes")
+    first = delta_events('Paris', None, result(0.4, 'MEDIUM'), {'news': [{}, {}], 'weather': []})
+    assert kinds(first) == ['data', 'score', 'level']
+    assert first[0][1]['new_records'] == {'news': 2}
+    assert 'delta' not in first[1][1] and first[2][1]['previous'] is None
+
+    same = delta_events('Paris', result(0.4, 'MEDIUM'), result(0.4, 'MEDIUM'), {'social': [{}]})
+    assert kinds(same) == ['data']
+
+    rising = delta_events('Paris', result(0.4, 'MEDIUM'), result(0.8, 'CRITICAL'))
+    assert kinds(rising) == ['score', 'level']
+    assert abs(rising[0][1]['delta'] - 0.4) < 1e-12 and rising[1][1]['previous'] == 'MEDIUM'
+    print("   ✅ Score events only when the score moves, level events only on a level change")
+
+
+def test_incident_keeps_its_own_location():
+    print("\n🧪 Testing incident events")
+    incident = {'incident_detected': True, 'location': 'I-95 exit 12', 'lat': 38.9, 'lon': -77.0}
+    events = delta_events('Washington', result(0.4, 'MEDIUM'), result(0.4, 'MEDIUM'),
+                          {'traffic': [incident, {'incident_detected': False}]})
+    assert kinds(events) == ['data', 'incident']
+    assert events[1][1] == {'location': 'Washington', 'incident': incident}
+    print("   ✅ The record rides under 'incident' with its road location intact")
+
+
+def test_slow_subscriber_resyncs():
+    print("\n🧪 Testing a lagging subscriber gets one resync event")
+    broker = EventBroker()
+    slow = broker.subscribe('Paris')
+    everywhere = broker.subscribe(ALL_LOCATIONS)
+    for i in range(CLIENT_QUEUE_SIZE + 5):
+        broker._fanout('Paris', 'score', {'crisis_score': i})
+    broker._fanout('Tokyo', 'score', {'crisis_score': 1})
+
+    assert slow.queue.qsize() == 5  # the resync marker plus the events after it
+    first = slow.queue.get_nowait().decode()
+    assert 'event: resync' in first and broker.dropped == 2 * CLIENT_QUEUE_SIZE
+    assert everywhere.queue.qsize() == 6
+
+    replayed = broker.subscribe('Tokyo', last_event_id=CLIENT_QUEUE_SIZE)
+    assert replayed.queue.qsize() == 1 and b'event: score' in replayed.queue.get_nowait()
+    broker.unsubscribe(slow)
+    broker.unsubscribe(everywhere)
+    broker.unsubscribe(replayed)
+    assert broker.stats()['subscribers'] == 0
+    print("   ✅ The backlog is swapped for a resync; reconnecting clients replay what they missed")
+
+
+def test_server_sent_events_end_to_end():
+    print("\n🧪 Testing events over HTTP")
+    broker = EventBroker().start()
+    server = broker.serve('127.0.0.1', 0)
+    events_url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    location = "Lot 7%25 East"  # a literal percent sign must not be decoded twice
+    received = []
+
+    def listen():
+        for event, data in ServiceClient('http://127.0.0.1:1').events(location, events_url=events_url):
+            received.append((event, data))
+            if len(received) == 2:
+                return
+
+    listener = threading.Thread(target=listen, daemon=True)
+    listener.start()
+    deadline = time.time() + 10
+    while broker.stats()['subscribers'] == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert broker._subscribers.keys() == {location}
+
+    broker.publish('Paris', 'score', {'crisis_score': 0.9})
+    for event, data in delta_events(location, None, result(0.3, 'LOW')):
+        broker.publish(location, event, data)
+    listener.join(10)
+    broker.stop()
+
+    assert [event for event, _ in received] == ['score', 'level']
+    assert received[0][1]['location'] == location and received[0][1]['timestamp'] == '2024-05-01T12:00:00'
+    assert json.dumps(received[1][1])
+    print("   ✅ Subscribers get their own location's events as they are published")
+
+
+if __name__ == "__main__":
+    test_delta_events()
+    test_incident_keeps_its_own_location()
+    test_slow_subscriber_resyncs()
+    test_server_sent_events_end_to_end()
+    print("\n✅ Event stream tests complete!")
@@ -0,0 +1,105 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.fire_spread import FireSpreadModel
+from data_pipeline.climate_sources import ClimateDataCollector
+import numpy as np
+
+SIZE = 61
+CELL_M = 20.0
+STEPS, STEP_MINUTES = 12, 10
+CENTRE = SIZE // 2
+
+
+def spread(wind_speed, wind_direction, **kwargs):
+    return FireSpreadModel().simulate((SIZE, SIZE), CELL_M, STEPS, STEP_MINUTES,
+                                      wind_speed, wind_direction, 30.0, 20.0, **kwargs)
+
+
+def burned(arrival):
+    return np.isfinite(arrival)
+
+
+def test_fire_follows_the_wind():
+    print("\n🧪 Testing fire spread follows the wind")
+    # Wind from the west (270°) drives the fire east, towards higher columns
+    arrival = spread(30.0, 270.0)
+    east = burned(arrival)[:, CENTRE + 1:].sum()
+    west = burned(arrival)[:, :CENTRE].sum()
+    print(f"   Westerly wind: {east} cells burned east of the ignition, {west} west")
+    assert east > 3 * west
+    assert arrival[CENTRE, CENTRE + 5] < arrival[CENTRE, CENTRE - 5]
+
+    # Wind from the south drives it north, towards higher rows
+    arrival = spread(30.0, 180.0)
+    assert burned(arrival)[CENTRE + 1:].sum() > 3 * burned(arrival)[:CENTRE].sum()
+    assert arrival[CENTRE + 5, CENTRE] < arrival[CENTRE - 5, CENTRE]
+    print("   ✅ The head fire runs downwind, the back fire barely moves")
+
+
+def test_calm_spread_is_symmetric():
+    print("\n🧪 Testing calm conditions burn symmetrically")
+    arrival = spread(0.0, 0.0)
+    assert np.array_equal(arrival, arrival[::-1, :]) and np.array_equal(arrival, arrival[:, ::-1])
+    assert np.array_equal(arrival, arrival.T)
+    print("   ✅ With no wind the burned area mirrors in every direction")
+
+
+def test_horizon_and_fronts():
+    print("\n🧪 Testing the horizon and the animation fronts")
+    arrival = spread(20.0, 270.0)
+    finite = arrival[np.isfinite(arrival)]
+    assert arrival[CENTRE, CENTRE] == 0.0
+    assert finite.max() <= STEPS * STEP_MINUTES
+
+    times, fronts = FireSpreadModel.fronts(arrival, STEP_MINUTES, STEPS)
+    assert len(fronts) == STEPS and times[-1] == STEPS * STEP_MINUTES
+    sizes = [front.sum() for front in fronts]
+    assert sizes == sorted(sizes) and sizes[-1] == burned(arrival).sum()
+    print(f"   ✅ Fronts grow monotonically to {sizes[-1]} cells within the horizon")
+
+
+def test_firebreak_stops_spread():
+    print("\n🧪 Testing a fuel-free firebreak")
+    fuel = np.ones((SIZE, SIZE), dtype=np.float32)
+    fuel[:, CENTRE + 3] = 0.0
+    arrival = spread(30.0, 270.0, fuel=fuel)
+    assert not burned(arrival)[:, CENTRE + 3:].any()
+    print("   ✅ Nothing burns past a column without fuel")
+
+
+def test_batch_matches_single():
+    print("\n🧪 Testing batched spread against one grid at a time")
+    model = FireSpreadModel()
+    winds = np.array([5.0, 25.0, 40.0])
+    directions = np.array([0.0, 90.0, 225.0])
+    batch = model.simulate((3, SIZE, SIZE), CELL_M, STEPS, STEP_MINUTES,
+                           winds[:, None, None], directions[:, None, None], 30.0, 20.0)
+    for k in range(3):
+        single = model.simulate((SIZE, SIZE), CELL_M, STEPS, STEP_MINUTES, winds[k], directions[k], 30.0, 20.0)
+        assert np.array_equal(batch[k], single)
+    print("   ✅ Each grid in the batch equals its own simulation")
+
+
+def test_collector_wildfire_zones():
+    print("\n🧪 Testing the collector's wildfire overlay")
+    collector = ClimateDataCollector(fire_resolution=41)
+    calm = collector.simulate_wildfire_spread((34.05, -118.24), {'temperature': 20, 'wind_speed': 1, 'humidity': 60})
+    assert calm is None
+    zones = collector.simulate_wildfire_spread(
+        (34.05, -118.24), {'temperature': 38, 'wind_speed': 15, 'wind_direction': 270, 'humidity': 10})
+    assert zones['fire_risk'].shape == (41, 41)
+    assert zones['fire_risk'][20, 20] == zones['fire_risk'].max() > 0
+    assert zones['burned_area_km2'] > 0
+    print(f"   ✅ Hot, dry, windy weather burns {zones['burned_area_km2']:.2f} km², calm weather none")
+
+
+if __name__ == "__main__":
+    test_fire_follows_the_wind()
+    test_calm_spread_is_symmetric()
+    test_horizon_and_fronts()
+    test_firebreak_stops_spread()
+    test_batch_matches_single()
+    test_collector_wildfire_zones()
+    print("\n✅ Fire spread tests complete!")
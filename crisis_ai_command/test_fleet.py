@@ -0,0 +1,163 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.collector_registry import CollectorRegistry
+from data_pipeline.fleet import FleetMonitor, TREND_PASSES
+from data_pipeline.hazard_stack import HAZARD_LAYERS
+from data_pipeline.processors import get_processor
+from data_pipeline.time_index import TimeIndexedList
+from datetime import datetime
+
+COORDINATES = {'Paris': (48.8566, 2.3522), 'Tokyo': (35.6762, 139.6503), 'Sydney': (-33.8688, 151.2093)}
+
+
+class FakeCollector:
+    """A collector fed by the test instead of by API polling"""
+
+    def __init__(self, location):
+        self.current_location = location
+        lat, lon = COORDINATES[location]
+        self.location_coords = {'lat': lat, 'lon': lon}
+        self.weather_data = TimeIndexedList()
+        self.traffic_data = TimeIndexedList()
+        self.news_data = TimeIndexedList()
+        self.social_data = TimeIndexedList()
+
+    def start_collection(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_series(self):
+        return {'weather': self.weather_data, 'traffic': self.traffic_data,
+                'news': self.news_data, 'social': self.social_data}
+
+    def data_version(self):
+        return tuple(series.version for series in self.get_series().values())
+
+    def feed(self, risk=0.5, severity=0.6, weather=True):
+        now = datetime.now()
+        if weather:
+            self.weather_data.append({'timestamp': now, 'risk_score': risk, 'temperature': 21.0, 'precipitation': 0.0})
+        self.news_data.append({'timestamp': now, 'severity': severity, 'title': "Storm warning"})
+
+
+class CountingProcessor:
+    """The real processor, recording which locations each batch scored"""
+
+    def __init__(self):
+        self.processor = get_processor()
+        self.batches = []
+
+    def process_crisis_detection_batch(self, data_list, now=None, regions=None):
+        self.batches.append(list(regions))
+        return self.processor.process_crisis_detection_batch(data_list, now=now, regions=regions)
+
+
+class FakeClimate:
+    """Hazard summaries proportional to the weather risk score"""
+
+    def __init__(self):
+        self.batches = []
+
+    def simulate_hazards_batch(self, coordinates_list, weather_list, resolution=None):
+        self.batches.append(len(coordinates_list))
+        return [{'flood_max_risk': w['risk_score'] * 2.0, 'fire_max_risk': w['risk_score'] * 20.0}
+                for w in weather_list]
+
+
+def make_fleet(locations=('Paris', 'Tokyo')):
+    registry = CollectorRegistry(factory=FakeCollector, linger=0.0, reap_interval=3600)
+    leases = {location: registry.acquire(location) for location in locations}
+    fleet = FleetMonitor(registry=registry, processor=CountingProcessor(), climate_collector=FakeClimate())
+    return fleet, registry, leases
+
+
+def test_only_changed_locations_are_rescored():
+    print("\n🧪 Testing refresh scores only locations with new data")
+    fleet, registry, leases = make_fleet()
+    for lease in leases.values():
+        lease.collector.feed()
+    first = fleet.refresh()
+    assert sorted(fleet.processor.batches[0]) == ['Paris', 'Tokyo'] and first['version'] == 1
+    assert {row['location'] for row in first['rows']} == {'Paris', 'Tokyo'}
+
+    assert fleet.refresh() is first and len(fleet.processor.batches) == 1
+
+    leases['Tokyo'].collector.feed(risk=0.9, severity=0.95)
+    second = fleet.refresh()
+    assert fleet.processor.batches[-1] == ['Tokyo'] and second['version'] == 2
+    rows = {row['location']: row for row in second['rows']}
+    assert rows['Tokyo']['scores'] == [rows['Tokyo']['scores'][0], rows['Tokyo']['crisis_score']]
+    assert rows['Paris'] == {row['location']: row for row in first['rows']}['Paris']
+    assert [row['crisis_score'] for row in second['rows']] == sorted((r['crisis_score'] for r in second['rows']), reverse=True)
+    registry.shutdown()
+    print("   ✅ Unchanged locations cost a version check; the snapshot only moves on a change")
+
+
+def test_trend_window():
+    print("\n🧪 Testing the per-location score trend")
+    fleet, registry, leases = make_fleet(('Paris',))
+    collector = leases['Paris'].collector
+    for i in range(TREND_PASSES + 5):
+        collector.feed(risk=0.2, severity=0.2 + 0.02 * i)
+        snapshot = fleet.refresh()
+    row = snapshot['rows'][0]
+    assert len(row['scores']) == TREND_PASSES
+    assert row['trend'] == row['scores'][-1] - row['scores'][0] and row['trend'] >= 0
+    assert row['records'] == 2 * (TREND_PASSES + 5)
+    registry.shutdown()
+    print(f"   ✅ The last {TREND_PASSES} scores are kept for the sparkline")
+
+
+def test_hazards_follow_the_weather():
+    print("\n🧪 Testing hazard summaries are batched and reused")
+    fleet, registry, leases = make_fleet()
+    leases['Paris'].collector.feed(risk=0.25)
+    leases['Tokyo'].collector.feed(risk=0.8)
+    rows = {row['location']: row for row in fleet.refresh()['rows']}
+    assert fleet.climate_collector.batches == [2]
+    assert rows['Paris']['flood_risk'] == 0.25 * 2.0 / HAZARD_LAYERS['flood'][2] == 0.5
+    assert rows['Tokyo']['flood_risk'] == 1.0  # clipped
+    assert rows['Tokyo']['fire_risk'] == 0.8 * 20.0 / HAZARD_LAYERS['wildfire'][2]
+
+    leases['Paris'].collector.feed(weather=False)  # news only: the weather summary still holds
+    rows = {row['location']: row for row in fleet.refresh()['rows']}
+    assert fleet.climate_collector.batches == [2] and rows['Paris']['flood_risk'] == 0.5
+    registry.shutdown()
+    print("   ✅ One simulation batch per pass, only for locations whose weather changed")
+
+
+def test_removed_locations_are_dropped():
+    print("\n🧪 Testing locations nobody watches leave the table")
+    fleet, registry, leases = make_fleet(('Paris', 'Tokyo', 'Sydney'))
+    for lease in leases.values():
+        lease.collector.feed()
+    assert len(fleet.refresh()['rows']) == 3
+
+    leases['Sydney'].release()
+    registry.reap()
+    snapshot = fleet.refresh()
+    assert snapshot['version'] == 2 and {row['location'] for row in snapshot['rows']} == {'Paris', 'Tokyo'}
+    assert len(fleet.processor.batches) == 1  # dropping a row scores nothing
+    assert 'Sydney' not in fleet._versions and 'Sydney' not in fleet._hazards
+
+    # Fed by the scoring service's own pass instead of refresh()
+    collector = leases['Paris'].collector
+    collector.feed(severity=0.9)
+    result = fleet.processor.process_crisis_detection_batch([collector.get_series()], regions=['Paris'])
+    snapshot = fleet.ingest([('Paris', collector, collector.data_version())], result, ['Paris'])
+    assert [row['location'] for row in snapshot['rows']] == ['Paris']
+    assert snapshot['rows'][0]['crisis_score'] == result[0]['crisis_score']
+    registry.shutdown()
+    print("   ✅ Released locations are dropped with their history; ingest() folds in outside results")
+
+
+if __name__ == "__main__":
+    test_only_changed_locations_are_rescored()
+    test_trend_window()
+    test_hazards_follow_the_weather()
+    test_removed_locations_are_dropped()
+    print("\n✅ Fleet monitor tests complete!")
@@ -0,0 +1,144 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.flood_model import DEMTileStore, DEMFloodModel, tile_name, METERS_PER_DEGREE
+import heapq
+import tempfile
+import numpy as np
+
+TILE_SIZE = 241
+LAT_RANGE = np.linspace(29.40, 29.60, 48)
+LON_RANGE = np.linspace(-95.60, -95.40, 48)
+
+
+def tile_coords():
+    """Latitude and longitude of every pixel of the N29W096 tile (row 0 is the northern edge)"""
+    lats = 30.0 - np.arange(TILE_SIZE) / (TILE_SIZE - 1)
+    lons = -96.0 + np.arange(TILE_SIZE) / (TILE_SIZE - 1)
+    return np.meshgrid(lats, lons, indexing='ij')
+
+
+def write_tile(directory, elevation):
+    path = os.path.join(directory, tile_name(29, -96) + '.npy')
+    np.save(path, elevation.astype(np.float32))
+    return DEMFloodModel(tiles=DEMTileStore(directory), runoff_coefficient=1.0)
+
+
+def bowl():
+    """Two pits inside a rim, on a plane draining to the south"""
+    lat, lon = tile_coords()
+    elevation = 50.0 + (lat - 29.0) * 20.0
+    for centre_lat, centre_lon, depth in ((29.47, -95.53, 8.0), (29.53, -95.46, 5.0)):
+        distance = np.hypot(lat - centre_lat, lon - centre_lon)
+        elevation -= depth * np.exp(-(distance / 0.03) ** 2)
+    return elevation
+
+
+def cell_area():
+    cell_dy = (LAT_RANGE[1] - LAT_RANGE[0]) * METERS_PER_DEGREE
+    cell_dx = (LON_RANGE[1] - LON_RANGE[0]) * METERS_PER_DEGREE * np.cos(np.radians(LAT_RANGE.mean()))
+    return cell_dy * cell_dx
+
+
+def priority_flood_fill(elevation, outlets=None):
+    """Depression-filled surface by an 8-connected priority flood from the edge"""
+    height, width = elevation.shape
+    filled = np.full(elevation.shape, np.inf)
+    seeds = np.zeros(elevation.shape, dtype=bool) if outlets is None else outlets.copy()
+    seeds[0, :] = seeds[-1, :] = seeds[:, 0] = seeds[:, -1] = True
+    heap = [(elevation[r, c], r, c) for r, c in zip(*np.nonzero(seeds))]
+    for level, r, c in heap:
+        filled[r, c] = level
+    heapq.heapify(heap)
+    while heap:
+        level, r, c = heapq.heappop(heap)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < height and 0 <= nc < width and filled[nr, nc] == np.inf:
+                    filled[nr, nc] = max(level, elevation[nr, nc])
+                    heapq.heappush(heap, (filled[nr, nc], nr, nc))
+    return filled
+
+
+def test_tile_sampling():
+    print("\n🧪 Testing memory-mapped tile sampling")
+    assert tile_name(29, -96) == 'N29W096' and tile_name(-1, 5) == 'S01E005'
+    lat, lon = tile_coords()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = write_tile(tmp, 100.0 + lat * 10.0 + lon * 3.0).tiles
+        elevation = store.sample(LAT_RANGE, LON_RANGE)
+        expected = 100.0 + LAT_RANGE[:, None] * 10.0 + LON_RANGE[None, :] * 3.0
+        assert np.allclose(elevation, expected, atol=1e-3)
+        assert np.isnan(store.sample([10.5], [10.5])).all()
+    print("   ✅ Bilinear samples reproduce a plane; uncovered areas are NaN")
+
+
+def test_ponding_conserves_water():
+    print("\n🧪 Testing ponded volume never exceeds the runoff")
+    with tempfile.TemporaryDirectory() as tmp:
+        model = write_tile(tmp, bowl())
+        for rain_mm in (1.0, 20.0, 200.0, 5000.0):
+            result = model.simulate(LAT_RANGE, LON_RANGE, rain_mm)
+            ponded = result['flood_depth_m'].sum() * cell_area()
+            runoff_total = rain_mm / 1000.0 * cell_area() * LAT_RANGE.size * LON_RANGE.size
+            print(f"   {rain_mm:>6.0f} mm: ponded {ponded:12.0f} m³ of {runoff_total:12.0f} m³")
+            assert ponded <= runoff_total * (1 + 1e-9)
+            assert (result['flood_depth_m'] >= 0).all()
+            assert 0 <= result['flood_risk'].min() and result['flood_risk'].max() <= 1
+    print("   ✅ Water is ponded or lost over the edge, never created")
+
+
+def test_heavy_rain_fills_to_spill_level():
+    print("\n🧪 Testing lakes fill to their spill level under heavy rain")
+    with tempfile.TemporaryDirectory() as tmp:
+        model = write_tile(tmp, bowl())
+        result = model.simulate(LAT_RANGE, LON_RANGE, 1e6)
+        elevation = result['elevation'].astype(np.float64)
+        expected = priority_flood_fill(elevation) - elevation
+        assert expected.max() > 1.0
+        assert np.allclose(result['flood_depth_m'], expected, atol=1e-6)
+    print(f"   ✅ Depths match a priority-flood depression fill (deepest {expected.max():.2f} m)")
+
+
+def test_flow_accumulation_on_a_slope():
+    print("\n🧪 Testing D8 flow accumulation")
+    # Tilted east: every row drains along itself to the eastern edge
+    elevation = np.tile(np.arange(10, 0, -1, dtype=np.float64), (5, 1))
+    receivers = DEMFloodModel.flow_directions(elevation, 30.0, 30.0)
+    accumulation = DEMFloodModel.flow_accumulation(receivers, np.ones(elevation.size)).reshape(elevation.shape)
+    assert np.array_equal(accumulation[2], np.arange(1, 11))
+    assert accumulation.sum() == np.arange(1, 11).sum() * 5
+    print("   ✅ Contributing area grows by one cell per step downhill")
+
+
+def test_voids_are_outlets():
+    print("\n🧪 Testing DEM voids act as outlets")
+    elevation = bowl()
+    lat, lon = tile_coords()
+    elevation[np.hypot(lat - 29.47, lon + 95.53) < 0.01] = -32768.0
+    with tempfile.TemporaryDirectory() as tmp:
+        model = write_tile(tmp, elevation)
+        result = model.simulate(LAT_RANGE, LON_RANGE, 1e6)
+        sampled = model.tiles.sample(LAT_RANGE, LON_RANGE)
+        voids = np.isnan(sampled)
+        assert voids.any()
+        filled = result['elevation'].astype(np.float64)
+        expected = priority_flood_fill(filled, outlets=voids) - filled
+        assert np.allclose(result['flood_depth_m'], expected, atol=1e-6)
+        assert not result['flood_depth_m'][voids].any()
+        # The pit holding the void drains away; the other one still fills
+        pit = (np.abs(LAT_RANGE[:, None] - 29.47) < 0.02) & (np.abs(LON_RANGE[None, :] + 95.53) < 0.02)
+        assert result['flood_depth_m'][pit].max() < 0.01
+        assert result['flood_depth_m'].max() > 1.0
+    print("   ✅ Water reaching a void leaves the grid instead of ponding")
+
+
+if __name__ == "__main__":
+    test_tile_sampling()
+    test_ponding_conserves_water()
+    test_heavy_rain_fills_to_spill_level()
+    test_flow_accumulation_on_a_slope()
+    test_voids_are_outlets()
+    print("\n✅ DEM flood model tests complete!")
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.climate_sources import ClimateDataCollector
+import numpy as np
+
+CENTRE = (29.76, -95.37)
+
+
+def loop_flood_risk(coordinates, precipitation, grid_size):
+    """The original per-cell flood loop, as the reference"""
+    lat, lon = coordinates
+    lat_range = np.linspace(lat - 0.1, lat + 0.1, grid_size)
+    lon_range = np.linspace(lon - 0.1, lon + 0.1, grid_size)
+    flood_risk = np.zeros((grid_size, grid_size))
+    for i, lat_val in enumerate(lat_range):
+        for j, lon_val in enumerate(lon_range):
+            distance_factor = np.sqrt((lat_val - lat) ** 2 + (lon_val - lon) ** 2)
+            flood_risk[i, j] = max(0, precipitation / 10.0 - distance_factor * 100)
+    return flood_risk
+
+
+def test_vectorized_matches_loop():
+    print("\n🧪 Testing vectorized flood zones against the per-cell loop")
+    collector = ClimateDataCollector(flood_resolution=64)
+    for precipitation in (0.0, 5.0, 25.0, 80.0):
+        zones = collector.simulate_flood_zones(CENTRE, {'precipitation': precipitation})
+        expected = loop_flood_risk(CENTRE, precipitation, 64)
+        assert isinstance(zones['flood_risk'], np.ndarray) and zones['flood_risk'].shape == (64, 64)
+        assert np.allclose(zones['flood_risk'], expected, atol=1e-12)
+        assert zones['max_risk'] == float(expected.max())
+        assert zones['model'] == 'distance'
+    print("   ✅ Identical grids, returned as arrays")
+
+
+def test_intensity_fallback_and_resolution():
+    print("\n🧪 Testing the intensity key and per-call resolution")
+    collector = ClimateDataCollector(flood_resolution=64)
+    zones = collector.simulate_flood_zones(CENTRE, {'intensity': 30.0}, resolution=17)
+    assert zones['flood_risk'].shape == (17, 17)
+    assert np.allclose(zones['flood_risk'], loop_flood_risk(CENTRE, 30.0, 17))
+    print("   ✅ Radar 'intensity' readings still drive the grid")
+
+
+def test_batched_precipitation_broadcasts():
+    print("\n🧪 Testing one broadcast over many precipitation values")
+    offsets = np.linspace(-0.1, 0.1, 32)
+    precipitation = np.array([0.0, 12.0, 40.0])
+    batch = ClimateDataCollector._distance_flood_risk(offsets, offsets, precipitation)
+    assert batch.shape == (3, 32, 32)
+    for k, value in enumerate(precipitation):
+        assert np.allclose(batch[k], loop_flood_risk((0.0, 0.0), value, 32))
+
+    grid = np.full((32, 32), 40.0)
+    grid[:16] = 12.0
+    varying = ClimateDataCollector._distance_flood_risk(offsets, offsets, grid)
+    assert np.allclose(varying[:16], batch[1][:16]) and np.allclose(varying[16:], batch[2][16:])
+    print("   ✅ Scalar, per-location and gridded rainfall all broadcast")
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_loop()
+    test_intensity_fallback_and_resolution()
+    test_batched_precipitation_broadcasts()
+    print("\n✅ Flood zone tests complete!")
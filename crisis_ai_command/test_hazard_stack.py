@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.hazard_stack import HazardRasterStack, resample, NO_HAZARD
+from data_pipeline.climate_sources import ClimateDataCollector
+import numpy as np
+
+
+def test_resample_is_bilinear():
+    print("\n🧪 Testing bilinear resampling")
+    lat_src = np.linspace(10.0, 11.0, 21)
+    lon_src = np.linspace(20.0, 22.0, 41)
+    plane = 3.0 * lat_src[:, None] - 2.0 * lon_src[None, :] + 100.0
+    lat_dst = np.linspace(9.5, 11.5, 57)
+    lon_dst = np.linspace(20.3, 21.7, 23)
+    resampled = resample(lat_src, lon_src, plane, lat_dst, lon_dst)
+
+    inside = (lat_dst >= 10.0) & (lat_dst <= 11.0)
+    expected = 3.0 * lat_dst[inside, None] - 2.0 * lon_dst[None, :] + 100.0
+    assert np.allclose(resampled[inside], expected)
+    assert not resampled[~inside].any()
+    print("   ✅ A plane is reproduced exactly; cells outside the source are zero")
+
+
+def test_composite_and_attribution():
+    print("\n🧪 Testing the composite and per-cell attribution")
+    lat_range = np.linspace(0, 1, 4)
+    lon_range = np.linspace(0, 1, 4)
+    flood = np.array([[0.0, 0.5, 1.0, 0.2]] * 4)
+    wildfire = np.array([[0.0, 0.5, 0.3, 0.6]] * 4)
+    stack = HazardRasterStack(lat_range, lon_range, {'flood': flood, 'wildfire': wildfire})
+
+    assert np.allclose(stack.composite[0], [0.0, 0.75, 1.0, 1 - 0.8 * 0.4])
+    assert [stack.names[d] if d != NO_HAZARD else None for d in stack.dominant[0]] == \
+        [None, 'flood', 'flood', 'wildfire']
+    assert (stack.composite >= np.maximum(flood, wildfire)).all()
+
+    weighted = HazardRasterStack(lat_range, lon_range, {'flood': flood, 'wildfire': wildfire}, {'flood': 0.5})
+    assert np.allclose(weighted.composite[0, 2], 1 - 0.5 * 0.7)
+    assert weighted.names[weighted.dominant[0, 2]] == 'flood'
+    assert weighted.names[weighted.dominant[0, 1]] == 'wildfire'
+    print("   ✅ Independent-chance composite; the largest weighted layer owns each cell")
+
+
+def test_from_collector_overlays():
+    print("\n🧪 Testing a stack built from simulated overlays")
+    collector = ClimateDataCollector(flood_resolution=64, fire_resolution=64)
+    coordinates = (34.05, -118.24)
+    weather = {'temperature': 38, 'wind_speed': 20, 'wind_direction': 270, 'humidity': 10, 'precipitation': 30.0}
+    overlays = {
+        'flood_zones': collector.simulate_flood_zones(coordinates, weather),
+        'wildfire_zones': collector.simulate_wildfire_spread(coordinates, weather)
+    }
+    stack = HazardRasterStack.from_overlays(overlays, resolution=128)
+    assert stack.names == ['flood', 'wildfire']
+    assert np.isclose(stack.lat_range[0], coordinates[0] - 0.1) and np.isclose(stack.lat_range[-1], coordinates[0] + 0.1)
+    assert 0 <= stack.composite.min() and stack.composite.max() <= 1
+
+    centre = stack.risk_at(*coordinates)
+    assert centre['dominant'] in stack.names and centre['composite'] > 0
+    expected = 1 - (1 - centre['layers']['flood']) * (1 - centre['layers']['wildfire'])
+    assert np.isclose(centre['composite'], expected)
+    assert stack.risk_at(coordinates[0] + 1.0, coordinates[1]) is None
+    assert HazardRasterStack.from_overlays({}) is None
+    print(f"   ✅ Flood and fire share one grid; {centre['dominant']} dominates the centre")
+
+
+def test_view_by_zoom():
+    print("\n🧪 Testing stack views at map zooms")
+    size = 128
+    lat_range = np.linspace(29.6, 29.9, size)
+    lon_range = np.linspace(-95.5, -95.2, size)
+    flood = np.zeros((size, size))
+    flood[40, 90] = 0.8
+    stack = HazardRasterStack(lat_range, lon_range, {'flood': flood})
+
+    full = stack.view()
+    assert full['pyramid_level'] == 0 and full['composite'] is stack.composite
+    coarse = stack.view(zoom=5)
+    assert coarse['pyramid_level'] > 0
+    assert coarse['composite'].shape == (len(coarse['lat_range']), len(coarse['lon_range']))
+    assert np.isclose(coarse['composite'].max(), 0.8)
+    assert stack.view(level=2)['composite'].shape == (32, 32)
+    print(f"   ✅ Zoom 5 reads level {coarse['pyramid_level']}; the peak survives the reduction")
+
+
+if __name__ == "__main__":
+    test_resample_is_bilinear()
+    test_composite_and_attribution()
+    test_from_collector_overlays()
+    test_view_by_zoom()
+    print("\n✅ Hazard stack tests complete!")
@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.climate_sources import ClimateDataCollector
+import numpy as np
+
+LOCATIONS = [(29.76, -95.37), (34.05, -118.24), (40.71, -74.01), (25.76, -80.19), (47.61, -122.33)]
+WEATHER = [
+    {'temperature': 31, 'wind_speed': 12, 'wind_direction': 200, 'humidity': 80, 'precipitation': 40.0},
+    {'temperature': 39, 'wind_speed': 25, 'wind_direction': 270, 'humidity': 8, 'precipitation': 0.0},
+    {'temperature': 18, 'wind_speed': 5, 'humidity': 60},
+    {'temperature': 36, 'wind_speed': 18, 'wind_direction': 90, 'humidity': 15, 'precipitation': 12.5},
+    {'temperature': 12, 'wind_speed': 3, 'wind_direction': 0, 'humidity': 90, 'precipitation': 0.8}
+]
+RESOLUTION = 33
+
+
+def test_batch_matches_single_location():
+    print("\n🧪 Testing batched hazards against one location at a time")
+    collector = ClimateDataCollector()
+    batch = collector.simulate_hazards_batch(LOCATIONS, WEATHER, resolution=RESOLUTION, include_rasters=True)
+    assert len(batch) == len(LOCATIONS)
+
+    for coordinates, weather, result in zip(LOCATIONS, WEATHER, batch):
+        assert result['coordinates'] == coordinates
+        flood = collector.simulate_flood_zones(coordinates, weather, resolution=RESOLUTION)
+        if weather.get('precipitation', 0) > 1.0:
+            assert np.allclose(result['flood_risk'], flood['flood_risk'])
+            assert np.isclose(result['flood_max_risk'], flood['max_risk'])
+        else:
+            assert result['flood_max_risk'] == 0.0 and result['flood_hotspot'] is None
+        assert np.allclose(result['flood_lat_range'], flood['lat_range'])
+
+        fire = collector.simulate_wildfire_spread(coordinates, weather, resolution=RESOLUTION)
+        if fire is None:
+            assert result['fire_max_risk'] == 0.0 and result['burned_area_km2'] == 0.0
+        else:
+            assert np.array_equal(result['arrival_time'], fire['arrival_time'])
+            assert np.allclose(result['fire_risk'], fire['fire_risk'])
+            assert np.isclose(result['burned_area_km2'], fire['burned_area_km2'])
+            assert np.isclose(result['fire_danger_index'], fire['fire_danger_index'])
+    burning = sum(r['fire_max_risk'] > 0 for r in batch)
+    flooding = sum(r['flood_max_risk'] > 0 for r in batch)
+    print(f"   ✅ {len(batch)} locations ({flooding} flooding, {burning} burning) equal their single runs")
+
+
+def test_hotspots_point_at_the_peak():
+    print("\n🧪 Testing hotspot coordinates")
+    collector = ClimateDataCollector()
+    result = collector.simulate_hazards_batch(LOCATIONS[:1], WEATHER[:1], resolution=RESOLUTION, include_rasters=True)[0]
+    row, col = np.unravel_index(result['flood_risk'].argmax(), result['flood_risk'].shape)
+    assert result['flood_hotspot'] == (result['flood_lat_range'][row], result['flood_lon_range'][col])
+    assert np.allclose(result['flood_hotspot'], LOCATIONS[0])
+    summary = collector.simulate_hazards_batch(LOCATIONS[:1], WEATHER[:1], resolution=RESOLUTION)[0]
+    assert 'flood_risk' not in summary and summary['flood_max_risk'] == result['flood_max_risk']
+    print("   ✅ Hotspots sit on the highest-risk cell; summaries omit the rasters")
+
+
+if __name__ == "__main__":
+    test_batch_matches_single_location()
+    test_hotspots_point_at_the_peak()
+    print("\n✅ Batched hazard tests complete!")
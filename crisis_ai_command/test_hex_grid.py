@@ -0,0 +1,100 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.hex_grid import (HexCongestionGrid, hex_cells, hex_centers, hex_polygons,
+                                    KM_PER_DEG_LAT, _km_per_deg_lon)
+from datetime import datetime, timedelta
+import numpy as np
+
+REF_LAT = 38.9
+NEIGHBOURS = [(1, 0), (1, -1), (0, -1), (-1, 0), (-1, 1), (0, 1)]
+
+
+def plane_km(lat, lon):
+    return np.asarray(lon) * _km_per_deg_lon(REF_LAT), np.asarray(lat) * KM_PER_DEG_LAT
+
+
+def test_cube_rounding_picks_the_nearest_centre():
+    print("\n🧪 Testing hexagon cube rounding")
+    rng = np.random.default_rng(4)
+    lats = rng.uniform(38.7, 39.1, 20000)
+    lons = rng.uniform(-77.3, -76.8, 20000)
+    q, r = hex_cells(lats, lons, 1.0, REF_LAT)
+
+    x, y = plane_km(lats, lons)
+    own_x, own_y = plane_km(*hex_centers(q, r, 1.0, REF_LAT))
+    own = np.hypot(x - own_x, y - own_y)
+    assert own.max() <= 1.0 + 1e-9  # inside the circumscribed circle
+    for dq, dr in NEIGHBOURS:
+        other_x, other_y = plane_km(*hex_centers(q + dq, r + dr, 1.0, REF_LAT))
+        assert (own <= np.hypot(x - other_x, y - other_y) + 1e-9).all()
+
+    centre_q, centre_r = np.meshgrid(np.arange(-5, 6), np.arange(-5, 6))
+    lat, lon = hex_centers(centre_q.ravel() + 70000, centre_r.ravel() + 30000, 1.0, REF_LAT)
+    back_q, back_r = hex_cells(lat, lon, 1.0, REF_LAT)
+    assert np.array_equal(back_q, centre_q.ravel() + 70000) and np.array_equal(back_r, centre_r.ravel() + 30000)
+    print("   ✅ Every point lands in the hexagon with the nearest centre; centres map to themselves")
+
+
+def test_neighbours_and_outlines():
+    print("\n🧪 Testing neighbour spacing and outlines")
+    q = np.array([0] + [dq for dq, _ in NEIGHBOURS]) + 70000
+    r = np.array([0] + [dr for _, dr in NEIGHBOURS]) + 30000
+    x, y = plane_km(*hex_centers(q, r, 1.0, REF_LAT))
+    assert len(set(zip(np.round(x, 6), np.round(y, 6)))) == 7
+    assert np.allclose(np.hypot(x[1:] - x[0], y[1:] - y[0]), np.sqrt(3.0))
+
+    rings = hex_polygons(q, r, 1.0, REF_LAT)
+    assert rings.shape == (7, 7, 2) and np.allclose(rings[:, 0], rings[:, -1])
+    ring_x, ring_y = plane_km(rings[0, :, 1], rings[0, :, 0])
+    assert np.allclose(np.hypot(ring_x - x[0], ring_y - y[0]), 1.0)
+    print("   ✅ Six distinct neighbours one √3 km step away; closed rings with 1 km corners")
+
+
+def test_decayed_mean():
+    print("\n🧪 Testing the time-decayed congestion mean")
+    grid = HexCongestionGrid(half_life_minutes=30)
+    now = 1_700_000_000.0
+    grid.add([38.9, 38.9], [-77.03, -77.03], [1.0, 0.0], times=[now - 1800, now])
+    cells = grid.cells()
+    assert len(grid) == 1 and cells['samples'][0] == 2
+    assert np.isclose(cells['congestion'][0], 0.5 / 1.5)
+
+    incremental = HexCongestionGrid(half_life_minutes=30)
+    incremental.add([38.9], [-77.03], [1.0], times=[now - 1800])
+    incremental.add([38.9], [-77.03], [0.0], times=[now])
+    assert np.isclose(incremental.cells()['congestion'][0], cells['congestion'][0])
+    print("   ✅ A half-life-old jam counts half as much; batch and incremental agree")
+
+
+def test_sync_and_geojson():
+    print("\n🧪 Testing sync from traffic records")
+    start = datetime(2024, 5, 1, 8, 0)
+    records = [
+        {'timestamp': start, 'lat': 38.90, 'lon': -77.03, 'congestion_level': 0.8, 'incident_detected': True},
+        {'timestamp': start, 'lat': 38.95, 'lon': -77.10, 'congestion_level': 0.2},
+        {'timestamp': start, 'lat': float('nan'), 'lon': -77.0, 'congestion_level': 0.5},
+        {'timestamp': start, 'congestion_level': 0.5}
+    ]
+    grid = HexCongestionGrid().sync(records)
+    assert len(grid) == 2 and grid.cells()['incidents'].sum() == 1
+    records.append({'timestamp': start + timedelta(minutes=5), 'lat': 38.90, 'lon': -77.03, 'congestion_level': 0.4})
+    grid.sync(records)
+    assert len(grid) == 2 and grid.cells()['samples'].sum() == 3
+    grid.sync(records[1:2])
+    assert len(grid) == 1  # a different series starts over
+
+    cells = grid.cells()
+    features = grid.geojson(cells)['features']
+    assert [f['id'] for f in features] == [f"{q},{r}" for q, r in zip(cells['q'], cells['r'])]
+    assert len(HexCongestionGrid().cells()['q']) == 0
+    print("   ✅ Only new finite readings are folded in; outlines are keyed 'q,r'")
+
+
+if __name__ == "__main__":
+    test_cube_rounding_picks_the_nearest_centre()
+    test_neighbours_and_outlines()
+    test_decayed_mean()
+    test_sync_and_geojson()
+    print("\n✅ Hex grid tests complete!")
@@ -0,0 +1,139 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.interpolation import (GridIndex, ObservationStore, WeatherFieldInterpolator,
+                                         idw, kriging_lite, _distances_km)
+from data_pipeline.climate_sources import ClimateDataCollector
+from datetime import datetime, timedelta
+import numpy as np
+
+STATION_LATS = np.array([29.70, 29.76, 29.82, 29.74, 29.80])
+STATION_LONS = np.array([-95.45, -95.37, -95.30, -95.28, -95.42])
+STATION_VALUES = np.array([10.0, 25.0, 40.0, 5.0, 18.0])
+
+
+def test_grid_index_matches_brute_force():
+    print("\n🧪 Testing the spatial bucket index")
+    rng = np.random.default_rng(11)
+    lats = rng.uniform(25, 35, 2000)
+    lons = rng.uniform(-100, -90, 2000)
+    index = GridIndex(lats, lons)
+    for lat, lon, radius in ((30.0, -95.0, 50.0), (25.1, -99.9, 120.0), (33.3, -91.2, 5.0)):
+        expected = np.flatnonzero(_distances_km([lat], [lon], lats, lons)[0] <= radius)
+        assert sorted(index.query_radius(lat, lon, radius).tolist()) == expected.tolist()
+    box = index.query_box(28.0, 29.0, -96.0, -95.0)
+    assert sorted(box.tolist()) == np.flatnonzero((lats >= 28) & (lats <= 29) & (lons >= -96) & (lons <= -95)).tolist()
+    print("   ✅ Radius and box queries find exactly the brute-force points")
+
+
+def test_idw_exact_and_bounded():
+    print("\n🧪 Testing inverse-distance weighting")
+    lat_range = np.sort(np.r_[np.linspace(29.65, 29.85, 20), STATION_LATS])
+    lon_range = np.sort(np.r_[np.linspace(-95.5, -95.25, 20), STATION_LONS])
+    grid = idw(STATION_LATS, STATION_LONS, STATION_VALUES, lat_range, lon_range)
+    for lat, lon, value in zip(STATION_LATS, STATION_LONS, STATION_VALUES):
+        assert grid[np.searchsorted(lat_range, lat), np.searchsorted(lon_range, lon)] == value
+    assert STATION_VALUES.min() <= grid.min() and grid.max() <= STATION_VALUES.max()
+
+    nearest_two = idw(STATION_LATS, STATION_LONS, STATION_VALUES, lat_range, lon_range, neighbours=2)
+    assert nearest_two.shape == grid.shape and not np.allclose(nearest_two, grid)
+    print("   ✅ Stations keep their reading; the field stays within the observed range")
+
+
+def test_kriging_exact_at_stations():
+    print("\n🧪 Testing ordinary kriging")
+    grid = kriging_lite(STATION_LATS, STATION_LONS, STATION_VALUES, STATION_LATS[:1], STATION_LONS[:1])
+    assert np.isclose(grid[0, 0], STATION_VALUES[0])
+    for k in range(STATION_VALUES.size):
+        value = kriging_lite(STATION_LATS, STATION_LONS, STATION_VALUES, STATION_LATS[k:k + 1], STATION_LONS[k:k + 1])
+        assert np.isclose(value[0, 0], STATION_VALUES[k], atol=1e-6)
+    flat = kriging_lite(STATION_LATS, STATION_LONS, np.full(5, 7.0), np.linspace(29.6, 29.9, 6), np.linspace(-95.5, -95.2, 6))
+    assert np.allclose(flat, 7.0, atol=1e-6)
+    print("   ✅ Kriging honours every station and reproduces a constant field")
+
+
+def test_wind_is_interpolated_as_a_vector():
+    print("\n🧪 Testing wind direction interpolation")
+    observations = [
+        {'lat': 29.70, 'lon': -95.40, 'wind_speed': 20.0, 'wind_direction': 350.0, 'temperature': 30.0},
+        {'lat': 29.70, 'lon': -95.30, 'wind_speed': 20.0, 'wind_direction': 10.0},
+        {'lat': 29.80, 'lon': -95.35, 'temperature': None}
+    ]
+    fields = WeatherFieldInterpolator(observations).fields([29.70], [-95.35])
+    direction = fields['wind_direction'][0, 0]
+    assert min(direction, 360.0 - direction) < 1e-6
+    assert np.isclose(fields['wind_speed'][0, 0], 20.0)
+    assert fields['temperature'][0, 0] == 30.0 and 'humidity' not in fields
+    print("   ✅ 350° and 10° meet at north, not south; missing fields are skipped")
+
+
+def test_observation_store():
+    print("\n🧪 Testing the shared observation store")
+    store = ObservationStore(max_age_seconds=3600)
+    now = datetime.now()
+    store.add(29.7604, -95.3698, {'temperature': 30.0, 'timestamp': now - timedelta(hours=2)})
+    store.add(29.9511, -90.0715, {'temperature': 33.0, 'timestamp': now})
+    store.add(29.7604, -95.3698, {'temperature': 31.0, 'timestamp': now})  # same station, newer reading
+    store.add(30.2672, -97.7431, {'temperature': 35.0, 'timestamp': now - timedelta(hours=2)})
+
+    assert len(store) == 2
+    nearby = store.nearby(29.76, -95.37, radius_km=150.0)
+    assert [o['temperature'] for o in nearby] == [31.0]
+    assert len(store.nearby(29.76, -95.37, radius_km=600.0)) == 2
+    print("   ✅ One reading per station, stale readings expire, radius queries are exact")
+
+
+def test_collector_uses_station_fields():
+    print("\n🧪 Testing simulations vary across the grid with nearby stations")
+    collector = ClimateDataCollector(flood_resolution=32)
+    coordinates = (29.76, -95.37)
+    observations = [
+        {'lat': 29.76, 'lon': -95.37, 'precipitation': 30.0},
+        {'lat': 29.86, 'lon': -95.37, 'precipitation': 0.0},
+        {'lat': 29.66, 'lon': -95.37, 'precipitation': 60.0}
+    ]
+    varying = collector.simulate_flood_zones(coordinates, {'precipitation': 30.0}, observations=observations)
+    uniform = collector.simulate_flood_zones(coordinates, {'precipitation': 30.0})
+    risk = varying['flood_risk']
+    assert risk[:16].sum() > risk[16:].sum()  # wetter to the south
+    assert not np.allclose(risk, uniform['flood_risk'])
+    single = collector.simulate_flood_zones(coordinates, {'precipitation': 30.0}, observations=observations[:1])
+    assert np.array_equal(single['flood_risk'], uniform['flood_risk'])
+    print("   ✅ Rain follows the stations; one station falls back to uniform rain")
+
+
+def test_local_station_is_excluded_by_name():
+    print("\n🧪 Testing the local station is not its own neighbour")
+    collector = ClimateDataCollector()
+    collector.observation_store = ObservationStore()
+    now = datetime.now()
+    # Stored at the collector's geocoded coordinates; the map is centred on the city table's
+    collector.observation_store.add(29.7633, -95.3633, {'precipitation': 30.0, 'timestamp': now},
+                                    station='Houston, TX, USA_REAL')
+    collector.observation_store.add(29.90, -95.50, {'precipitation': 5.0, 'timestamp': now},
+                                    station='Spring, TX, USA_REAL')
+    centre = (29.7604, -95.3698)
+    weather = {'precipitation': 30.0, 'location': 'Houston, TX, USA_REAL'}
+
+    observations = collector.nearby_observations(centre, weather, station=weather['location'])
+    assert len(observations) == 2
+    assert observations[0]['lat'] == centre[0] and observations[1]['lat'] == 29.90
+    # Matched by coordinates alone the local station would count as a neighbour
+    assert len(collector.nearby_observations(centre, weather)) == 3
+    assert collector.nearby_observations(centre, weather, station='Spring, TX, USA_REAL')[1]['lat'] == 29.763
+    collector.observation_store.add(29.7641, -95.3650, {'precipitation': 31.0, 'timestamp': now},
+                                    station='Houston, TX, USA_REAL')
+    assert len(collector.observation_store) == 2  # a re-geocoded station is still one station
+    print("   ✅ Stations are matched by name, not by where the map happens to be centred")
+
+
+if __name__ == "__main__":
+    test_grid_index_matches_brute_force()
+    test_idw_exact_and_bounded()
+    test_kriging_exact_at_stations()
+    test_wind_is_interpolated_as_a_vector()
+    test_observation_store()
+    test_collector_uses_station_fields()
+    test_local_station_is_excluded_by_name()
+    print("\n✅ Interpolation tests complete!")
@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from visualization.climate_dashboard import point_budget, _coarsest_fitting, RISK_FLOOR, BYTES_PER_POINT, PAYLOAD_BUDGET_BYTES
+from data_pipeline.hazard_stack import HazardRasterStack
+from data_pipeline.fire_spread import FireSpreadModel
+from data_pipeline.overlay_pyramid import OverlayPyramid
+import numpy as np
+
+
+def risky_cells(view):
+    return int(np.count_nonzero(np.asarray(view['composite']) >= RISK_FLOOR))
+
+
+def test_point_budget():
+    print("\n🧪 Testing the payload point budget")
+    assert point_budget() == PAYLOAD_BUDGET_BYTES // BYTES_PER_POINT
+    assert point_budget(48_000) == 1000
+    print(f"   ✅ {point_budget()} points per figure by default")
+
+
+def test_coarsest_fitting_walks_up_the_pyramid():
+    print("\n🧪 Testing level selection against the budget")
+    sizes = [4096, 1024, 256, 64]
+    visited = []
+
+    def view_at(level):
+        visited.append(level)
+        return {'level': level, 'points': sizes[level]}
+
+    def count(view):
+        return view['points']
+
+    assert _coarsest_fitting(view_at, 4, 0, count, 5000)['level'] == 0
+    assert _coarsest_fitting(view_at, 4, 0, count, 300)['level'] == 2
+    assert _coarsest_fitting(view_at, 4, 1, count, 2000)['level'] == 1
+    visited.clear()
+    assert _coarsest_fitting(view_at, 4, 2, count, 10)['level'] == 3  # nothing fits: the coarsest is used
+    assert visited == [2, 3]
+    print("   ✅ The finest level that fits is used, never finer than the zoom asked for")
+
+
+def test_hazard_layer_fits_the_budget():
+    print("\n🧪 Testing a saturated hazard grid is coarsened to fit")
+    size = 256
+    lat_range = np.linspace(29.6, 29.9, size)
+    lon_range = np.linspace(-95.5, -95.2, size)
+    flood = np.random.default_rng(5).uniform(0.1, 1.0, (size, size))
+    flood[:, :8] = 0.0  # a dry strip that never costs points
+    stack = HazardRasterStack(lat_range, lon_range, {'flood': flood})
+    assert risky_cells(stack.view()) == size * (size - 8)
+
+    budget = 5000
+    view = _coarsest_fitting(lambda level: stack.view(level=level), len(stack.pyramid.levels),
+                             0, risky_cells, budget)
+    assert risky_cells(view) <= budget and view['pyramid_level'] == 2
+    assert risky_cells(stack.view(level=view['pyramid_level'] - 1)) > budget
+    assert np.isclose(view['composite'].max(), flood.max())  # max-reduced: the worst cell survives
+    print(f"   ✅ {risky_cells(view)} cells at level {view['pyramid_level']} instead of {size * (size - 8)}")
+
+
+def test_fire_frames_fit_the_budget():
+    print("\n🧪 Testing fire animation frames are counted cumulatively")
+    steps, step_minutes = 12, 10
+    arrival = FireSpreadModel().simulate((128, 128), 20.0, steps, step_minutes, 25.0, 270.0, 35.0, 15.0)
+    pyramid = OverlayPyramid(np.linspace(0, 1, 128), np.linspace(0, 1, 128), {'arrival_time': arrival},
+                             {'arrival_time': 'min'})
+    times = [step_minutes * (k + 1) for k in range(steps)]
+
+    def frame_points(view):
+        return sum(int(np.count_nonzero(view['arrival_time'] <= t)) for t in times)
+
+    full = frame_points(pyramid.view(level=0))
+    view = _coarsest_fitting(lambda level: pyramid.view(level=level), len(pyramid.levels), 0, frame_points, full // 5)
+    assert frame_points(view) <= full // 5 and view['pyramid_level'] > 0
+    assert view['arrival_time'].min() == 0.0  # min-reduced: the ignition is still at time zero
+    print(f"   ✅ {frame_points(view)} frame points at level {view['pyramid_level']} instead of {full}")
+
+
+if __name__ == "__main__":
+    test_point_budget()
+    test_coarsest_fitting_walks_up_the_pyramid()
+    test_hazard_layer_fits_the_budget()
+    test_fire_frames_fit_the_budget()
+    print("\n✅ Map budget tests complete!")
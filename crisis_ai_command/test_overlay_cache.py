@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.overlay_cache import OverlayCache, overlay_key, quantize_weather
+from data_pipeline.climate_sources import ClimateDataCollector
+import numpy as np
+
+HOUSTON = (29.7604, -95.3698)
+
+
+def test_quantize_weather():
+    print("\n🧪 Testing weather quantization")
+    quantized = quantize_weather({'temperature': 31.4, 'wind_speed': 12.6, 'wind_direction': 357.0,
+                                  'humidity': 62.0, 'precipitation': 3.3, 'description': 'rain'})
+    assert quantized == {'temperature': 31.0, 'wind_speed': 13.0, 'wind_direction': 0.0,
+                         'humidity': 60.0, 'precipitation': 3.5}
+    assert quantize_weather({'temperature': 20.0}) == {'temperature': 20.0}
+    print("   ✅ Readings snap to their step, wind direction wraps, missing fields stay missing")
+
+
+def test_overlay_key():
+    print("\n🧪 Testing overlay keys")
+    base = overlay_key(HOUSTON, {'temperature': 30.2, 'precipitation': 4.1}, 64)
+    assert base == overlay_key((29.76041, -95.36979), {'precipitation': 3.9, 'temperature': 29.8}, 64)
+    assert base != overlay_key(HOUSTON, {'temperature': 30.2, 'precipitation': 5.0}, 64)
+    assert base != overlay_key((29.77, -95.3698), {'temperature': 30.2, 'precipitation': 4.1}, 64)
+    assert base != overlay_key(HOUSTON, {'temperature': 30.2, 'precipitation': 4.1}, 128)
+    hash(base)
+    print("   ✅ Readings in one bucket share a key; location, bucket and resolution split it")
+
+
+def test_lru_under_memory_budget():
+    print("\n🧪 Testing the byte-bounded LRU")
+    grid = lambda: {'risk': np.zeros(1000)}  # ~8 KB each
+    cache = OverlayCache(max_bytes=30000)
+    for key in 'abc':
+        cache.put(key, grid())
+    assert cache.get('a') is not None  # touch the oldest so it survives
+    cache.put('d', grid())
+
+    assert cache.get('b') is None
+    assert all(cache.get(key) is not None for key in 'acd')
+    stats = cache.stats()
+    assert stats['entries'] == 3 and stats['bytes'] <= stats['max_bytes']
+    assert stats['hits'] == 4 and stats['misses'] == 1
+
+    oversized = {'risk': np.zeros(10000)}
+    assert cache.put('big', oversized) is oversized and cache.get('big') is None
+    print("   ✅ The least recently used overlay goes first; oversized ones are never cached")
+
+
+def test_get_or_compute_shares_frozen_entries():
+    print("\n🧪 Testing get_or_compute")
+    cache = OverlayCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'flood_zones': {'flood_risk': np.ones((4, 4))}}
+
+    first = cache.get_or_compute('k', compute)
+    second = cache.get_or_compute('k', compute)
+    assert first is second and len(calls) == 1
+    try:
+        second['flood_zones']['flood_risk'][0, 0] = 5.0
+        assert False, "cached arrays should be read-only"
+    except ValueError:
+        pass
+    print("   ✅ One computation per key, and the shared arrays cannot be modified")
+
+
+def test_collector_reuses_simulations():
+    print("\n🧪 Testing the collector reuses overlays across nearby readings")
+    collector = ClimateDataCollector(flood_resolution=32, fire_resolution=32)
+    collector.overlay_cache = OverlayCache()
+    calls = []
+    simulate = collector._simulate_overlays
+
+    def counting(*args, **kwargs):
+        calls.append(args[0])
+        return simulate(*args, **kwargs)
+
+    collector._simulate_overlays = counting
+    weather = {'temperature': 36.2, 'wind_speed': 20.3, 'wind_direction': 268, 'humidity': 12, 'precipitation': 6.1}
+    first = collector.get_climate_overlays(HOUSTON, weather)
+    second = collector.get_climate_overlays(HOUSTON, dict(weather, temperature=35.9, precipitation=5.9))
+    assert len(calls) == 1
+    assert first['flood_zones']['flood_risk'] is second['flood_zones']['flood_risk']
+
+    collector.get_climate_overlays(HOUSTON, dict(weather, precipitation=12.0))
+    assert len(calls) == 2
+    print("   ✅ A reading in the same bucket is served from the cache; a new bucket re-simulates")
+
+
+if __name__ == "__main__":
+    test_quantize_weather()
+    test_overlay_key()
+    test_lru_under_memory_budget()
+    test_get_or_compute_shares_frozen_entries()
+    test_collector_reuses_simulations()
+    print("\n✅ Overlay cache tests complete!")
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.overlay_pyramid import OverlayPyramid, block_reduce, reduce_axis
+import numpy as np
+
+
+def naive_reduce(grid, factor, how):
+    """Block reduction one block at a time, as the reference"""
+    height, width = grid.shape
+    out = np.empty(((height + factor - 1) // factor, (width + factor - 1) // factor))
+    reduce = {'max': np.max, 'min': np.min, 'mean': np.mean}[how]
+    for i in range(out.shape[0]):
+        for j in range(out.shape[1]):
+            out[i, j] = reduce(grid[i * factor:(i + 1) * factor, j * factor:(j + 1) * factor])
+    return out
+
+
+def test_block_reduce_matches_reference():
+    print("\n🧪 Testing block reduction, including ragged edges")
+    grid = np.random.default_rng(3).uniform(0, 1, (37, 50))
+    for factor in (2, 4, 8):
+        for how in ('max', 'min', 'mean'):
+            assert np.allclose(block_reduce(grid, factor, how), naive_reduce(grid, factor, how))
+    stacked = block_reduce(np.stack([grid, -grid]), 4, 'max')
+    assert np.allclose(stacked[1], -naive_reduce(grid, 4, 'min'))
+    assert np.allclose(reduce_axis(np.arange(10.0), 4), [1.5, 5.5, 8.5])
+    print("   ✅ max, min and mean equal a per-block loop; leading axes are carried through")
+
+
+def test_levels_keep_hazards_visible():
+    print("\n🧪 Testing pyramid levels")
+    size = 128
+    lat_range = np.linspace(29.6, 29.9, size)
+    lon_range = np.linspace(-95.5, -95.2, size)
+    risk = np.zeros((size, size))
+    risk[77, 31] = 0.9  # a single hot cell
+    arrival = np.full((size, size), np.inf)
+    arrival[77, 31] = 12.0
+    pyramid = OverlayPyramid(lat_range, lon_range, {'risk': risk, 'arrival': arrival},
+                             {'risk': 'max', 'arrival': 'min'})
+
+    sizes = [len(level['lon_range']) for level in pyramid.levels]
+    assert sizes == [128, 64, 32, 16, 8]
+    for level in pyramid.levels:
+        assert level['risk'].max() == 0.9 and level['arrival'].min() == 12.0
+        assert level['risk'].shape == (len(level['lat_range']), len(level['lon_range']))
+        assert not level['risk'].flags.writeable
+    assert pyramid.levels[0]['risk'] is risk and pyramid.nbytes > 0
+    print(f"   ✅ {len(sizes)} levels down to {sizes[-1]} cells; the hot cell survives every one")
+
+
+def test_zoom_picks_coarsest_sufficient_level():
+    print("\n🧪 Testing zoom-to-level selection")
+    size = 256
+    lat_range = np.linspace(29.66, 29.86, size)
+    lon_range = np.linspace(-95.47, -95.27, size)
+    pyramid = OverlayPyramid(lat_range, lon_range, {'risk': np.ones((size, size))}, {'risk': 'max'})
+
+    levels = [pyramid.level_for_zoom(zoom) for zoom in range(4, 19)]
+    assert levels == sorted(levels, reverse=True)
+    assert levels[0] == len(pyramid.levels) - 1 and levels[-1] == 0
+    view = pyramid.view(10)
+    assert view['pyramid_level'] == pyramid.level_for_zoom(10)
+    assert view['risk'] is pyramid.levels[view['pyramid_level']]['risk']
+    assert pyramid.view()['pyramid_level'] == 0 and pyramid.view(level=2)['pyramid_level'] == 2
+    print(f"   ✅ Zooming in walks from level {levels[0]} to level 0, never re-simulating")
+
+
+if __name__ == "__main__":
+    test_block_reduce_matches_reference()
+    test_levels_keep_hazards_visible()
+    test_zoom_picks_coarsest_sufficient_level()
+    print("\n✅ Overlay pyramid tests complete!")
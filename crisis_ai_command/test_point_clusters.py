@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.point_clusters import PointClusterIndex, viewport_bounds
+from data_pipeline.data_sources import incident_position
+from data_pipeline.time_index import TimeIndexedList
+import numpy as np
+
+CENTRE = (38.9072, -77.0369)
+WORLD = (-180.0, -85.0, 180.0, 85.0)
+
+
+def random_points(n, seed=2, spread=0.2):
+    rng = np.random.default_rng(seed)
+    return [(CENTRE[0] + rng.normal(0, spread), CENTRE[1] + rng.normal(0, spread)) for _ in range(n)]
+
+
+def test_viewport_bounds():
+    print("\n🧪 Testing viewport bounds")
+    west, south, east, north = viewport_bounds(*CENTRE, 10)
+    assert west < CENTRE[1] < east and south < CENTRE[0] < north
+    west2, south2, east2, north2 = viewport_bounds(*CENTRE, 11)
+    assert np.isclose(east2 - west2, (east - west) / 2)
+    west0, _, east0, _ = viewport_bounds(0.0, 0.0, 0)
+    assert (west0, east0) == (-180.0, 180.0)  # wider than the world: clamped
+    print("   ✅ Views contain their centre and halve in width per zoom level")
+
+
+def test_clusters_conserve_points():
+    print("\n🧪 Testing cluster counts add up")
+    points = random_points(5000)
+    index = PointClusterIndex()
+    for i, (lat, lon) in enumerate(points):
+        index.add(lat, lon, {'id': i})
+    assert len(index) == 5000
+
+    previous = 0
+    for zoom in range(0, 17):
+        clusters = index.clusters(WORLD, zoom)
+        assert sum(c['count'] for c in clusters) == 5000
+        assert len(clusters) >= previous
+        previous = len(clusters)
+        for c in clusters:
+            assert (c['item'] is None) == (c['count'] > 1)
+    assert len(index.clusters(WORLD, 0)) <= 2
+    singles = index.clusters(WORLD, 20)
+    assert len(singles) == 5000 and sorted(c['item']['id'] for c in singles) == list(range(5000))
+    print(f"   ✅ Every zoom accounts for all points; {previous} groups at zoom 16, singles beyond")
+
+
+def test_view_only_reads_covered_cells():
+    print("\n🧪 Testing a view returns only clusters inside its bounds")
+    points = random_points(2000, spread=1.0)
+    index = PointClusterIndex(radius_px=1)
+    for lat, lon in points:
+        index.add(lat, lon)
+    bounds = viewport_bounds(*CENTRE, 11)
+    west, south, east, north = bounds
+    inside = sum(1 for lat, lon in points if west <= lon <= east and south <= lat <= north)
+    clusters = index.clusters(bounds, 16)
+    # At one-pixel cells only points within a cell of the edge can slip in
+    assert inside <= sum(c['count'] for c in clusters) <= inside + 5
+    assert all(west - 0.01 <= c['lon'] <= east + 0.01 and south - 0.01 <= c['lat'] <= north + 0.01 for c in clusters)
+    print(f"   ✅ {sum(c['count'] for c in clusters)} of {len(points)} points fall in the zoom-11 view")
+
+
+def test_sync_follows_the_series():
+    print("\n🧪 Testing incremental sync from the traffic series")
+    traffic = TimeIndexedList()
+    index = PointClusterIndex()
+
+    def incident(i, detected=True):
+        return {'incident_detected': detected, 'lat': CENTRE[0] + i * 1e-3, 'lon': CENTRE[1], 'location': f"Road {i}"}
+
+    traffic.extend([incident(0), incident(1, detected=False), {'incident_detected': True, 'lat': float('nan')}])
+    index.sync(traffic, incident_position)
+    assert len(index) == 1
+    traffic.extend([incident(2), incident(3)])
+    index.sync(traffic, incident_position)
+    assert len(index) == 3
+
+    traffic.clear()
+    traffic.append(incident(9))
+    index.sync(traffic, incident_position)
+    assert len(index) == 1
+    assert index.clusters(WORLD, 20)[0]['item']['location'] == "Road 9"
+
+    window = [incident(i) for i in range(4)]
+    index.sync(window[:3], incident_position)
+    index.sync(window[1:], incident_position)  # a sliding window of the latest records
+    assert len(index) == 3
+    print("   ✅ New incidents are added; cleared or sliding series are re-indexed")
+
+
+if __name__ == "__main__":
+    test_viewport_bounds()
+    test_clusters_conserve_points()
+    test_view_only_reads_covered_cells()
+    test_sync_follows_the_series()
+    print("\n✅ Point cluster tests complete!")
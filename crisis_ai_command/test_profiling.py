@@ -0,0 +1,174 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline import profiling
+from data_pipeline.profiling import (LatencyHistogram, StageProfiler, profiled, rolling_summary,
+                                    compare_render_logs, load_render_log, ROLLING_SAMPLES)
+import json
+import tempfile
+import threading
+import numpy as np
+
+
+def test_histogram_percentiles():
+    print("\n🧪 Testing HDR histogram percentiles")
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(mean=13, sigma=1.5, size=20000).astype(np.int64)  # ~0.5 ms median
+    histogram = LatencyHistogram()
+    for value in samples.tolist():
+        histogram.record(value)
+
+    ordered = np.sort(samples)
+    for pct in (50, 90, 99, 99.9):
+        exact = ordered[max(1, int(round(len(ordered) * pct / 100.0))) - 1]
+        reported = histogram.percentile(pct)
+        print(f"   p{pct}: exact {exact / 1e6:.3f} ms  histogram {reported / 1e6:.3f} ms")
+        # Reported as the bucket's upper bound: never below, at most one sub-bucket above
+        assert exact <= reported <= exact * (1 + 2.0 / LatencyHistogram.SUB_BUCKETS)
+    assert histogram.percentile(100) == ordered[-1]
+    assert histogram.summary()['count'] == len(samples)
+    print("   ✅ Percentiles within the histogram's relative precision")
+
+
+def test_histogram_extremes():
+    print("\n🧪 Testing tiny and huge samples")
+    histogram = LatencyHistogram()
+    for value in (0, 3, 15, 10 ** 15):
+        histogram.record(value)
+    assert histogram.min_ns == 0 and histogram.max_ns == 10 ** 15
+    assert histogram.percentile(50) == 3
+    assert histogram.percentile(100) == 10 ** 15
+    print("   ✅ Exact below one sub-bucket, overflow clamps to the last bucket")
+
+
+def test_stages_only_recorded_when_enabled():
+    print("\n🧪 Testing the profiler on/off switch")
+    profiler = StageProfiler(enabled=False)
+    with profiler.stage('disabled'):
+        pass
+    assert profiler.snapshot() == {}
+
+    profiler.enable()
+    for _ in range(3):
+        with profiler.stage('scoring'):
+            sum(range(1000))
+    assert profiler.snapshot()['scoring']['count'] == 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'profile.json')
+        profiler.dump(path)
+        with open(path) as f:
+            assert json.load(f)['stages']['scoring']['count'] == 3
+    print("   ✅ Disabled stages cost nothing; enabled ones are recorded and dumped")
+
+
+def test_profiled_decorator():
+    print("\n🧪 Testing the @profiled decorator")
+    previous = profiling.PROFILER
+    profiling.PROFILER = StageProfiler(enabled=False)
+    try:
+        @profiled('test.square')
+        def square(x):
+            return x * x
+
+        assert square(3) == 9
+        assert profiling.PROFILER.snapshot() == {}
+        profiling.PROFILER.enable()
+        assert square(4) == 16
+        assert profiling.PROFILER.snapshot()['test.square']['count'] == 1
+    finally:
+        profiling.PROFILER = previous
+    print("   ✅ The decorator records under its stage name only while enabled")
+
+
+def test_rolling_summary():
+    print("\n🧪 Testing rolling nearest-rank percentiles")
+    summary = rolling_summary(list(range(100, 0, -1)))
+    assert summary == {'count': 100, 'p50': 50, 'p90': 90, 'p99': 99, 'max': 100}
+    assert rolling_summary([7.5]) == {'count': 1, 'p50': 7.5, 'p90': 7.5, 'p99': 7.5, 'max': 7.5}
+    assert rolling_summary([]) == {'count': 0}
+
+    profiler = StageProfiler(enabled=True)
+    for i in range(ROLLING_SAMPLES + 50):
+        profiler.record('scoring', (i + 1) * 1_000_000)
+    window = profiler.rolling_snapshot()['scoring']
+    assert window['count'] == ROLLING_SAMPLES and window['max'] == ROLLING_SAMPLES + 50
+    assert profiler.snapshot()['scoring']['count'] == ROLLING_SAMPLES + 50  # the histogram keeps everything
+    print("   ✅ Exact ranks over a bounded window of the latest samples")
+
+
+def test_render_traces():
+    print("\n🧪 Testing render traces and the render log")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'renders.jsonl')
+        profiler = StageProfiler(enabled=True, log_path=path)
+        with profiler.stage('outside'):
+            pass
+        with profiler.render('climate_tab', location='Paris') as trace:
+            for _ in range(2):
+                with profiler.stage('figure'):
+                    sum(range(1000))
+            with profiler.stage('scoring'):
+                pass
+            profiler.observe('figure_bytes', 1200)
+            profiler.observe('figure_bytes', 300)
+
+        assert set(trace['stages']) == {'figure', 'scoring'}
+        assert trace['metrics'] == {'figure_bytes': 1500} and trace['tags'] == {'location': 'Paris'}
+        assert trace['total_ms'] >= sum(trace['stages'].values())
+        assert profiler.snapshot()['climate_tab']['count'] == 1
+        assert profiler.snapshot()['figure']['count'] == 2
+        assert load_render_log(path) == json.loads(json.dumps([trace], default=str))
+        with open(path) as f:
+            assert f.read() == profiler.export_renders()
+
+    # Each thread's stages land in its own render
+    def render(name):
+        with profiler.render(name):
+            with profiler.stage(f'{name}.stage'):
+                pass
+    profiler.log_path = None
+    threads = [threading.Thread(target=render, args=(f'tab{i}',)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for recorded in list(profiler.renders)[1:]:
+        assert list(recorded['stages']) == [f"{recorded['render']}.stage"]
+
+    profiler.disable()
+    with profiler.render('off') as trace:
+        profiler.observe('figure_bytes', 1)
+    assert trace is None and len(profiler.renders) == 5
+    print("   ✅ Stages and metrics are attributed to the render they ran in, and logged as JSON lines")
+
+
+def test_compare_render_logs():
+    print("\n🧪 Testing render log comparison")
+    def trace(total, figure, extra=None):
+        stages = {'figure': figure}
+        stages.update(extra or {})
+        return {'render': 'map', 'total_ms': total, 'stages': stages, 'metrics': {'figure_bytes': 1000}}
+
+    baseline = [trace(100.0 + i, 50.0 + i) for i in range(10)]
+    candidate = [trace(80.0 + i, 25.0 + i, {'clusters': 2.0}) for i in range(10)]
+    rows = {row['stage']: row for row in compare_render_logs(baseline, candidate)}
+    assert set(rows) == {'total', 'figure', 'figure_bytes', 'clusters'}
+    assert rows['total']['baseline_p50'] == 104.0 and rows['total']['candidate_p50'] == 84.0
+    assert np.isclose(rows['total']['p50_change_pct'], -20 / 104 * 100)
+    assert rows['figure']['baseline_p90'] == 58.0 and np.isclose(rows['figure']['p50_change_pct'], -25 / 54 * 100)
+    assert rows['figure_bytes']['p50_change_pct'] == 0.0
+    assert rows['clusters']['baseline_p50'] is None and 'p50_change_pct' not in rows['clusters']
+    print("   ✅ p50/p90 per render and stage, with the change where both logs have samples")
+
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_histogram_extremes()
+    test_stages_only_recorded_when_enabled()
+    test_profiled_decorator()
+    test_rolling_summary()
+    test_render_traces()
+    test_compare_render_logs()
+    print("\n✅ Profiling tests complete!")
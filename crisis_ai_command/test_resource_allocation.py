@@ -0,0 +1,105 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline import resource_allocation
+from data_pipeline.resource_allocation import ResourceAllocator, unit_pool
+from data_pipeline.processors import CUDADataProcessor
+
+
+def incident(incident_id, lon, score=1.0, needs=('police',), risk_level='HIGH'):
+    return {'id': incident_id, 'lat': 0.0, 'lon': lon, 'crisis_score': score,
+            'risk_level': risk_level, 'resources_needed': list(needs)}
+
+
+def unit(unit_id, lon, unit_type='police'):
+    return {'id': unit_id, 'type': unit_type, 'lat': 0.0, 'lon': lon}
+
+
+# Greedy takes the single cheapest pair (A->X) and leaves B the long trip to Y;
+# the optimum sends A to Y and B to X for less total travel
+INCIDENTS = [incident('X', 0.1), incident('Y', -1.0)]
+UNITS = [unit('A', 0.0), unit('B', 1.2)]
+
+
+def solve(hungarian):
+    available = resource_allocation.HUNGARIAN_AVAILABLE
+    resource_allocation.HUNGARIAN_AVAILABLE = hungarian and available
+    try:
+        return ResourceAllocator(risk_weight=1000.0).allocate(INCIDENTS, UNITS)
+    finally:
+        resource_allocation.HUNGARIAN_AVAILABLE = available
+
+
+def pairs(result):
+    return sorted((a['unit_id'], a['incident_id']) for a in result['assignments'])
+
+
+def test_hungarian_beats_greedy():
+    print("\n🧪 Testing Hungarian assignment against the greedy fallback")
+    greedy = solve(hungarian=False)
+    assert greedy['solver'] == 'greedy'
+    assert pairs(greedy) == [('A', 'X'), ('B', 'Y')]
+
+    if not resource_allocation.HUNGARIAN_AVAILABLE:
+        print("   ⚠️ scipy not installed, only the greedy solver was checked")
+        return
+    optimal = solve(hungarian=True)
+    print(f"   Greedy objective: {greedy['objective']:.1f}  Hungarian: {optimal['objective']:.1f}")
+    assert optimal['solver'] == 'hungarian'
+    assert pairs(optimal) == [('A', 'Y'), ('B', 'X')]
+    assert optimal['objective'] < greedy['objective']
+    print("   ✅ Hungarian finds the lower-cost assignment greedy misses")
+
+
+def test_unprofitable_slots_left_idle():
+    print("\n🧪 Testing units skip slots not worth the trip")
+    allocator = ResourceAllocator(risk_weight=60.0)
+    result = allocator.allocate([incident('far', 20.0, score=0.1)], [unit('A', 0.0)])
+    assert result['assignments'] == []
+    assert result['unmet_needs'] == {'far': {'police': 1}}
+    print("   ✅ A 2000 km trip for a low score stays unassigned and shows as unmet")
+
+
+def test_reoptimize_only_changed_types():
+    print("\n🧪 Testing incremental re-optimization")
+    allocator = ResourceAllocator()
+    incidents = [incident('X', 0.0, needs=('police', 'ambulance'), risk_level='CRITICAL')]
+    units = [unit('P1', 0.0), unit('P2', 0.01), unit('M1', 0.0, 'ambulance')]
+    first = allocator.allocate(incidents, units)
+    assert sorted(first['solved_types']) == ['ambulance', 'police']
+    assert first['unmet_needs'] == {'X': {'ambulance': 1}}
+
+    assert allocator.reoptimize()['solved_types'] == []
+    updated = allocator.update_scores({'X': 0.9})
+    assert sorted(updated['solved_types']) == ['ambulance', 'police']
+    assert len(updated['assignments']) == 3
+    print("   ✅ Unchanged inputs solve nothing; a score change re-solves its types")
+
+
+def test_optimize_resources_dispatches_units():
+    print("\n🧪 Testing optimize_resources dispatches from the unit pool")
+    processor = CUDADataProcessor()
+    coords = {'lat': 48.85, 'lon': 2.35}
+    crisis_result = {'crisis_score': 0.8, 'risk_level': 'CRITICAL'}
+
+    plan = processor.optimize_resources(crisis_result, unit_pool(coords), coords)
+    dispatched = {}
+    for assignment in plan['assignments']:
+        dispatched[assignment['unit_type']] = dispatched.get(assignment['unit_type'], 0) + 1
+    print(f"   Dispatched: {dispatched}  Unmet: {plan['unmet_needs']}")
+    assert dispatched == {'ambulance': 2, 'fire_department': 2, 'police': 2, 'emergency_management': 1}
+    assert plan['unmet_needs'] == {'emergency_management': 1}
+    assert plan['deployment'] == 'full_emergency_response'
+
+    plain = processor.optimize_resources(crisis_result, {})
+    assert 'assignments' not in plain and plain['resources_needed'] == plan['resources_needed']
+    print("   ✅ Units are dispatched when a pool and coordinates are given")
+
+
+if __name__ == "__main__":
+    test_hungarian_beats_greedy()
+    test_unprofitable_slots_left_idle()
+    test_reoptimize_only_changed_types()
+    test_optimize_resources_dispatches_units()
+    print("\n✅ Resource allocation tests complete!")
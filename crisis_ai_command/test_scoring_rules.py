@@ -0,0 +1,179 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.scoring_rules import ScoringRules, DEFAULT_RULES_PATH
+from data_pipeline.processors import CUDADataProcessor
+import json
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+
+# The hard-coded scoring the rules file replaced, kept here as the reference
+def baseline_weather(weather):
+    if not weather:
+        return 0.1
+    risk = weather[-1].get('risk_score', 0)
+    if risk > 0.8:
+        return min(0.9, risk)
+    if risk > 0.6:
+        return risk * 0.8
+    if risk > 0.3:
+        return risk * 0.7
+    return risk * 0.5
+
+
+def baseline_traffic(traffic):
+    if not traffic:
+        return 0.15
+    recent = traffic[-5:]
+    congestion = np.mean([t.get('congestion_level', 0) for t in recent])
+    incident_rate = sum(t.get('incident_detected', False) for t in recent) / len(recent)
+    return min(0.8, congestion * 0.6 + incident_rate * 0.4)
+
+
+def baseline_social(social):
+    if not social:
+        return 0.1
+    recent = social[-10:]
+    sentiment = np.mean([s.get('sentiment', 0) for s in recent])
+    crisis_rate = sum(s.get('crisis_keywords', False) for s in recent) / len(recent)
+    return min(0.7, (max(0, -sentiment) * 0.3 + crisis_rate * 0.4) * 0.7)
+
+
+def baseline_news(news):
+    if not news:
+        return 0.05
+    severities = [n.get('severity', 0) for n in news[-10:]]
+    max_severity = max(severities)
+    high_count = sum(1 for s in severities if s > 0.5)
+    if max_severity > 0.7:
+        risk = max_severity * 0.8
+    elif max_severity > 0.4:
+        risk = max_severity * 0.6
+    else:
+        risk = np.mean(severities) * 0.4
+    if high_count > 2:
+        risk = min(0.9, risk * 1.3)
+    elif high_count > 0:
+        risk = min(0.8, risk * 1.1)
+    return risk
+
+
+def baseline_score(data):
+    return (baseline_weather(data['weather']) * 0.20 + baseline_traffic(data['traffic']) * 0.25 +
+            baseline_social(data['social']) * 0.25 + baseline_news(data['news']) * 0.30)
+
+
+def random_location(rng):
+    """Plain record lists (item-count windows), with band edges and empty sources mixed in"""
+    edges = [0.3, 0.4, 0.5, 0.6, 0.7, 0.8]
+
+    def value():
+        return float(rng.choice(edges)) if rng.random() < 0.2 else float(rng.uniform(0, 1))
+
+    def records(max_count, make):
+        return [make() for _ in range(int(rng.integers(0, max_count)))]
+
+    return {
+        'weather': records(3, lambda: {'risk_score': value()}),
+        'traffic': records(12, lambda: {'congestion_level': value(), 'incident_detected': bool(rng.random() < 0.3)}),
+        'social': records(20, lambda: {'sentiment': float(rng.uniform(-1, 1)), 'crisis_keywords': bool(rng.random() < 0.3)}),
+        'news': records(15, lambda: {'severity': value()})
+    }
+
+
+def test_batch_single_and_baseline_agree():
+    print("\n🧪 Testing batch, single-location and baseline scores agree")
+    processor = CUDADataProcessor()
+    rng = np.random.default_rng(7)
+    locations = [random_location(rng) for _ in range(300)]
+
+    batch = processor.process_crisis_detection_batch(locations)
+    for data, batch_result in zip(locations, batch):
+        single = processor.process_crisis_detection(data)
+        for key in ('weather_risk', 'traffic_risk', 'social_risk', 'news_risk', 'crisis_score'):
+            assert np.isclose(single[key], batch_result[key], atol=1e-12), key
+        assert single['risk_level'] == batch_result['risk_level']
+        assert np.isclose(single['weather_risk'], baseline_weather(data['weather']), atol=1e-12)
+        assert np.isclose(single['traffic_risk'], baseline_traffic(data['traffic']), atol=1e-12)
+        assert np.isclose(single['social_risk'], baseline_social(data['social']), atol=1e-12)
+        assert np.isclose(single['news_risk'], baseline_news(data['news']), atol=1e-12)
+        assert np.isclose(single['crisis_score'], baseline_score(data), atol=1e-12)
+    print(f"   ✅ {len(locations)} locations score identically all three ways")
+
+
+def test_levels_from_thresholds():
+    print("\n🧪 Testing risk levels at the thresholds")
+    plan = ScoringRules().plan()
+    scores = [0.0, 0.3499, 0.35, 0.55, 0.7499, 0.75, 1.0]
+    levels = [plan.risk_level(s) for s in scores]
+    assert levels == ['LOW', 'LOW', 'MEDIUM', 'HIGH', 'HIGH', 'CRITICAL', 'CRITICAL']
+    assert [plan.level_names[i] for i in plan.level_index(np.array(scores))] == levels
+    print("   ✅ Thresholds are inclusive, scalar and array paths agree")
+
+
+def test_hot_reload_and_regions():
+    print("\n🧪 Testing hot reload and per-region rules")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        shutil.copy(DEFAULT_RULES_PATH, path)
+        rules = ScoringRules(path, reload_interval=0)
+        assert rules.plan().risk_level(0.5) == 'MEDIUM'
+
+        with open(path) as f:
+            config = json.load(f)
+        config['thresholds']['HIGH'] = 0.45
+        config['regions'] = {'Coastal': {'weights': {'weather': 0.5, 'news': 0.0}}}
+        with open(path, 'w') as f:
+            json.dump(config, f)
+        os.utime(path, (0, 1))
+        assert rules.reload()
+        assert rules.version == 2
+        assert rules.plan().risk_level(0.5) == 'HIGH'
+        assert rules.plan('Coastal').weights['weather'] == 0.5
+        assert rules.plan('Unknown').weights['weather'] == 0.20
+
+        with open(path, 'w') as f:
+            f.write('{"weights": ')
+        os.utime(path, (0, 2))
+        assert not rules.reload()
+        assert rules.version == 2 and rules.plan().risk_level(0.5) == 'HIGH'
+    print("   ✅ Edits swap in, regions override, broken edits keep the last good rules")
+
+
+def test_override_plan_cache_bounded():
+    print("\n🧪 Testing the override plan cache under concurrent use")
+    rules = ScoringRules(plan_cache_size=16)
+    errors = []
+
+    def score(worker):
+        try:
+            for i in range(200):
+                plan = rules.plan(None, {'weights': {'news': (worker * 200 + i) % 64 / 100}})
+                assert plan.weights['news'] == (worker * 200 + i) % 64 / 100
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=score, args=(w,)) for w in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(rules._override_plans) <= 16
+    overrides = {'weights': {'news': 0.9}}
+    assert rules.plan(None, overrides) is rules.plan(None, overrides)
+    assert rules.plan() is rules.plan()
+    print("   ✅ The cache stays within its bound and repeated overrides reuse their plan")
+
+
+if __name__ == "__main__":
+    test_batch_single_and_baseline_agree()
+    test_levels_from_thresholds()
+    test_hot_reload_and_regions()
+    test_override_plan_cache_bounded()
+    print("\n✅ Scoring rules tests complete!")
@@ -0,0 +1,325 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.collector_registry import CollectorRegistry
+from data_pipeline.point_clusters import viewport_bounds
+from data_pipeline.processors import get_processor
+from data_pipeline.scoring_service import ScoringService, ServiceClient, RemoteCollector, serve, RESCORE_SECONDS
+from data_pipeline.serialization import unpack, unpack_records
+from data_pipeline.time_index import TimeIndexedList
+from datetime import datetime
+import threading
+import time
+import numpy as np
+import requests
+
+COORDINATES = {'Paris': (48.8566, 2.3522), 'Tokyo': (35.6762, 139.6503), 'Sydney': (-33.8688, 151.2093)}
+
+
+class FakeCollector:
+    """A collector fed by the test instead of by API polling"""
+
+    def __init__(self, location):
+        self.current_location = location
+        lat, lon = COORDINATES[location]
+        self.location_coords = {'lat': lat, 'lon': lon}
+        self.weather_data = TimeIndexedList()
+        self.traffic_data = TimeIndexedList()
+        self.news_data = TimeIndexedList()
+        self.social_data = TimeIndexedList()
+        self.running = False
+
+    def start_collection(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def get_series(self):
+        return {'weather': self.weather_data, 'traffic': self.traffic_data,
+                'news': self.news_data, 'social': self.social_data}
+
+    def data_version(self):
+        return tuple(series.version for series in self.get_series().values())
+
+    def get_latest_data(self):
+        return {source: list(series[-10:]) for source, series in self.get_series().items()}
+
+    def feed(self, risk=0.5, severity=0.6):
+        now = datetime.now()
+        self.weather_data.append({'timestamp': now, 'risk_score': risk, 'temperature': 21.0, 'precipitation': 0.0})
+        self.news_data.append({'timestamp': now, 'severity': severity, 'title': "Storm warning"})
+        self.traffic_data.append({'timestamp': now, 'congestion_level': 0.4, 'incident_detected': False})
+
+
+class CountingClimate:
+    """Overlay source that counts (slow) simulations"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_climate_overlays(self, coordinates, weather_data, zoom=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {'timestamp': datetime.now().isoformat(), 'radar_layers': {},
+                'flood_zones': {'flood_risk': np.full((4, 4), weather_data['risk_score'])}}
+
+    def simulate_hazards_batch(self, coordinates_list, weather_list, resolution=None):
+        return [{'flood_max_risk': 0.0, 'fire_max_risk': 0.0} for _ in coordinates_list]
+
+
+def make_service(locations=('Paris', 'Tokyo'), delay=0.0):
+    registry = CollectorRegistry(factory=FakeCollector, reap_interval=3600)
+    return ScoringService(locations, registry=registry, climate_collector=CountingClimate(delay))
+
+
+def test_tick_scores_changed_locations():
+    print("\n🧪 Testing scoring passes publish only what changed")
+    service = make_service()
+    collectors = service.registry.collectors()
+    collectors['Paris'].feed(risk=0.9, severity=0.8)
+    collectors['Tokyo'].feed(risk=0.2, severity=0.1)
+    now = time.time()
+
+    assert service.tick(now) == 2
+    status = unpack(service.response('status', 'Paris')[1])
+    expected = get_processor().process_crisis_detection(collectors['Paris'].get_series(), region='Paris')
+    assert status['location'] == 'Paris' and status['crisis_result']['crisis_score'] == expected['crisis_score']
+    assert status['crisis_result']['risk_level'] == expected['risk_level']
+
+    tokyo_etag = service.response('status', 'Tokyo')[0]
+    assert service.tick(now) == 0
+    collectors['Paris'].feed(risk=0.95)
+    assert service.tick(now) == 1
+    assert service.response('status', 'Tokyo')[0] == tokyo_etag
+    history = unpack_records(service.response('history', 'Paris')[1])
+    assert len(history) == 2 and history[-1]['crisis_score'] >= history[0]['crisis_score']
+    assert [row['location'] for row in unpack(service.response('fleet', None)[1])['rows']] == ['Paris', 'Tokyo']
+    service.stop()
+    print("   ✅ Unchanged locations keep their frames; history and fleet follow each pass")
+
+
+def test_quiet_locations_are_rescored():
+    print("\n🧪 Testing scores decay when a feed goes quiet")
+    service = make_service(('Paris',))
+    collector = service.registry.collectors()['Paris']
+    collector.feed(risk=0.9, severity=0.9)
+    start = time.time() // RESCORE_SECONDS * RESCORE_SECONDS
+    assert service.tick(start) == 1
+    first = unpack(service.response('status', 'Paris')[1])
+    assert service.tick(start + RESCORE_SECONDS - 1) == 0  # same window step: a version check only
+
+    later = start + 2 * 3600  # every record has left its risk window
+    assert service.tick(later) == 1
+    status = unpack(service.response('status', 'Paris')[1])
+    assert status['version'] == first['version']
+    assert status['crisis_result']['crisis_score'] < first['crisis_result']['crisis_score']
+    expected = get_processor().process_crisis_detection(collector.get_series(), now=later, region='Paris')
+    assert status['crisis_result']['crisis_score'] == expected['crisis_score']
+    assert len(unpack_records(service.response('history', 'Paris')[1])) == 2
+    service.stop()
+    print("   ✅ Every location is rescored once per window step, new data or not")
+
+
+def test_http_endpoints():
+    print("\n🧪 Testing the HTTP query API")
+    service = make_service(('Paris',))
+    service.registry.collectors()['Paris'].feed()
+    service.tick()
+    server = serve(service, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        client = ServiceClient(base_url)
+        status = client.status('Paris')
+        assert status['crisis_result']['risk_level'] in ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+        assert client.status('Paris') is status  # 304: the cached decode is reused
+        assert len(client.history('Paris')) == 1
+        assert client.fleet()['rows'][0]['location'] == 'Paris'
+        assert client.overlays('Paris')['flood_zones']['flood_risk'].shape == (4, 4)
+
+        assert client.status('Sydney') is None  # 202 while the new location starts collecting
+        assert 'Sydney' in service.locations()
+        assert requests.get(f"{base_url}/nope").status_code == 404
+        assert requests.get(f"{base_url}/status").status_code == 400
+        assert requests.get(f"{base_url}/health").json()['locations'] == ['Paris', 'Sydney']
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+    print("   ✅ Frames with ETags, 202 for new locations, 400/404 for bad requests")
+
+
+def test_overlays_single_flight():
+    print("\n🧪 Testing concurrent overlay requests share one simulation")
+    service = make_service(('Paris',), delay=0.2)
+    collector = service.registry.collectors()['Paris']
+    assert service.response('overlays', 'Paris') is None  # no weather yet
+    collector.feed(risk=0.3)
+
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(service.response('overlays', 'Paris', 10)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.climate_collector.calls == 1
+    assert len({etag for etag, _ in responses}) == 1
+
+    collector.feed(risk=0.7)
+    etag, body = service.response('overlays', 'Paris', 10)
+    assert service.climate_collector.calls == 2 and etag != responses[0][0]
+    assert unpack(body)['flood_zones']['flood_risk'][0, 0] == 0.7
+    service.response('overlays', 'Paris', 10)
+    assert service.climate_collector.calls == 2
+    service.stop()
+    print("   ✅ One simulation per weather version, however many readers arrive at once")
+
+
+def test_overlay_for_unwatched_location():
+    print("\n🧪 Testing overlays for a location unwatched mid-request")
+    service = make_service(('Paris',))
+    service.registry.collectors()['Paris'].feed()
+    service.stop()
+    assert service._overlay_response('Paris', None) is None
+    print("   ✅ No KeyError; the request is answered as still collecting")
+
+
+def add_incidents(collector, n, seed=0):
+    rng = np.random.default_rng(seed)
+    lat, lon = COORDINATES[collector.current_location]
+    collector.traffic_data.extend([
+        {'timestamp': datetime.now(), 'lat': lat + rng.normal(0, 0.03), 'lon': lon + rng.normal(0, 0.03),
+         'congestion_level': rng.uniform(0, 1), 'incident_detected': True, 'location': f"Road {i}"}
+        for i in range(n)
+    ])
+
+
+def test_incident_clusters_are_served():
+    print("\n🧪 Testing incident clusters over the whole traffic series")
+    service = make_service(('Paris',))
+    collector = service.registry.collectors()['Paris']
+    collector.feed()
+    add_incidents(collector, 2000)
+    service.tick()
+    index = service._incidents['Paris']
+    added = []
+    original_add = index._add
+
+    def counting_add(lat, lon, item):
+        added.append(item)
+        original_add(lat, lon, item)
+    index._add = counting_add
+
+    etag, body = service.response('clusters', 'Paris', 10)
+    assert sum(c['count'] for c in unpack(body)) == 2000
+    assert service.response('clusters', 'Paris', 10)[0] == etag  # encoded once per traffic version
+
+    add_incidents(collector, 500, seed=1)
+    service.tick()
+    assert len(added) == 500 and len(index) == 2500  # only the new records are indexed
+    etag2, body = service.response('clusters', 'Paris', 10)
+    assert etag2 != etag and sum(c['count'] for c in unpack(body)) == 2500
+
+    server = serve(service, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        remote = RemoteCollector(ServiceClient(f"http://127.0.0.1:{server.server_address[1]}"), 'Paris')
+        view = remote.incident_clusters(viewport_bounds(*COORDINATES['Paris'], 10), 10)
+        assert sum(c['count'] for c in view) == 2500
+        assert remote.incident_clusters(viewport_bounds(0.0, 0.0, 10), 10) == []
+        assert remote.incident_clusters(viewport_bounds(*COORDINATES['Paris'], 10), 10) == view
+        assert requests.get(f"http://127.0.0.1:{server.server_address[1]}/clusters?location=Paris").status_code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+    print("   ✅ The service indexes new incidents each pass; readers keep the clusters in their view")
+
+
+def test_congestion_grid_is_served():
+    print("\n🧪 Testing the congestion surface accumulates in the service")
+    service = make_service(('Paris',))
+    collector = service.registry.collectors()['Paris']
+    add_incidents(collector, 300)
+    service.tick()
+    grid = service._congestion['Paris']
+    first = unpack(service.response('congestion', 'Paris')[1])
+    assert first['samples'].sum() == 300
+
+    add_incidents(collector, 200, seed=1)
+    service.tick()
+    assert service._congestion['Paris'] is grid  # folded in, not rebuilt
+    cells = unpack(service.response('congestion', 'Paris')[1])
+    assert cells['samples'].sum() == 500 and cells['incidents'].sum() == 500
+    assert np.allclose(cells['congestion'], grid.cells()['congestion'])
+
+    server = serve(service, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        remote = RemoteCollector(ServiceClient(f"http://127.0.0.1:{server.server_address[1]}"), 'Paris')
+        served = remote.congestion_cells()
+        assert np.array_equal(served['q'], cells['q']) and served['samples'].sum() == 500
+        features = remote.congestion_grid.geojson(served)['features']
+        assert len(features) == len(served['q'])
+        assert len(RemoteCollector(remote.client, 'Tokyo').congestion_cells()['q']) == 0  # not collected yet
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+    print("   ✅ Rolling means and counts build up across passes; readers draw the published cells")
+
+
+def test_dashboard_reads_through_the_service():
+    print("\n🧪 Testing the dashboard is a thin reader in service mode")
+    from visualization.dashboard import DynamicCrisisDashboard, risk_trend, time_series
+    service = make_service(('Paris',))
+    collector = service.registry.collectors()['Paris']
+    collector.feed(risk=0.4)
+    service.tick()
+    collector.feed(risk=0.6)
+    service.tick()
+    server = serve(service, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    previous = os.environ.get('RTACC_SERVICE_URL')
+    os.environ['RTACC_SERVICE_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        dashboard = DynamicCrisisDashboard()
+        dashboard.set_location('Paris')
+        assert dashboard.climate_collector is None and dashboard.climate_map.climate_collector is None
+
+        overlays = dashboard.climate_overlays((48.85, 2.35), {'risk_score': 0.0})
+        assert np.allclose(overlays['flood_zones']['flood_risk'], 0.6)  # the service's weather, not ours
+        dashboard.climate_overlays((48.85, 2.35), {}, zoom=None)
+        assert service.climate_collector.calls == 1
+
+        records, field = risk_trend(dashboard)
+        assert field == 'crisis_score' and len(records) == 2
+        times, scores = time_series(records, field)
+        assert (np.diff(times) >= 0).all() and np.allclose(scores, [r['crisis_score'] for r in service._history['Paris']])
+    finally:
+        if previous is None:
+            os.environ.pop('RTACC_SERVICE_URL', None)
+        else:
+            os.environ['RTACC_SERVICE_URL'] = previous
+        server.shutdown()
+        server.server_close()
+        service.stop()
+    print("   ✅ Overlays and the risk trend come from the service's cached responses")
+
+
+if __name__ == "__main__":
+    test_tick_scores_changed_locations()
+    test_quiet_locations_are_rescored()
+    test_http_endpoints()
+    test_overlays_single_flight()
+    test_overlay_for_unwatched_location()
+    test_incident_clusters_are_served()
+    test_congestion_grid_is_served()
+    test_dashboard_reads_through_the_service()
+    print("\n✅ Scoring service tests complete!")
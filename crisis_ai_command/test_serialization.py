@@ -0,0 +1,126 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.serialization import pack, unpack, pack_records, unpack_records, unpack_columns, ALIGNMENT
+from data_pipeline.hazard_stack import HazardRasterStack
+from data_pipeline.data_sources import RealTimeDataCollector
+from datetime import datetime, timedelta
+import tempfile
+import numpy as np
+
+
+def test_pack_unpack_roundtrip():
+    print("\n🧪 Testing pack/unpack roundtrip")
+    value = {
+        'grid': np.arange(12, dtype=np.float32).reshape(3, 4),
+        'levels': np.array([1, 2, 3], dtype=np.int8),
+        'empty': np.zeros((0, 5)),
+        'nested': {'ranges': [np.linspace(0, 1, 7), np.array([True, False])], 'name': 'flood'},
+        'hotspot': (29.76, -95.37),
+        'generated': datetime(2024, 5, 1, 12, 30, 15),
+        'count': np.int64(7),
+        'score': 0.42,
+        'flag': None
+    }
+    restored = unpack(pack(value))
+
+    assert np.array_equal(restored['grid'], value['grid']) and restored['grid'].dtype == np.float32
+    assert np.array_equal(restored['levels'], value['levels']) and restored['levels'].dtype == np.int8
+    assert restored['empty'].shape == (0, 5)
+    assert np.array_equal(restored['nested']['ranges'][0], value['nested']['ranges'][0])
+    assert restored['nested']['ranges'][1].tolist() == [True, False]
+    assert restored['nested']['name'] == 'flood'
+    assert restored['hotspot'] == (29.76, -95.37) and isinstance(restored['hotspot'], tuple)
+    assert restored['generated'] == value['generated']
+    assert restored['count'] == 7 and restored['score'] == 0.42 and restored['flag'] is None
+    print("   ✅ Arrays keep dtype and shape; tuples, datetimes and scalars survive")
+
+
+def test_zero_copy_views():
+    print("\n🧪 Testing arrays are aligned, read-only views of the frame")
+    frame = pack({'a': np.arange(5, dtype=np.uint8), 'b': np.ones((64, 64))})
+    restored = unpack(memoryview(frame))
+    assert not restored['b'].flags.writeable and not restored['b'].flags.owndata
+    address = restored['b'].__array_interface__['data'][0] - np.frombuffer(frame, np.uint8).__array_interface__['data'][0]
+    assert address % ALIGNMENT == 0
+    print("   ✅ No copies on read, every buffer on a 64-byte boundary")
+
+
+def test_rejects_bad_input():
+    print("\n🧪 Testing invalid values and frames are refused")
+    for bad in ({1: 'int key'}, {'objects': np.array([object()])}, {'set': {1, 2}}):
+        try:
+            pack(bad)
+            assert False, bad
+        except TypeError:
+            pass
+    for frame in (b'NOTAFRAME' + b'\0' * 16, pack_records([{'a': 1}])):
+        try:
+            unpack(frame)
+            assert False
+        except ValueError:
+            pass
+    print("   ✅ TypeError on unserializable values, ValueError on foreign frames")
+
+
+def test_record_batches():
+    print("\n🧪 Testing columnar record batches")
+    start = datetime(2024, 5, 1, 8, 0, 0)
+    records = [
+        {'timestamp': start, 'congestion_level': 0.4, 'incident_detected': False, 'road': 'I-45', 'speed': 55},
+        {'timestamp': start + timedelta(minutes=5), 'congestion_level': None, 'incident_detected': True,
+         'road': None, 'speed': 12, 'extra': {'lanes': [1, 2]}},
+        {'timestamp': start + timedelta(minutes=10), 'congestion_level': 0.9, 'incident_detected': True,
+         'road': 'Ünterführung', 'speed': 8}
+    ]
+    restored = unpack_records(pack_records(records))
+    assert len(restored) == 3
+    for original, copy in zip(records, restored):
+        for key, value in original.items():
+            assert copy[key] == value, key
+    assert restored[0]['extra'] is None
+
+    _, columns = unpack_columns(pack_records(records))
+    assert columns['congestion_level'].dtype == np.float64 and np.isnan(columns['congestion_level'][1])
+    assert columns['speed'].dtype == np.int64 and columns['incident_detected'].dtype == np.bool_
+    assert unpack_records(pack_records([])) == []
+    print("   ✅ Typed columns, missing values and UTF-8 strings roundtrip")
+
+
+def test_collector_and_stack_snapshots():
+    print("\n🧪 Testing collector and hazard stack snapshots")
+    collector = RealTimeDataCollector("Paris")
+    now = datetime.now()
+    for minutes in range(10):
+        collector.traffic_data.append({'timestamp': now - timedelta(minutes=10 - minutes),
+                                       'congestion_level': minutes / 10, 'incident_detected': minutes % 3 == 0})
+        collector.news_data.append({'timestamp': now - timedelta(minutes=10 - minutes), 'severity': 0.1 * minutes,
+                                    'title': f"Story {minutes}"})
+    snapshot = collector.export_snapshot()
+
+    restored = RealTimeDataCollector("Paris")
+    assert restored.import_snapshot(snapshot) == "Paris"
+    assert list(restored.traffic_data) == list(collector.traffic_data)
+    assert list(restored.news_data) == list(collector.news_data)
+    assert len(restored.get_window('traffic', 5, now=now)) == len(collector.get_window('traffic', 5, now=now))
+
+    lat_range = np.linspace(0, 1, 16)
+    stack = HazardRasterStack(lat_range, lat_range, {'flood': np.eye(16), 'wildfire': np.full((16, 16), 0.2)},
+                              {'wildfire': 0.5})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stack.bin')
+        stack.save(path)
+        loaded = HazardRasterStack.load(path)
+    assert loaded.names == stack.names and loaded.weights == stack.weights
+    assert np.array_equal(loaded.composite, stack.composite) and np.array_equal(loaded.dominant, stack.dominant)
+    print("   ✅ History and hazard stacks restore exactly")
+
+
+if __name__ == "__main__":
+    test_pack_unpack_roundtrip()
+    test_zero_copy_views()
+    test_rejects_bad_input()
+    test_record_batches()
+    test_collector_and_stack_snapshots()
+    print("\n✅ Serialization tests complete!")
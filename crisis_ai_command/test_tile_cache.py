@@ -0,0 +1,124 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline import tile_cache
+from data_pipeline.tile_cache import TileCache, lat_lon_to_tile, tile_bounds, neighbour_tiles
+import tempfile
+import time
+import requests
+
+
+class FakeTileServer:
+    """Stands in for requests.get: serves fixed-size tiles, or fails when told to"""
+
+    def __init__(self, size=1000):
+        self.size = size
+        self.calls = []
+        self.failing = False
+
+    def __call__(self, url, timeout=None):
+        self.calls.append(url)
+        if self.failing:
+            raise requests.ConnectionError("tile server down")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'\x89PNG' + b'\0' * (self.size - 4)
+        return response
+
+
+def with_server(test):
+    def run():
+        server = FakeTileServer()
+        original = tile_cache.requests.get
+        tile_cache.requests.get = server
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                test(server, tmp)
+        finally:
+            tile_cache.requests.get = original
+    run.__name__ = test.__name__
+    return run
+
+
+def test_tile_math():
+    print("\n🧪 Testing slippy-map tile math")
+    for lat, lon in ((48.8566, 2.3522), (-33.87, 151.21), (64.1, -21.9)):
+        z, x, y = lat_lon_to_tile(lat, lon, 10)
+        bounds = tile_bounds(z, x, y)
+        assert bounds['south'] <= lat <= bounds['north'] and bounds['west'] <= lon <= bounds['east']
+    assert lat_lon_to_tile(90.0, 180.0, 3) == (3, 7, 0)
+
+    ring = neighbour_tiles(4, 0, 5, radius=1, zoom_delta=1)
+    assert (4, 15, 5) in ring  # wraps across the antimeridian
+    assert (3, 0, 2) in ring and (5, 1, 11) in ring
+    assert len(ring) == 8 + 1 + 4
+    print("   ✅ Points fall inside their tile; neighbours wrap and span zoom levels")
+
+
+@with_server
+def test_lru_eviction_by_bytes(server, root):
+    print("\n🧪 Testing byte-bounded LRU eviction")
+    cache = TileCache(root=root, max_bytes=3500, api_key='test')
+    for x in range(3):
+        assert cache.fetch('precipitation', 8, x, 0)
+    cache.get_cached('precipitation', 8, 0, 0)  # touch the oldest so it survives
+    cache.fetch('precipitation', 8, 3, 0)
+
+    assert cache.get_cached('precipitation', 8, 1, 0) is None
+    assert not os.path.exists(os.path.join(root, 'precipitation', '8', '1', '0.png'))
+    assert cache.get_cached('precipitation', 8, 0, 0) is not None
+    assert cache.stats()['bytes'] == 3000
+    print("   ✅ The least recently used tile is dropped from the index and the disk")
+
+
+@with_server
+def test_ttl_and_stale_fallback(server, root):
+    print("\n🧪 Testing TTL refresh and stale fallback")
+    cache = TileCache(root=root, api_key='test', ttl={'precipitation': 0.05}, retry_after=60)
+    path = cache.get('precipitation', 8, 1, 1)
+    assert path and cache.is_fresh('precipitation', 8, 1, 1)
+    assert cache.get('precipitation', 8, 1, 1) == path and len(server.calls) == 1
+
+    time.sleep(0.1)
+    server.failing = True
+    assert not cache.is_fresh('precipitation', 8, 1, 1)
+    assert cache.get('precipitation', 8, 1, 1) == path
+    assert cache.get('precipitation', 8, 1, 1) == path
+    assert len(server.calls) == 2  # the failure is not retried before retry_after
+    print("   ✅ Stale tiles are served while the server is down, without hammering it")
+
+
+@with_server
+def test_index_rebuilt_from_disk(server, root):
+    print("\n🧪 Testing the index survives a restart")
+    first = TileCache(root=root, api_key='test')
+    for y in range(4):
+        first.fetch('wind', 6, 2, y)
+    second = TileCache(root=root, max_bytes=2500, api_key='test')
+    assert second.stats()['tiles'] == 2
+    assert second.get_cached('wind', 6, 2, 3) is not None
+    print("   ✅ Tiles on disk are re-indexed (and trimmed to the new size limit)")
+
+
+@with_server
+def test_prefetch_neighbourhood(server, root):
+    print("\n🧪 Testing background prefetch")
+    cache = TileCache(root=root, api_key='test')
+    queued = cache.prefetch('temperature', 8, 10, 10, radius=1, zoom_delta=0)
+    cache.prefetch('temperature', 8, 10, 10, radius=1, zoom_delta=0)  # in flight or fresh: skipped
+    cache._executor.shutdown(wait=True)
+    assert queued == 9
+    assert all(cache.is_fresh('temperature', 8, 10 + dx, 10 + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+    assert len(server.calls) == 9
+    assert TileCache(root=root, api_key=None).prefetch('temperature', 8, 10, 10) == 0
+    print("   ✅ The view and its ring are fetched once each; no key means no requests")
+
+
+if __name__ == "__main__":
+    test_tile_math()
+    test_lru_eviction_by_bytes()
+    test_ttl_and_stale_fallback()
+    test_index_rebuilt_from_disk()
+    test_prefetch_neighbourhood()
+    print("\n✅ Tile cache tests complete!")
@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_pipeline.time_index import TimeIndexedList
+from data_pipeline.processors import CUDADataProcessor
+from datetime import datetime, timedelta
+
+START = datetime(2026, 1, 1, 12, 0)
+
+
+def minutes_series(count, **fields):
+    """One record per minute from START"""
+    return TimeIndexedList([dict(fields, timestamp=START + timedelta(minutes=i), value=i) for i in range(count)])
+
+
+def values(records):
+    return [r['value'] for r in records]
+
+
+def test_window_queries():
+    print("\n🧪 Testing time-window queries")
+    series = minutes_series(60)
+
+    assert values(series.window(START + timedelta(minutes=10), START + timedelta(minutes=12))) == [10, 11, 12]
+    assert values(series.since(timedelta(minutes=5), now=START + timedelta(minutes=59))) == [54, 55, 56, 57, 58, 59]
+    assert series.count_since(300, now=START + timedelta(minutes=59)) == 6
+    assert series.window(START + timedelta(hours=2)) == []
+    assert series.latest_time() == START + timedelta(minutes=59)
+    print("   ✅ window / since / count_since match the timestamps")
+
+
+def test_out_of_order_clamped():
+    print("\n🧪 Testing out-of-order appends")
+    series = minutes_series(3)
+    series.append({'timestamp': START, 'value': 'late'})
+    assert series.epoch_times().tolist() == sorted(series.epoch_times().tolist())
+    assert values(series.since(0, now=START + timedelta(minutes=2))) == [2, 'late']
+    print("   ✅ Late records are clamped to the newest timestamp, index stays sorted")
+
+
+def test_mutations_keep_index_in_sync():
+    print("\n🧪 Testing list mutations keep the index in sync")
+    series = minutes_series(10)
+    version = series.version
+
+    del series[:3]
+    series.pop(0)
+    series.remove(series[0])
+    assert values(series) == [5, 6, 7, 8, 9]
+    assert values(series.window(START, START + timedelta(minutes=6))) == [5, 6]
+
+    series[0] = {'timestamp': START + timedelta(minutes=30), 'value': 'moved'}
+    # Assigned out of order: clamped forward, so everything after it shares its timestamp
+    assert values(series.window(START, START + timedelta(minutes=29))) == []
+
+    series += [{'timestamp': START + timedelta(minutes=40), 'value': 40}]
+    series.insert(0, {'timestamp': START, 'value': 0})
+    assert values(series.window(START, START)) == [0]
+    assert values(series.window(START + timedelta(minutes=40))) == [40]
+
+    assert len(series._times) == len(series)
+    assert series.version > version
+    print("   ✅ del / pop / remove / setitem / insert / += all re-sync the index")
+
+
+def test_windowed_risk_ages_out():
+    print("\n🧪 Testing time-windowed risk ages out old news")
+    processor = CUDADataProcessor()
+    news = minutes_series(5, severity=0.9)
+    data = {'news': news}
+
+    fresh = processor.process_crisis_detection(data, now=START + timedelta(minutes=5))
+    later = processor.process_crisis_detection(data, now=START + timedelta(days=2))
+    print(f"   News risk fresh: {fresh['news_risk']:.3f}  two days later: {later['news_risk']:.3f}")
+    assert fresh['news_risk'] > 0.7
+    assert later['news_risk'] == 0.05
+    print("   ✅ Severe news outside the window no longer counts")
+
+
+if __name__ == "__main__":
+    test_window_queries()
+    test_out_of_order_clamped()
+    test_mutations_keep_index_in_sync()
+    test_windowed_risk_ages_out()
+    print("\n✅ Time index tests complete!")
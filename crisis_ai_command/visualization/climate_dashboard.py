@@ -1,3 +1,5 @@
+import base64
+import os
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
@@ -5,12 +7,41 @@ from plotly.subplots import make_subplots
 import numpy as np
 from data_pipeline.climate_sources import ClimateDataCollector
 
+# Hazard cells below this composite risk are not sent to the browser
+RISK_FLOOR = 0.05
+
+# Per-figure payload budget; gridded layers are coarsened until they fit
+PAYLOAD_BUDGET_BYTES = int(os.getenv('RTACC_MAP_PAYLOAD_BUDGET', 1_000_000))
+
+# Approximate serialized size of one map point (lat, lon, value and a short label)
+BYTES_PER_POINT = 48
+
+
+def point_budget(budget_bytes=None):
+    """Map points that fit in a figure's payload budget"""
+    return (budget_bytes or PAYLOAD_BUDGET_BYTES) // BYTES_PER_POINT
+
+
+def _coarsest_fitting(view_at, n_levels, start_level, count, max_points):
+    """First view from start_level upwards whose point count fits max_points"""
+    view = view_at(start_level)
+    level = start_level
+    while count(view) > max_points and level + 1 < n_levels:
+        level += 1
+        view = view_at(level)
+    return view
+
 class ClimateCrisisMap:
-    def __init__(self):
-        self.climate_collector = ClimateDataCollector()
+    def __init__(self, climate_collector=None, simulate=True):
+        # Without simulate (scoring service mode) no collector is built and overlays are passed in
+        self.climate_collector = climate_collector or (ClimateDataCollector() if simulate else None)
         
-    def create_enhanced_crisis_map(self, coordinates, latest_data, crisis_result):
-        """Create crisis map with real-time climate overlays"""
+    def create_enhanced_crisis_map(self, coordinates, latest_data, crisis_result, zoom=10, overlays=None):
+        """Create crisis map with real-time climate overlays
+        
+        overlays: get_climate_overlays() output computed elsewhere (e.g. read
+        from the scoring service); simulated here when not given.
+        """
         lat, lon = coordinates
         
         # Base crisis map
@@ -27,15 +58,13 @@ class ClimateCrisisMap:
         
         # Get climate overlay data
         weather_data = latest_data.get('weather', [{}])[-1] if latest_data.get('weather') else {}
-        climate_overlays = self.climate_collector.get_climate_overlays(coordinates, weather_data)
-        
-        # Add flood zones if present
-        if 'flood_zones' in climate_overlays:
-            self._add_flood_overlay(fig, climate_overlays['flood_zones'])
+        climate_overlays = overlays if overlays is not None else self.climate_collector.get_climate_overlays(
+            coordinates, weather_data, zoom=zoom
+        )
         
-        # Add wildfire zones if present  
-        if 'wildfire_zones' in climate_overlays:
-            self._add_wildfire_overlay(fig, climate_overlays['wildfire_zones'])
+        # Add one composite layer for every hazard present (flood, wildfire)
+        if 'hazard_view' in climate_overlays:
+            self._add_hazard_overlay(fig, climate_overlays['hazard_view'], climate_overlays.get('hazard_stack'))
         
         # Add weather radar visualization
         self._add_weather_patterns(fig, coordinates, weather_data)
@@ -45,7 +74,8 @@ class ClimateCrisisMap:
             mapbox=dict(
                 style="open-street-map",
                 center=dict(lat=lat, lon=lon),
-                zoom=10
+                zoom=zoom,
+                layers=self._radar_image_layers(coordinates)
             ),
             showlegend=True,
             title="🌪️ Real-Time Climate Crisis Visualization",
@@ -54,41 +84,136 @@ class ClimateCrisisMap:
         
         return fig
     
-    def _add_flood_overlay(self, fig, flood_data):
-        """Add flood risk heatmap overlay"""
-        lat_range = flood_data['lat_range']
-        lon_range = flood_data['lon_range'] 
-        flood_risk = np.array(flood_data['flood_risk'])
+    def _add_hazard_overlay(self, fig, hazard_view, hazard_stack=None, max_points=None):
+        """Add composite hazard heatmap, attributing each cell to its dominant hazard
+        
+        Only cells at or above RISK_FLOOR are sent. If they exceed the point
+        budget, coarser pyramid levels of hazard_stack are used until they fit.
+        """
+        max_points = max_points or point_budget()
+        if hazard_stack is not None:
+            hazard_view = _coarsest_fitting(
+                lambda level: hazard_stack.view(level=level),
+                len(hazard_stack.pyramid.levels),
+                hazard_view['pyramid_level'],
+                lambda view: int(np.count_nonzero(np.asarray(view['composite']) >= RISK_FLOOR)),
+                max_points
+            )
+        
+        composite = np.asarray(hazard_view['composite'])
+        rows, cols = np.nonzero(composite >= RISK_FLOOR)
+        if rows.size == 0:
+            return
+        
+        # Name of the dominant hazard per cell for the hover label
+        labels = np.array([name.title() for name in hazard_view['names']] + ['None'])
+        dominant = np.asarray(hazard_view['dominant'], dtype=np.int64)[rows, cols]
         
-        # Create flood risk contour
         fig.add_trace(go.Densitymapbox(
-            lat=np.repeat(lat_range, len(lon_range)),
-            lon=np.tile(lon_range, len(lat_range)),
-            z=flood_risk.flatten(),
-            colorscale=[[0, 'rgba(0,0,255,0)'], [0.5, 'rgba(0,100,255,0.3)'], [1, 'rgba(0,0,255,0.7)']],
+            lat=np.round(np.asarray(hazard_view['lat_range'])[rows], 5),
+            lon=np.round(np.asarray(hazard_view['lon_range'])[cols], 5),
+            z=np.round(composite[rows, cols], 3),
+            customdata=labels[np.where(dominant < 0, len(labels) - 1, dominant)],
+            zmin=0,
+            zmax=1,
+            colorscale=[[0, 'rgba(255,255,0,0)'], [0.4, 'rgba(255,140,0,0.4)'], [1, 'rgba(139,0,0,0.8)']],
             showscale=True,
-            colorbar=dict(title="Flood Risk", x=0.02),
-            name="Flood Zones",
-            hovertemplate="Flood Risk: %{z:.2f}<extra></extra>"
+            colorbar=dict(title="Hazard", x=0.98),
+            name="Hazard Zones",
+            hovertemplate="Hazard: %{z:.2f}<br>Dominant: %{customdata}<extra></extra>"
         ))
     
-    def _add_wildfire_overlay(self, fig, fire_data):
-        """Add wildfire spread simulation"""
-        lat_range = fire_data['lat_range']
-        lon_range = fire_data['lon_range']
-        fire_risk = np.array(fire_data['fire_risk'])
+    def create_fire_spread_animation(self, coordinates, fire_data, max_points=None):
+        """Animate the simulated fire front step by step from its arrival-time map
         
-        # Create fire risk heatmap
-        fig.add_trace(go.Densitymapbox(
-            lat=np.repeat(lat_range, len(lon_range)),
-            lon=np.tile(lon_range, len(lat_range)),
-            z=fire_risk.flatten(),
-            colorscale=[[0, 'rgba(255,165,0,0)'], [0.5, 'rgba(255,69,0,0.4)'], [1, 'rgba(139,0,0,0.8)']],
-            showscale=True,
-            colorbar=dict(title="Fire Risk", x=0.98),
-            name="Wildfire Zones",
-            hovertemplate="Fire Risk: %{z:.2f}<extra></extra>"
-        ))
+        Frames are cumulative, so the burned cells of every frame count
+        against the payload budget; coarser pyramid levels are used until they fit.
+        """
+        lat, lon = coordinates
+        step_minutes = fire_data['step_minutes']
+        horizon = step_minutes * fire_data['steps']
+        times = [step_minutes * (k + 1) for k in range(fire_data['steps'])]
+        
+        if 'pyramid' in fire_data:
+            pyramid = fire_data['pyramid']
+            fire_data = _coarsest_fitting(
+                lambda level: pyramid.view(level=level),
+                len(pyramid.levels),
+                fire_data.get('pyramid_level', 0),
+                lambda view: sum(int(np.count_nonzero(view['arrival_time'] <= t)) for t in times),
+                max_points or point_budget()
+            )
+        
+        arrival_time = np.asarray(fire_data['arrival_time'])
+        lat_range = np.round(np.asarray(fire_data['lat_range']), 5)
+        lon_range = np.round(np.asarray(fire_data['lon_range']), 5)
+        
+        def front_trace(minutes):
+            rows, cols = np.nonzero(arrival_time <= minutes)
+            return go.Scattermapbox(
+                lat=lat_range[rows],
+                lon=lon_range[cols],
+                mode='markers',
+                marker=dict(
+                    size=8,
+                    color=np.round(arrival_time[rows, cols], 1),
+                    colorscale='YlOrRd_r',
+                    cmin=0,
+                    cmax=horizon,
+                    colorbar=dict(title="Arrival (min)")
+                ),
+                name=f"Fire front +{minutes:.0f} min",
+                hovertemplate="Fire arrives in %{marker.color:.0f} min<extra></extra>"
+            )
+        
+        frames = [go.Frame(data=[front_trace(t)], name=f"{t:.0f}") for t in times]
+        
+        fig = go.Figure(data=[front_trace(times[0])], frames=frames)
+        fig.update_layout(
+            mapbox=dict(style="open-street-map", center=dict(lat=lat, lon=lon), zoom=12),
+            title="🔥 Simulated Fire Spread",
+            height=500,
+            updatemenus=[dict(
+                type='buttons',
+                showactive=False,
+                buttons=[dict(label='▶ Play', method='animate',
+                              args=[None, dict(frame=dict(duration=500, redraw=True), fromcurrent=True)])]
+            )],
+            sliders=[dict(
+                currentvalue=dict(prefix="Minutes: "),
+                steps=[dict(method='animate', label=f"{t:.0f}",
+                            args=[[f"{t:.0f}"], dict(mode='immediate', frame=dict(duration=0, redraw=True))])
+                       for t in times]
+            )]
+        )
+        return fig
+    
+    def _radar_image_layers(self, coordinates, layer='precipitation', opacity=0.6):
+        """Mapbox image layers for the cached radar tiles around the view"""
+        image_layers = []
+        if self.climate_collector is None:
+            # Tiles are cached on the scoring service's disk, not this one
+            return image_layers
+        for tile in self.climate_collector.radar_tiles(coordinates, layer):
+            try:
+                with open(tile['path'], 'rb') as f:
+                    encoded = base64.b64encode(f.read()).decode('ascii')
+            except OSError:
+                continue
+            bounds = tile['bounds']
+            image_layers.append(dict(
+                sourcetype='image',
+                source=f"data:image/png;base64,{encoded}",
+                coordinates=[
+                    [bounds['west'], bounds['north']],
+                    [bounds['east'], bounds['north']],
+                    [bounds['east'], bounds['south']],
+                    [bounds['west'], bounds['south']]
+                ],
+                opacity=opacity,
+                below='traces'
+            ))
+        return image_layers
     
     def _add_weather_patterns(self, fig, coordinates, weather_data):
         """Add animated weather pattern visualization"""
@@ -100,28 +225,27 @@ class ClimateCrisisMap:
             wind_speed = weather_data['wind_speed']
             
             # Create wind arrows in grid pattern
-            arrow_positions = []
-            for i in range(-2, 3):
-                for j in range(-2, 3):
-                    arrow_lat = lat + i * 0.02
-                    arrow_lon = lon + j * 0.02
-                    arrow_positions.append((arrow_lat, arrow_lon))
+            offsets = np.arange(-2, 3) * 0.02
+            arrow_lat, arrow_lon = np.meshgrid(lat + offsets, lon + offsets, indexing='ij')
+            arrow_lat, arrow_lon = arrow_lat.ravel(), arrow_lon.ravel()
+            
+            # Calculate arrow end points based on wind direction
+            arrow_length = wind_speed * 0.001
+            end_lat = arrow_lat + arrow_length * np.cos(np.radians(wind_dir))
+            end_lon = arrow_lon + arrow_length * np.sin(np.radians(wind_dir))
             
-            for arrow_lat, arrow_lon in arrow_positions:
-                # Calculate arrow end point based on wind direction
-                arrow_length = wind_speed * 0.001
-                end_lat = arrow_lat + arrow_length * np.cos(np.radians(wind_dir))
-                end_lon = arrow_lon + arrow_length * np.sin(np.radians(wind_dir))
-                
-                fig.add_trace(go.Scattermapbox(
-                    lat=[arrow_lat, end_lat],
-                    lon=[arrow_lon, end_lon],
-                    mode='lines+markers',
-                    line=dict(color='white', width=2),
-                    marker=dict(size=[0, 10], symbol=['circle', 'triangle-up'], color='white'),
-                    showlegend=False,
-                    hoverinfo='skip'
-                ))
+            # All arrows in one trace: start, end, gap (None breaks the line between arrows)
+            n = arrow_lat.size
+            gap = np.full(n, None)
+            fig.add_trace(go.Scattermapbox(
+                lat=np.column_stack([arrow_lat, end_lat, gap]).ravel(),
+                lon=np.column_stack([arrow_lon, end_lon, gap]).ravel(),
+                mode='lines+markers',
+                line=dict(color='white', width=2),
+                marker=dict(size=[0, 10, 0] * n, symbol=['circle', 'triangle-up', 'circle'] * n, color='white'),
+                showlegend=False,
+                hoverinfo='skip'
+            ))
         
         # Precipitation intensity circles
         if 'precipitation' in weather_data and weather_data['precipitation'] > 0:
@@ -6,12 +6,19 @@ import numpy as np
 from datetime import datetime, timedelta
 import sys
 import os
+import time
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from data_pipeline.data_sources import RealTimeDataCollector
-from data_pipeline.processors import CUDADataProcessor
+from data_pipeline.collector_registry import get_collector_registry
+from data_pipeline.downsampling import downsample, target_points
+from data_pipeline.fleet import get_fleet_monitor
+from data_pipeline.point_clusters import viewport_bounds
+from data_pipeline.processors import get_processor
+from data_pipeline.resource_allocation import unit_pool
+from data_pipeline.scoring_service import RemoteCollector, ServiceClient
+from data_pipeline.profiling import PROFILER, RELEASE, profiled, rolling_summary
 # Import new climate visualization components
 try:
     from data_pipeline.climate_sources import ClimateDataCollector
@@ -21,29 +28,76 @@ except ImportError:
     CLIMATE_FEATURES_AVAILABLE = False
     st.warning("⚠️ Climate visualization features not available. Create climate_sources.py and climate_dashboard.py to enable.")
 
+# Seconds between refreshes of each live part of the page when auto-refresh is on.
+# Each part is a Streamlit fragment, so it reruns alone without rebuilding the rest.
+REFRESH_SECONDS = {
+    'banner': 30,
+    'overview': 30,
+    'map': 60,
+    'climate': 120,
+    'analytics': 60,
+    'resources': 60,
+    'fleet': 30,
+    'diagnostics': 30
+}
+
+# Per-render stages shown in the diagnostics panel (?diagnostics=1), by profiler stage name
+DIAGNOSTIC_STAGES = {
+    'render.fetch': "Data fetch",
+    'render.scoring': "Scoring",
+    'climate.get_climate_overlays': "Overlays",
+    'render.figure': "Figure build",
+    'render.serialize': "Figure serialize"
+}
+
+# Locations with no new record for this long are flagged as stale in the fleet overview
+STALE_SECONDS = 900
+
+LEVEL_ORDER = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+
 class DynamicCrisisDashboard:
     def __init__(self):
-        self.processor = CUDADataProcessor()
+        # Processor and collectors are shared by every session in the process
+        self.processor = get_processor()
         self.current_location = "Washington, DC, USA"  # Default location
         self.collector = None
+        self.lease = None
+        # With RTACC_SERVICE_URL set, collection and scoring run in the headless service
+        self.service = ServiceClient() if os.getenv('RTACC_SERVICE_URL') else None
         self.location_coordinates = {}
         
-        # Initialize climate components if available
+        # Initialize climate components if available; in service mode the service simulates overlays
         if CLIMATE_FEATURES_AVAILABLE:
-            self.climate_collector = ClimateDataCollector()
-            self.climate_map = ClimateCrisisMap()
+            self.climate_collector = None if self.service else ClimateDataCollector()
+            self.climate_map = ClimateCrisisMap(self.climate_collector, simulate=not self.service)
         
     def set_location(self, location):
-        """Update the current location and reinitialize data collector"""
+        """Update the current location and attach to its shared data collector"""
         self.current_location = location
-        if self.collector:
-            self.collector.running = False
-        self.collector = RealTimeDataCollector(location)
-        self.collector.start_collection()
+        if self.service:
+            self.collector = RemoteCollector(self.service, location)
+        else:
+            if self.lease:
+                self.lease.release()
+            self.lease = get_collector_registry().acquire(location)
+            self.collector = self.lease.collector
         
         # Update location coordinates for map centering
         self._update_location_coordinates(location)
     
+    def renew_lease(self):
+        """Tell the registry this session is still watching; called on every refresh"""
+        if self.lease:
+            self.collector = self.lease.renew()
+    
+    def climate_overlays(self, coordinates, weather_data, zoom=None):
+        """Climate overlays for the current location: simulated here, or read from the scoring service"""
+        if self.service:
+            with PROFILER.stage('render.fetch'):
+                # Simulated and cached by the service; empty until it has weather for the location
+                return self.service.overlays(self.current_location, zoom) or {}
+        return self.climate_collector.get_climate_overlays(coordinates, weather_data, zoom=zoom)
+    
     def _update_location_coordinates(self, location):
         """Get coordinates for the location to center the map"""
         # Common city coordinates - following RTACC location database pattern
@@ -119,9 +173,12 @@ def create_location_aware_dashboard():
         st.session_state.dashboard = DynamicCrisisDashboard()
     
     dashboard = st.session_state.dashboard
+    diagnostics = diagnostics_enabled()
     
     # Sidebar for location selection
     with st.sidebar:
+        view = st.radio("View", ["📍 Single location", "🌐 Fleet overview"], horizontal=True)
+        
         st.header("🌍 Location Settings")
         
         # Location selector with high-risk climate zones
@@ -205,11 +262,19 @@ def create_location_aware_dashboard():
             st.session_state.show_fire = show_fire
         
         # Auto-refresh toggle
-        auto_refresh = st.checkbox("🔄 Auto-refresh (30s)", value=True)
+        auto_refresh = st.checkbox("🔄 Auto-refresh", value=True)
         
         if st.button("🔄 Manual Refresh"):
             st.rerun()
     
+    if view == "🌐 Fleet overview":
+        st.title(f"🚨 RTACC Crisis Detection System")
+        st.subheader("🌐 Fleet Overview - every monitored location")
+        live_fragment('fleet', auto_refresh)(render_fleet_overview)(dashboard)
+        if diagnostics:
+            live_fragment('diagnostics', auto_refresh)(render_diagnostics_panel)()
+        return
+    
     # Main dashboard header with dynamic location
     st.title(f"🚨 RTACC Crisis Detection System")
     st.subheader(f"📍 Monitoring: **{dashboard.current_location}**")
@@ -225,67 +290,49 @@ def create_location_aware_dashboard():
         </div>
         """, unsafe_allow_html=True)
     
-    # Get current data
+    # Live parts of the page refresh as fragments on their own schedule
     if dashboard.collector:
-        try:
-            latest_data = dashboard.collector.get_latest_data()
-            crisis_result = dashboard.processor.process_crisis_detection(latest_data)
-            
-            # Crisis level indicator with location
-            risk_level = crisis_result['risk_level']
-            crisis_score = crisis_result['crisis_score']
-            
-            # Dynamic risk level display
-            risk_colors = {
-                'LOW': '#28a745',
-                'MEDIUM': '#ffc107', 
-                'HIGH': '#fd7e14',
-                'CRITICAL': '#dc3545'
-            }
-            
-            risk_color = risk_colors.get(risk_level, '#6c757d')
-            
-            st.markdown(f"""
-            <div style="text-align: center; padding: 20px; background-color: {risk_color}; color: white; border-radius: 15px; margin: 20px 0;">
-                <h1>🚨 CRISIS LEVEL: {risk_level}</h1>
-                <h2>📊 Score: {crisis_score:.3f} | 📍 {dashboard.current_location}</h2>
-                <p>Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Create tabs for different views - enhanced with climate tab
-            tab_names = ["📊 Overview", "🗺️ Map View", "📈 Analytics", "⚙️ Resources"]
-            if CLIMATE_FEATURES_AVAILABLE:
-                tab_names.insert(2, "🌪️ Climate")
-                tab1, tab2, tab3, tab4, tab5 = st.tabs(tab_names)
-            else:
-                tab1, tab2, tab3, tab4 = st.tabs(tab_names)
-            
-            with tab1:
-                create_enhanced_overview_tab(latest_data, crisis_result, dashboard.current_location)
-            
-            with tab2:
-                if CLIMATE_FEATURES_AVAILABLE:
-                    create_enhanced_climate_map_tab(latest_data, crisis_result, dashboard)
-                else:
-                    create_dynamic_map_tab(latest_data, crisis_result, dashboard)
-            
-            if CLIMATE_FEATURES_AVAILABLE:
-                with tab3:
-                    create_climate_analysis_tab(latest_data, crisis_result, dashboard)
-                with tab4:
-                    create_analytics_tab(latest_data, crisis_result, dashboard.current_location)
-                with tab5:
-                    create_resources_tab(crisis_result, dashboard.current_location)
-            else:
-                with tab3:
-                    create_analytics_tab(latest_data, crisis_result, dashboard.current_location)
-                with tab4:
-                    create_resources_tab(crisis_result, dashboard.current_location)
-                
-        except Exception as e:
-            st.error(f"⚠️ Error loading data for {dashboard.current_location}: {str(e)}")
-            st.info("Please check your internet connection and try refreshing the page.")
+        live_fragment('banner', auto_refresh)(render_crisis_banner)(dashboard)
+        
+        # Create tabs for different views - enhanced with climate tab
+        tab_names = ["📊 Overview", "🗺️ Map View", "📈 Analytics", "⚙️ Resources"]
+        if CLIMATE_FEATURES_AVAILABLE:
+            tab_names.insert(2, "🌪️ Climate")
+            tab1, tab2, tab3, tab4, tab5 = st.tabs(tab_names)
+        else:
+            tab1, tab2, tab3, tab4 = st.tabs(tab_names)
+        
+        location = dashboard.current_location
+        with tab1:
+            live_fragment('overview', auto_refresh)(render_live_tab)(
+                dashboard, lambda data, result: create_enhanced_overview_tab(data, result, location), 'tab.overview'
+            )
+        
+        with tab2:
+            map_tab = create_enhanced_climate_map_tab if CLIMATE_FEATURES_AVAILABLE else create_dynamic_map_tab
+            live_fragment('map', auto_refresh)(render_live_tab)(
+                dashboard, lambda data, result: map_tab(data, result, dashboard), 'tab.map'
+            )
+        
+        if CLIMATE_FEATURES_AVAILABLE:
+            with tab3:
+                live_fragment('climate', auto_refresh)(render_live_tab)(
+                    dashboard, lambda data, result: create_climate_analysis_tab(data, result, dashboard), 'tab.climate'
+                )
+            analytics_tab, resources_tab = tab4, tab5
+        else:
+            analytics_tab, resources_tab = tab3, tab4
+        
+        with analytics_tab:
+            live_fragment('analytics', auto_refresh)(render_live_tab)(
+                dashboard, lambda data, result: create_analytics_tab(
+                    data, result, location, trend=risk_trend(dashboard)
+                ), 'tab.analytics'
+            )
+        with resources_tab:
+            live_fragment('resources', auto_refresh)(render_live_tab)(
+                dashboard, lambda data, result: create_resources_tab(result, location, dashboard), 'tab.resources'
+            )
     
     else:
         st.warning(f"⚠️ Data collector not initialized for {dashboard.current_location}")
@@ -293,12 +340,290 @@ def create_location_aware_dashboard():
             dashboard.set_location(dashboard.current_location)
             st.rerun()
     
-    # Auto-refresh logic
-    if auto_refresh:
-        import time
-        time.sleep(30)
-        st.rerun()
+    if diagnostics:
+        live_fragment('diagnostics', auto_refresh)(render_diagnostics_panel)()
+
+def diagnostics_enabled():
+    """Whether this page shows the diagnostics panel (?diagnostics=1 or RTACC_DIAGNOSTICS=1)
+    
+    Showing it switches the process-wide profiler on, so renders are timed from then on.
+    """
+    enabled = st.query_params.get('diagnostics') == '1' or os.getenv('RTACC_DIAGNOSTICS') == '1'
+    if enabled and not PROFILER.enabled:
+        PROFILER.enable()
+    return enabled
+
+def plotly_chart(fig, **kwargs):
+    """st.plotly_chart, also timing the figure's JSON serialization and recording its size while profiling"""
+    if PROFILER.enabled:
+        with PROFILER.stage('render.serialize'):
+            payload = fig.to_json()
+        PROFILER.observe('render.figure_bytes', len(payload))
+    st.plotly_chart(fig, **kwargs)
+
+
+def render_diagnostics_panel():
+    """Rolling render-time percentiles per tab and stage, with the timing log for download"""
+    with st.expander("🩺 Render diagnostics", expanded=False):
+        renders = list(PROFILER.renders)
+        st.caption(f"Release {RELEASE} · last {len(renders)} renders"
+                   + (f" · logging to {PROFILER.log_path}" if PROFILER.log_path else ""))
+        if not renders:
+            st.info("ℹ️ No renders recorded yet; timings appear after the next refresh.")
+            return
+        
+        # Rolling p50/p90 per render of its total and each stage (0 where a render skipped the stage)
+        by_render = {}
+        for trace in renders:
+            by_render.setdefault(trace['render'], []).append(trace)
+        rows = []
+        for name, traces in sorted(by_render.items()):
+            total = rolling_summary([trace['total_ms'] for trace in traces])
+            row = {'Render': name, 'Count': total['count'],
+                   'Total p50 (ms)': total['p50'], 'Total p90 (ms)': total['p90']}
+            for stage, label in DIAGNOSTIC_STAGES.items():
+                stage_summary = rolling_summary([trace['stages'].get(stage, 0.0) for trace in traces])
+                row[f"{label} p50 (ms)"] = stage_summary['p50']
+                row[f"{label} p90 (ms)"] = stage_summary['p90']
+            sizes = rolling_summary([trace['metrics'].get('render.figure_bytes', 0) for trace in traces])
+            row['Figures p50 (KB)'] = sizes['p50'] / 1024
+            rows.append(row)
+        st.dataframe(pd.DataFrame(rows).round(2), hide_index=True, use_container_width=True)
+        
+        with st.popover("All profiled stages"):
+            st.dataframe(
+                pd.DataFrame([dict(summary, stage=stage) for stage, summary in PROFILER.rolling_snapshot().items()])
+                .set_index('stage').round(3),
+                use_container_width=True
+            )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "⬇️ Download timing log",
+                PROFILER.export_renders(),
+                file_name=f"rtacc-renders-{RELEASE}-{datetime.now():%Y%m%d-%H%M%S}.jsonl",
+                mime='application/x-ndjson',
+                help="Compare two logs with: python -m data_pipeline.profiling baseline.jsonl candidate.jsonl"
+            )
+        with col2:
+            if st.button("🧹 Reset timings"):
+                PROFILER.reset()
+
+def live_fragment(name, auto_refresh):
+    """Decorator turning a renderer into a fragment that reruns every REFRESH_SECONDS[name]"""
+    run_every = REFRESH_SECONDS[name] if auto_refresh else None
+    return lambda render: st.fragment(render, run_every=run_every)
+
+def snapshot_version(dashboard, now=None):
+    """Cache key of the live snapshot: location, collector data version and a time bucket
+    
+    Risks are scored over time windows, so scores change as old records age
+    out even when nothing new arrives; the bucket rolls over every fastest
+    refresh interval so stale risk decays on screen.
+    """
+    now = time.time() if now is None else now
+    bucket = int(now // min(REFRESH_SECONDS.values()))
+    return (dashboard.current_location, dashboard.collector.data_version(), bucket)
+
+def live_snapshot(dashboard):
+    """Latest data and crisis scoring, recomputed only when snapshot_version() changes
+    
+    Every fragment calls this, so a refresh with nothing new costs a version
+    check instead of a full scoring pass.
+    """
+    with PROFILER.stage('render.fetch'):
+        dashboard.renew_lease()
+        # Read the version before the data so records arriving mid-read show up next time
+        version = snapshot_version(dashboard)
+    snapshot = st.session_state.get('live_snapshot')
+    if snapshot is None or snapshot['version'] != version:
+        with PROFILER.stage('render.scoring'):
+            if dashboard.service:
+                # Scored by the service; until its first pass, score whatever it has sent locally
+                crisis_result = dashboard.collector.crisis_result() or dashboard.processor.process_crisis_detection(
+                    dashboard.collector.get_latest_data(), region=dashboard.current_location
+                )
+            else:
+                # Score on the live time-indexed series so each risk uses its own time window
+                crisis_result = dashboard.processor.process_crisis_detection(
+                    dashboard.collector.get_series(), region=dashboard.current_location
+                )
+        with PROFILER.stage('render.fetch'):
+            data = dashboard.collector.get_latest_data()
+        snapshot = {
+            'version': version,
+            'data': data,
+            'crisis_result': crisis_result,
+            'updated': datetime.now()
+        }
+        st.session_state.live_snapshot = snapshot
+    return snapshot
+
+def memoized_figure(name, build):
+    """Figure built for the current data version, rebuilt only after new data arrives"""
+    snapshot = st.session_state.get('live_snapshot')
+    version = snapshot['version'] if snapshot else None
+    figures = st.session_state.setdefault('figures', {})
+    cached = figures.get(name)
+    if version is None or cached is None or cached[0] != version:
+        with PROFILER.stage('render.figure'):
+            cached = (version, build())
+        figures[name] = cached
+    return cached[1]
+
+def render_crisis_banner(dashboard):
+    """Crisis level banner for the current location"""
+    try:
+        with PROFILER.render('banner', location=dashboard.current_location):
+            snapshot = live_snapshot(dashboard)
+        crisis_result = snapshot['crisis_result']
+        
+        # Crisis level indicator with location
+        risk_level = crisis_result['risk_level']
+        crisis_score = crisis_result['crisis_score']
+        
+        # Dynamic risk level display
+        risk_colors = {
+            'LOW': '#28a745',
+            'MEDIUM': '#ffc107', 
+            'HIGH': '#fd7e14',
+            'CRITICAL': '#dc3545'
+        }
+        
+        risk_color = risk_colors.get(risk_level, '#6c757d')
+        
+        st.markdown(f"""
+        <div style="text-align: center; padding: 20px; background-color: {risk_color}; color: white; border-radius: 15px; margin: 20px 0;">
+            <h1>🚨 CRISIS LEVEL: {risk_level}</h1>
+            <h2>📊 Score: {crisis_score:.3f} | 📍 {dashboard.current_location}</h2>
+            <p>Last Updated: {snapshot['updated'].strftime('%Y-%m-%d %H:%M:%S')}</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    except Exception as e:
+        st.error(f"⚠️ Error loading data for {dashboard.current_location}: {str(e)}")
+        st.info("Please check your internet connection and try refreshing the page.")
+
+def render_live_tab(dashboard, render, name):
+    """Render one tab from the shared live snapshot, as one profiled render named `name`"""
+    try:
+        with PROFILER.render(name, location=dashboard.current_location):
+            snapshot = live_snapshot(dashboard)
+            render(snapshot['data'], snapshot['crisis_result'])
+    except Exception as e:
+        st.error(f"⚠️ Error loading data for {dashboard.current_location}: {str(e)}")
+
+def fleet_snapshot(dashboard):
+    """Fleet snapshot from the scoring service, or batch-scored here over the shared collectors"""
+    if dashboard.service:
+        return dashboard.service.fleet()
+    dashboard.renew_lease()
+    return get_fleet_monitor().refresh()
+
+@profiled('dashboard.render_fleet_overview')
+def render_fleet_overview(dashboard):
+    """Sortable table and map of every monitored location
+    
+    The table and map are rebuilt only when the fleet snapshot version
+    changes; other refreshes only recompute data freshness and filters.
+    """
+    with PROFILER.render('fleet'):
+        _render_fleet_overview(dashboard)
+
+def _render_fleet_overview(dashboard):
+    try:
+        with PROFILER.stage('render.fetch'):
+            snapshot = fleet_snapshot(dashboard)
+    except Exception as e:
+        st.error(f"⚠️ Error loading fleet overview: {str(e)}")
+        return
+    if not snapshot or not snapshot['rows']:
+        st.info("ℹ️ No locations are being monitored yet. Select a location, or start the scoring service with a list of locations.")
+        return
+    
+    view = st.session_state.get('fleet_view')
+    if view is None or view['version'] != snapshot['version']:
+        with PROFILER.stage('render.figure'):
+            table = pd.DataFrame(snapshot['rows'])
+            view = {'version': snapshot['version'], 'table': table, 'map': create_fleet_map(table)}
+        st.session_state.fleet_view = view
+    table = view['table']
+    
+    age_minutes = (time.time() - table['last_update'].astype(float)) / 60
+    stale = age_minutes.isna() | (age_minutes * 60 > STALE_SECONDS)
+    
+    levels = [level for level in LEVEL_ORDER if level in set(table['risk_level'])] + \
+        sorted(set(table['risk_level']) - set(LEVEL_ORDER))
+    columns = st.columns(len(levels) + 2)
+    columns[0].metric("📍 Locations", len(table))
+    for column, level in zip(columns[1:], levels):
+        column.metric(level.title(), int((table['risk_level'] == level).sum()))
+    columns[-1].metric("⏳ Stale", int(stale.sum()), help=f"No new data for {STALE_SECONDS // 60} minutes")
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        selected_levels = st.multiselect("Risk levels", levels, default=levels)
+    with col2:
+        search = st.text_input("Filter locations", placeholder="e.g., CA, USA")
+    
+    shown = table['risk_level'].isin(selected_levels)
+    if search:
+        shown &= table['location'].str.contains(search, case=False, regex=False)
+    
+    plotly_chart(view['map'], use_container_width=True)
+    st.dataframe(
+        table.assign(age_minutes=age_minutes, stale=stale)[shown],
+        column_order=['location', 'crisis_score', 'risk_level', 'trend', 'scores', 'flood_risk', 'fire_risk',
+                      'age_minutes', 'stale', 'records'],
+        column_config={
+            'location': st.column_config.TextColumn("Location"),
+            'crisis_score': st.column_config.ProgressColumn("Score", min_value=0.0, max_value=1.0, format="%.3f"),
+            'risk_level': st.column_config.TextColumn("Level"),
+            'trend': st.column_config.NumberColumn("Trend", format="%+.3f"),
+            'scores': st.column_config.LineChartColumn("Recent scores", y_min=0.0, y_max=1.0),
+            'flood_risk': st.column_config.ProgressColumn("Flood", min_value=0.0, max_value=1.0, format="%.2f"),
+            'fire_risk': st.column_config.ProgressColumn("Fire", min_value=0.0, max_value=1.0, format="%.2f"),
+            'age_minutes': st.column_config.NumberColumn("Updated (min ago)", format="%.0f"),
+            'stale': st.column_config.CheckboxColumn("Stale"),
+            'records': st.column_config.NumberColumn("Records")
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+def create_fleet_map(table):
+    """One marker trace for the whole fleet, coloured by crisis score"""
+    located = table.dropna(subset=['lat', 'lon'])
+    fig = go.Figure(go.Scattermapbox(
+        lat=located['lat'],
+        lon=located['lon'],
+        mode='markers',
+        marker=dict(
+            size=np.where(located['risk_level'].isin(['HIGH', 'CRITICAL']), 14, 9),
+            color=located['crisis_score'],
+            colorscale=[[0, 'green'], [0.5, 'yellow'], [1, 'red']],
+            cmin=0,
+            cmax=1,
+            colorbar=dict(title="Score")
+        ),
+        text=located['location'],
+        customdata=located['risk_level'],
+        hovertemplate="<b>%{text}</b><br>Score: %{marker.color:.3f}<br>Level: %{customdata}<extra></extra>"
+    ))
+    fig.update_layout(
+        mapbox=dict(
+            style='open-street-map',
+            center=dict(lat=float(located['lat'].mean()) if len(located) else 20,
+                        lon=float(located['lon'].mean()) if len(located) else 0),
+            zoom=1
+        ),
+        height=450,
+        margin=dict(l=0, r=0, t=0, b=0)
+    )
+    return fig
 
+@profiled('dashboard.create_enhanced_overview_tab')
 def create_enhanced_overview_tab(data, crisis_result, location):
     """Enhanced overview tab with climate metrics"""
     col1, col2 = st.columns(2)
@@ -333,7 +658,7 @@ def create_enhanced_overview_tab(data, crisis_result, location):
                 }
             ))
             fig.update_layout(height=300)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
             
             # Enhanced weather details with climate indicators
             st.write(f"**Current Weather in {location}:**")
@@ -388,7 +713,7 @@ def create_enhanced_overview_tab(data, crisis_result, location):
                 }
             ))
             fig.update_layout(height=300)
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
             
             # Traffic details for location
             recent_traffic = traffic_data[-5:]
@@ -403,6 +728,7 @@ def create_enhanced_overview_tab(data, crisis_result, location):
         else:
             st.warning(f"No traffic data available for {location}")
 
+@profiled('dashboard.create_enhanced_climate_map_tab')
 def create_enhanced_climate_map_tab(data, crisis_result, dashboard):
     """Enhanced map tab with climate overlays"""
     st.subheader(f"🌪️ Enhanced Climate Crisis Map - {dashboard.current_location}")
@@ -419,12 +745,23 @@ def create_enhanced_climate_map_tab(data, crisis_result, dashboard):
     
     coordinates = (coords['lat'], coords['lon'])
     
+    def build_climate_map():
+        zoom = coords.get('zoom', 10)
+        weather = data['weather'][-1] if data.get('weather') else {}
+        fig = dashboard.climate_map.create_enhanced_crisis_map(
+            coordinates, data, crisis_result, zoom=zoom,
+            overlays=dashboard.climate_overlays(coordinates, weather, zoom=zoom)
+        )
+        # Traffic on top of the climate layers: congestion hexagons, then incident markers
+        add_congestion_hexes(fig, dashboard.collector)
+        # Beside the hazard colorbar rather than on top of it
+        fig.update_traces(colorbar=dict(x=1.08), selector=dict(name='Congestion'))
+        return add_incident_clusters(fig, dashboard.collector, coords)
+    
     # Create enhanced climate visualization
-    climate_fig = dashboard.climate_map.create_enhanced_crisis_map(
-        coordinates, data, crisis_result
-    )
+    climate_fig = memoized_figure('climate_map', build_climate_map)
     
-    st.plotly_chart(climate_fig, use_container_width=True)
+    plotly_chart(climate_fig, use_container_width=True)
     
     # Climate-specific metrics following RTACC metric pattern
     col1, col2, col3, col4 = st.columns(4)
@@ -466,6 +803,7 @@ def create_enhanced_climate_map_tab(data, crisis_result, dashboard):
             delta="CRITICAL" if fire_danger == "HIGH" and wind > 20 else None
         )
 
+@profiled('dashboard.create_climate_analysis_tab')
 def create_climate_analysis_tab(data, crisis_result, dashboard):
     """New climate analysis tab with detailed environmental data"""
     st.subheader(f"🌪️ Climate Risk Analysis - {dashboard.current_location}")
@@ -479,7 +817,9 @@ def create_climate_analysis_tab(data, crisis_result, dashboard):
     
     # Get climate overlay data
     try:
-        climate_overlays = dashboard.climate_collector.get_climate_overlays(coordinates, weather_data)
+        climate_overlays = dashboard.climate_overlays(
+            coordinates, weather_data, zoom=dashboard.location_coordinates.get('zoom')
+        )
         
         col1, col2 = st.columns(2)
         
@@ -507,9 +847,11 @@ def create_climate_analysis_tab(data, crisis_result, dashboard):
                     }
                 ))
                 fig.update_layout(height=250)
-                st.plotly_chart(fig, use_container_width=True)
+                plotly_chart(fig, use_container_width=True)
                 
                 st.write(f"Max Flood Risk: {max_risk:.3f}")
+                if 'max_depth_m' in flood_data:
+                    st.write(f"Max Ponding Depth: {flood_data['max_depth_m']:.2f}m (terrain model)")
                 st.write(f"Precipitation: {weather_data.get('precipitation', 0):.1f}mm")
                 
             else:
@@ -539,12 +881,21 @@ def create_climate_analysis_tab(data, crisis_result, dashboard):
                     }
                 ))
                 fig.update_layout(height=250)
-                st.plotly_chart(fig, use_container_width=True)
+                plotly_chart(fig, use_container_width=True)
                 
                 st.write(f"Fire Danger Index: {fire_danger:.1f}")
                 st.write(f"Temperature: {weather_data.get('temperature', 0):.1f}°C")
                 st.write(f"Humidity: {weather_data.get('humidity', 0):.1f}%")
                 
+                if 'arrival_time' in fire_data:
+                    st.write(f"Projected Burned Area: {fire_data['burned_area_km2']:.2f} km²")
+                    plotly_chart(
+                        memoized_figure('fire_spread', lambda: dashboard.climate_map.create_fire_spread_animation(
+                            coordinates, fire_data
+                        )),
+                        use_container_width=True
+                    )
+                
             else:
                 st.info("No significant wildfire risk detected")
         
@@ -552,21 +903,89 @@ def create_climate_analysis_tab(data, crisis_result, dashboard):
         st.write("**📡 Weather Radar Data:**")
         radar_layers = climate_overlays.get('radar_layers', {})
         
+        def radar_status(layer):
+            tile = radar_layers.get(layer)
+            if not tile or not tile['path']:
+                return "❌"
+            return "✅" if tile['fresh'] else "⏳"
+        
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Precipitation Layer", "✅" if 'precipitation' in radar_layers else "❌")
+            st.metric("Precipitation Layer", radar_status('precipitation'))
         with col2:
-            st.metric("Temperature Layer", "✅" if 'temperature' in radar_layers else "❌")
+            st.metric("Temperature Layer", radar_status('temperature'))
         with col3:
-            st.metric("Wind Layer", "✅" if 'wind' in radar_layers else "❌")
+            st.metric("Wind Layer", radar_status('wind'))
         with col4:
-            st.metric("Pressure Layer", "✅" if 'pressure' in radar_layers else "❌")
+            st.metric("Pressure Layer", radar_status('pressure'))
             
     except Exception as e:
         st.error(f"Error generating climate analysis: {str(e)}")
 
 # ...existing code... (keep all other functions unchanged)
 
+def add_congestion_hexes(fig, collector):
+    """Recent traffic congestion as a hexagon layer, one cell per area however many readings it holds"""
+    grid = collector.congestion_grid
+    cells = collector.congestion_cells()
+    if len(cells['q']):
+        fig.add_trace(go.Choroplethmapbox(
+            geojson=grid.geojson(cells),
+            locations=[f"{q},{r}" for q, r in zip(cells['q'].tolist(), cells['r'].tolist())],
+            z=np.round(cells['congestion'], 3),
+            customdata=np.column_stack([cells['samples'], cells['incidents']]),
+            colorscale='RdYlGn_r',
+            zmin=0,
+            zmax=1,
+            marker=dict(opacity=0.45, line=dict(width=0.5, color='white')),
+            colorbar=dict(title="Congestion", x=1.0, len=0.5),
+            name='Congestion',
+            hovertemplate='Congestion: %{z:.2f}<br>Readings: %{customdata[0]}<br>Incidents: %{customdata[1]}<extra></extra>'
+        ))
+    return fig
+
+def add_incident_clusters(fig, collector, coords):
+    """Traffic incidents for the map view: triangles for single incidents, counted circles for clusters"""
+    zoom = coords.get('zoom', 10)
+    bounds = viewport_bounds(coords['lat'], coords['lon'], zoom)
+    clusters = collector.incident_clusters(bounds, zoom)
+    singles = [c for c in clusters if c['count'] == 1]
+    groups = [c for c in clusters if c['count'] > 1]
+    
+    if singles:
+        fig.add_trace(go.Scattermapbox(
+            lat=[c['lat'] for c in singles],
+            lon=[c['lon'] for c in singles],
+            mode='markers',
+            marker=dict(
+                size=12,
+                color='orange',
+                symbol='triangle-up'
+            ),
+            text=[c['item'].get('location', '') for c in singles],
+            name='Traffic Incidents',
+            hovertemplate='Traffic Incident<br>%{text}<extra></extra>'
+        ))
+    
+    if groups:
+        counts = np.array([c['count'] for c in groups])
+        fig.add_trace(go.Scattermapbox(
+            lat=[c['lat'] for c in groups],
+            lon=[c['lon'] for c in groups],
+            mode='markers+text',
+            marker=dict(
+                size=np.clip(14 + 6 * np.log10(counts), 14, 40),
+                color='darkorange',
+                opacity=0.8
+            ),
+            text=counts.astype(str),
+            textfont=dict(color='white'),
+            name='Incident Clusters',
+            hovertemplate='%{text} traffic incidents<extra></extra>'
+        ))
+    return fig
+
+@profiled('dashboard.create_dynamic_map_tab')
 def create_dynamic_map_tab(data, crisis_result, dashboard):
     """Create map tab with dynamic location centering"""
     st.subheader(f"🗺️ Crisis Map - {dashboard.current_location}")
@@ -620,30 +1039,11 @@ def create_dynamic_map_tab(data, crisis_result, dashboard):
             hoverinfo='skip'
         ))
     
-    # Add incident markers if available
-    traffic_data = data.get('traffic', [])
-    incident_locations = []
-    for traffic in traffic_data[-10:]:  # Last 10 traffic data points
-        if traffic.get('incident_detected', False):
-            # Simulate incident locations around the main location
-            incident_lat = coords['lat'] + np.random.normal(0, 0.01)
-            incident_lon = coords['lon'] + np.random.normal(0, 0.01)
-            incident_locations.append((incident_lat, incident_lon))
-    
-    if incident_locations:
-        incident_lats, incident_lons = zip(*incident_locations)
-        fig.add_trace(go.Scattermapbox(
-            lat=incident_lats,
-            lon=incident_lons,
-            mode='markers',
-            marker=dict(
-                size=12,
-                color='orange',
-                symbol='triangle-up'
-            ),
-            name='Traffic Incidents',
-            hovertemplate='Traffic Incident<extra></extra>'
-        ))
+    # City-wide congestion surface: one hexagon per cell, however many readings it holds
+    add_congestion_hexes(fig, dashboard.collector)
+    
+    # Add incident markers, clustered for the current view
+    add_incident_clusters(fig, dashboard.collector, coords)
     
     # Update map layout with dynamic center
     fig.update_layout(
@@ -658,14 +1058,15 @@ def create_dynamic_map_tab(data, crisis_result, dashboard):
         showlegend=True
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
     
     # Map legend
     st.markdown(f"""
     **Map Legend for {dashboard.current_location}:**
     - 🔴 Red Circle: {crisis_result['risk_level']} risk area
     - 🟢 Green Marker: Normal monitoring location
-    - 🔺 Orange Triangles: Traffic incidents
+    - 🟩🟥 Hexagons: Recent congestion by area (green free-flowing, red jammed)
+    - 🔺 Orange Triangles: Traffic incidents (numbered circles group nearby incidents)
     - 🗺️ Centered on: {coords['lat']:.4f}, {coords['lon']:.4f}
     """)
 
@@ -684,8 +1085,24 @@ def create_circle_coords(center_lat, center_lon, radius_km):
     
     return lats.tolist(), lons.tolist()
 
-def create_analytics_tab(data, crisis_result, location):
-    """Create analytics tab with location-specific data"""
+def risk_trend(dashboard):
+    """(records, field) behind the risk trend chart
+    
+    Locally the collector's full weather series and its risk scores; in
+    service mode the crisis scores the service publishes under /history.
+    """
+    if dashboard.service:
+        with PROFILER.stage('render.fetch'):
+            return dashboard.service.history(dashboard.current_location) or [], 'crisis_score'
+    return dashboard.collector.get_series()['weather'], 'risk_score'
+
+@profiled('dashboard.create_analytics_tab')
+def create_analytics_tab(data, crisis_result, location, trend=None):
+    """Create analytics tab with location-specific data
+    
+    trend: (records, field) for the risk trend, see risk_trend(); without
+    it the chart uses the recent weather records in data.
+    """
     st.subheader(f"📈 Analytics Dashboard - {location}")
     
     col1, col2 = st.columns(2)
@@ -709,7 +1126,7 @@ def create_analytics_tab(data, crisis_result, location):
             color_continuous_scale=['green', 'yellow', 'red']
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.write(f"**Data Quality for {location}:**")
@@ -728,32 +1145,47 @@ def create_analytics_tab(data, crisis_result, location):
             title=f"Data Distribution - {location}"
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
     
     # Time series data
     st.subheader(f"📊 Time Series Analysis - {location}")
     
-    # Create sample time series for crisis score
-    if len(data.get('weather', [])) > 1:
-        times = [datetime.now() - timedelta(minutes=i*5) for i in range(len(data['weather']))]
-        scores = [w.get('risk_score', 0) for w in data['weather']]
+    # Risk score over the whole history, downsampled to the chart width
+    records, field = trend if trend else (data.get('weather', []), 'risk_score')
+    if len(records) > 1:
+        times, scores = time_series(records, field)
+        keep = downsample(times, scores, target_points())
         
         df = pd.DataFrame({
-            'Time': times,
-            'Risk Score': scores
+            'Time': [datetime.fromtimestamp(t) for t in times[keep]],
+            'Risk Score': scores[keep]
         })
         
         fig = px.line(df, x='Time', y='Risk Score', 
                      title=f'Risk Score Trend - {location}')
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
+        if len(keep) < len(times):
+            st.caption(f"Showing {len(keep):,} of {len(times):,} readings (peaks and troughs preserved)")
+
+def time_series(records, field):
+    """Epoch-second timestamps and float values of one field, for downsampling"""
+    if hasattr(records, 'epoch_times'):
+        times = records.epoch_times(0, len(records))
+    else:
+        times = np.array([pd.Timestamp(r['timestamp']).timestamp() if r.get('timestamp') is not None else np.nan
+                          for r in records], dtype=np.float64)
+    values = np.array([r.get(field, np.nan) for r in records[:len(times)]], dtype=np.float64)
+    return times, values
 
-def create_resources_tab(crisis_result, location):
+@profiled('dashboard.create_resources_tab')
+def create_resources_tab(crisis_result, location, dashboard):
     """Create resources tab with location-specific recommendations"""
     st.subheader(f"⚙️ Resource Allocation - {location}")
     
-    # Get resource optimization
-    available_resources = ['police', 'ambulance', 'fire_department', 'emergency_management']
-    resource_plan = crisis_result  # You'd call optimize_resources here
+    # Dispatch the plan's needs from the unit pool
+    coords = dashboard.collector.location_coords if dashboard.collector else None
+    available_resources = unit_pool(coords) if coords else []
+    resource_plan = dashboard.processor.optimize_resources(crisis_result, available_resources, coords)
     
     risk_level = crisis_result['risk_level']
     
@@ -795,21 +1227,26 @@ def create_resources_tab(crisis_result, location):
     with col2:
         st.write(f"**Resource Deployment Status:**")
         
-        # Resource status
+        # Resource status from the allocator's assignments
+        assignments = resource_plan.get('assignments', [])
+        unmet_needs = resource_plan.get('unmet_needs', {})
         resources = {
-            'Police Units': '🚔' + (' DEPLOYED' if risk_level in ['HIGH', 'CRITICAL'] else ' STANDBY'),
-            'Medical Teams': '🚑' + (' DEPLOYED' if risk_level == 'CRITICAL' else ' STANDBY'),
-            'Fire Department': '🚒' + (' DEPLOYED' if risk_level == 'CRITICAL' else ' STANDBY'),
-            'Emergency Mgmt': '📞' + (' ACTIVE' if risk_level in ['MEDIUM', 'HIGH', 'CRITICAL'] else ' MONITORING')
+            'Police Units': ('🚔', 'police'),
+            'Medical Teams': ('🚑', 'ambulance'),
+            'Fire Department': ('🚒', 'fire_department'),
+            'Emergency Mgmt': ('📞', 'emergency_management')
         }
         
-        for resource, status in resources.items():
-            if 'DEPLOYED' in status or 'ACTIVE' in status:
-                st.success(f"{resource}: {status}")
-            elif 'STANDBY' in status:
-                st.warning(f"{resource}: {status}")
+        for resource, (icon, unit_type) in resources.items():
+            pool = sum(1 for unit in available_resources if unit['type'] == unit_type)
+            deployed = [a for a in assignments if a['unit_type'] == unit_type]
+            if unmet_needs.get(unit_type):
+                st.error(f"{resource}: {icon} {len(deployed)}/{pool} DEPLOYED · {unmet_needs[unit_type]} SHORT")
+            elif deployed:
+                eta = max(a['travel_minutes'] for a in deployed)
+                st.success(f"{resource}: {icon} {len(deployed)}/{pool} DEPLOYED · ETA {eta:.0f} min")
             else:
-                st.info(f"{resource}: {status}")
+                st.warning(f"{resource}: {icon} STANDBY ({pool} available)")
         
         st.write(f"**Location-Specific Notes:**")
         st.write(f"• Monitoring: {location}")